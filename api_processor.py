@@ -2,11 +2,24 @@
 API 처리 모듈
 OpenAI API를 사용한 텍스트 교정
 """
+import os
+import re
 import json
 import datetime
 import time
-import openai
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+from page_store import PageResultStore, settings_key
+from block_diff import reuse_corrections
+from profiler import profile_stage
+from llm_client import ClientPool, LatencyStats, timed_request
+from endpoint_router import EndpointRouter
+from correction_cascade import CascadeValidator, CostLedger, correction_model_key
+from layout_processor import LayoutProcessor
+
+# 같은 프로세스의 여러 APIProcessor(서비스 워커 등)가 token_usage.json을 읽고 더해 쓰는 구간 보호
+_token_usage_lock = threading.Lock()
 
 
 class APIProcessor:
@@ -14,6 +27,12 @@ class APIProcessor:
         self.config = config_manager
         self.usage = 0
         self.token_usage_file = 'token_usage.json'
+        # 실행 간 재사용하는 HTTP 클라이언트와 누적 요청 통계
+        self.clients = ClientPool(config_manager)
+        self.request_stats = LatencyStats()
+        self.last_cost = None  # 마지막 교정 실행의 모델별 비용/지연 집계
+        self.last_batching = None  # 마지막 교정 실행의 배치 수/토큰/fallback 집계
+        self.layout = LayoutProcessor(config_manager)
         
     def load_token_usage(self):
         """토큰 사용량 로드"""
@@ -27,174 +46,530 @@ class APIProcessor:
         return 0
     
     def save_token_usage(self, used):
-        """토큰 사용량 저장"""
+        """토큰 사용량 저장 (임시 파일에 쓴 뒤 교체해 읽는 쪽이 잘린 파일을 보지 않음)"""
         data = {
             'date': datetime.datetime.now().strftime('%Y-%m-%d'),
             'used': used
         }
-        with open(self.token_usage_file, 'w', encoding='utf-8') as f:
+        tmp_path = f"{self.token_usage_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.token_usage_file)
+
+    def add_token_usage(self, tokens):
+        """
+        파일에 기록된 오늘 사용량을 다시 읽어 tokens를 더해 저장합니다.
+        실행별 누적값을 덮어쓰지 않으므로 여러 워커가 동시에 교정해도 사용량이 빠지지 않습니다.
+        반환: 오늘 누적 사용량
+        """
+        with _token_usage_lock:
+            used = self.load_token_usage() + tokens
+            self.save_token_usage(used)
+        return used
     
     def check_token_limit(self):
         """일일 토큰 제한 확인"""
         daily_limit = self.config.get_setting('daily_token_limit', 2000000)
         current_usage = self.load_token_usage()
         return current_usage < daily_limit
-    def recover_text_with_api(self, raw_json, out_json, api_key, progress_callback=None, log_callback=None):
-        """API를 사용해 텍스트 교정"""
+    @profile_stage('api')
+    def recover_text_with_api(self, raw_json, out_json, api_key, progress_callback=None, log_callback=None,
+                              cancel_token=None, page_callback=None):
+        """
+        API를 사용해 텍스트 교정.
+        cancel_token이 취소되면 진행 중인 HTTP 요청을 끊고 배치 단위로 중단하며,
+        완료된 배치까지의 결과를 체크포인트(out_json + '.partial')에 남겨
+        다음 실행에서 이어서 교정합니다.
+        OCR 결과가 일부만 다시 만들어진 경우 기존 교정 결과(out_json)에서 (페이지, 원문)이
+        같은 블록은 재사용하고 바뀐 블록만 API로 보냅니다.
+        page_callback(page_num, blocks)은 페이지의 모든 블록 교정이 끝날 때마다 페이지 순서대로 호출됩니다.
+        correction_mode가 'cascade'이면 배치를 먼저 cascade_fast_model로 교정하고 검증에 실패한 줄만
+        강한 모델(cascade_strong_model, 비우면 base_model)로 다시 보냅니다. 모델별 요청/토큰/지연/비용은
+        out_json 옆의 '_cost.json'에 기록합니다.
+        batch_strategy가 'reading_order'이면 배치를 페이지 단위로 나누고 페이지 안에서는 읽기 순서(위→아래, 왼쪽→오른쪽)로
+        보내며, 배치 앞뒤의 블록 batch_context_lines개를 교정하지 않는 참고 문맥으로 함께 보냅니다.
+        'flat'이면 기존처럼 블록 순서대로 batch_size개씩 보냅니다.
+        """
         # 설정값 로드
         batch_size = self.config.get_setting('batch_size', 50)
+        strategy = self.config.get_setting('batch_strategy', 'flat')
+        if strategy not in ('flat', 'reading_order'):
+            raise ValueError(f"지원하지 않는 배치 방식: {strategy}")
+        context_lines = self.config.get_setting('batch_context_lines', 2) if strategy == 'reading_order' else 0
         max_retries = self.config.get_setting('max_retries', 3)
-        timeout_seconds = self.config.get_setting('timeout_seconds', 60)
-        base_model = self.config.get_setting('base_model', 'gpt-5-mini')
-        
-        # 토큰 사용량 로드
-        usage = self.load_token_usage()
+        model_key = correction_model_key(self.config)
+        cascade = self.config.get_setting('correction_mode', 'single') == 'cascade'
+        fast_model = self.config.get_setting('cascade_fast_model', 'gpt-4.1-nano')
+        # 비우면 엔드포인트별 모델(기본 base_model)로 승격
+        strong_model = self.config.get_setting('cascade_strong_model', '') or None
+        validator = CascadeValidator.from_config(self.config) if cascade else None
+        ledger = CostLedger(self.config.get_setting('model_prices', {}))
         
         # 데이터 로드
         with open(raw_json, 'r', encoding='utf-8') as f:
             items = json.load(f)
         
-        corrected = []
-        openai.api_key = api_key
+        # 교정 결과는 불러온 블록에 text_corrected로 바로 기록 (블록을 복사한 두 번째 목록을 만들지 않음)
+        # done: 앞에서부터 교정이 끝난 블록 수. 이전에 중단된 실행의 체크포인트가 있으면 이어서 교정
+        partial_path = out_json + '.partial'
+        done = self._load_checkpoint(partial_path, items)
+        if done and log_callback:
+            log_callback(f"교정 체크포인트 재사용: {done}/{len(items)}개 블록")
 
-        # 전체 블록을 batch_size 단위로 분할
-        total = len(items)
-        total_batches = (total + batch_size - 1) // batch_size
-        
+        # API로 보내지 않고 정해지는 교정 결과: 빈 페이지 표시 블록, 중복 페이지의 저장된 교정
+        preset = {idx: '' for idx, b in enumerate(items) if b.get('blank')}
+        page_store = PageResultStore.from_config(self.config)
+        page_groups = self._page_hash_groups(items) if page_store else {}
+        for (page_hash, _), indices in page_groups.items():
+            texts = page_store.get_corrections(
+                page_hash, settings_key(self.config), model_key,
+                [items[i]['text_raw'] for i in indices]
+            )
+            if texts is not None:
+                preset.update(zip(indices, texts))
+        reused_count = len(preset) - sum(1 for b in items if b.get('blank'))
+        if reused_count and log_callback:
+            log_callback(f"중복 페이지의 저장된 교정 결과 재사용: {reused_count}개 블록")
+
+        # 이전 교정 결과 중 원문이 바뀌지 않은 블록 재사용 (부분 재스캔 시 변경분만 교정)
+        previous = self._load_previous(out_json)
+        if previous:
+            unchanged = {idx: text for idx, text in reuse_corrections(previous, items).items()
+                         if idx not in preset}
+            preset.update(unchanged)
+            if log_callback:
+                log_callback(f"변경되지 않은 블록 {len(unchanged)}개는 기존 교정 결과 재사용 "
+                             f"(교정 대상 {len(items) - len(preset)}개)")
 
-        for batch_idx in range(0, total, batch_size):
-            chunk = items[batch_idx:batch_idx + batch_size]
-            current_batch = batch_idx // batch_size + 1
+        # 엔드포인트별로 연결 풀을 유지하는 클라이언트 재사용
+        # (취소 시 연결을 닫아 진행 중인 요청 중단, 다음 실행에서 다시 생성)
+        router = EndpointRouter.from_config(self.config, api_key)
+        clients = {ep: self.clients.get(ep.api_key, ep.base_url) for ep in router.endpoints}
+        if cancel_token:
+            for client in clients.values():
+                cancel_token.register(client.close)
 
-            if progress_callback:
-                progress_callback(f"API 교정 중... 배치 {current_batch}/{total_batches}", (current_batch / total_batches) * 100)
+        # 페이지별 블록 구간 [(페이지, 시작, 끝)] — 교정이 끝난 페이지부터 page_callback으로 전달
+        page_spans = []
+        for idx, b in enumerate(items):
+            if page_spans and page_spans[-1][0] == b['page']:
+                page_spans[-1][2] = idx + 1
+            else:
+                page_spans.append([b['page'], idx, idx + 1])
+        next_span = 0
 
-            # 인덱스와 함께 텍스트를 보냄
-            raws = [f"[{batch_idx + i}] {b['text_raw']}" for i, b in enumerate(chunk)]
+        # 배치 구간 분할 → [(시작, 끝, 요청할 블록 인덱스 목록, 배치 번호, (앞 문맥, 뒤 문맥))]
+        # (결과가 정해진 블록은 요청에서 빠지므로 구간 길이는 batch_size보다 길 수 있음)
+        if strategy == 'reading_order':
+            chunks = self._reading_order_chunks(items, page_spans, preset, done, batch_size)
+        else:
+            chunks = self._flat_chunks(items, preset, done, batch_size)
+        sequence = self._reading_sequence(items, page_spans) if context_lines else []
+        position = {idx: pos for pos, idx in enumerate(sequence)}
+        plans = []
+        current_batch = 0
+        for chunk_start, batch_end, indices in chunks:
+            context = ((), ())
+            if indices:
+                current_batch += 1
+                if context_lines:
+                    first = min(position[i] for i in indices)
+                    last = max(position[i] for i in indices)
+                    context = (sequence[max(0, first - context_lines):first],
+                               sequence[last + 1:last + 1 + context_lines])
+            plans.append((chunk_start, batch_end, indices, current_batch, context))
+        total_batches = max(1, current_batch)
+        # 배치 방식 비교용 집계 (응답에 [번호] 줄이 없어 원문을 그대로 쓴 블록 = fallback)
+        batching = {'strategy': strategy, 'batches': current_batch,
+                    'requested_blocks': sum(len(p[2]) for p in plans), 'fallback_blocks': 0,
+                    'tokens': 0, 'context_lines': sum(len(p[4][0]) + len(p[4][1]) for p in plans)}
+
+        def send(indices, batch_no, tier, model, context=((), ())):
+            """블록 목록 교정 요청 → ({인덱스: 교정 텍스트}, 사용 토큰) 또는 None(재시도 소진)"""
+            # 인덱스와 함께 텍스트를 보냄 (결과가 정해진 블록은 제외)
             prompt = (
                 "EasyOCR 결과를 바탕으로 원본 텍스트를 복원해주세요.\n"
                 "각 줄 앞의 [번호]는 반드시 그대로 유지해서 응답하세요.\n"
-                + "\n".join(raws)
             )
+            before, after = context
+            if before:
+                prompt += ("앞 문맥 (참고용, 교정하거나 응답에 포함하지 마세요):\n"
+                           + "".join(f"> {items[i]['text_raw']}\n" for i in before)
+                           + "교정할 줄:\n")
+            prompt += "\n".join(f"[{i}] {items[i]['text_raw']}" for i in indices)
+            if after:
+                prompt += ("\n뒤 문맥 (참고용, 교정하거나 응답에 포함하지 마세요):\n"
+                           + "\n".join(f"> {items[i]['text_raw']}" for i in after))
 
-            retries = 0
-            resp = None
-            while retries < max_retries:
-                try:
-                    resp = openai.chat.completions.create(
-                        model=base_model,
-                        messages=[
-                            {
-                                'role': 'system',
-                                'content': (
-                                    '당신은 EasyOCR 텍스트 데이터 복구 전문가입니다. '
-                                    '주어진 OCR 결과는 정확하지 않습니다, 따라서 복구 전문가인 당신의 지식을 사용하여 원문 텍스트를 추론해야 합니다.'
-                                    '주어진 텍스트 조각 배열을 원본 형태로 복원하여, '
-                                    '반드시 같은 순서와 개수의 줄로 응답해야 하며, 각 줄 앞의 [번호]는 반드시 그대로 유지해야 합니다.'
-                                )
-                            },
-                            {'role': 'user', 'content': prompt}
-                        ],
-                        temperature=0
-                    )
-                    break
-                except Exception as e:
-                    error_str = str(e).lower()
-                    # ...existing code...
-                    if any(keyword in error_str for keyword in ['invalid_api_key', 'incorrect api key', 'error code: 401', 'unauthorized']):
-                        error_msg = ("유효한 API Key를 입력하지 않아 정상적인 교정 작업이 이루어지지 않았습니다. 작업을 중단합니다.\n"
-                                   "API Key를 다시 확인하고 올바른 API Key를 입력해주세요.")
-                        raise Exception(f"API_KEY_ERROR: {error_msg}")
-                    elif any(keyword in error_str for keyword in ['quota', 'rate limit', 'billing', 'exceeded']):
-                        error_msg = ("API 사용량 한도를 초과했거나 결제 문제가 발생했습니다.\n"
-                                   "OpenAI 계정의 사용량 및 결제 상태를 확인해주세요.")
-                        raise Exception(f"QUOTA_ERROR: {error_msg}")
-                    elif any(keyword in error_str for keyword in ['model not found', 'invalid model', 'model']):
-                        error_msg = ("지정된 모델을 찾을 수 없습니다.\n"
-                                   "사용 가능한 모델명을 확인하고 다시 시도해주세요.")
-                        raise Exception(f"MODEL_ERROR: {error_msg}")
-                    elif any(keyword in error_str for keyword in ['context length', 'token limit', 'too long']):
-                        error_msg = ("입력 텍스트가 너무 길어서 처리할 수 없습니다.\n"
-                                   "더 작은 단위로 나누어 처리해주세요.")
-                        raise Exception(f"TOKEN_LIMIT_ERROR: {error_msg}")
-                    elif any(keyword in error_str for keyword in ['connection', 'network', 'timeout']):
-                        retries += 1
-                        if retries < 3:
-                            retry_msg = f"[재시도] 네트워크 오류로 재시도 중... ({retries}/3)"
-                            if log_callback:
-                                log_callback(retry_msg)
-                            else:
-                                print(retry_msg)
-                            time.sleep(2)
-                            continue
-                        else:
-                            error_msg = ("네트워크 연결 문제가 지속되고 있습니다.\n"
-                                       "인터넷 연결을 확인하고 잠시 후 다시 시도해주세요.")
-                            raise Exception(f"NETWORK_ERROR: {error_msg}")
-                    elif any(keyword in error_str for keyword in ['server error', '500', '502', '503']):
-                        retries += 1
-                        if retries < 3:
-                            retry_msg = f"[재시도] 서버 오류로 재시도 중... ({retries}/3)"
-                            if log_callback:
-                                log_callback(retry_msg)
-                            else:
-                                print(retry_msg)
-                            time.sleep(5)
-                            continue
-                        else:
-                            error_msg = ("OpenAI 서버에 일시적인 문제가 발생했습니다.\n"
-                                       "잠시 후 다시 시도해주세요.")
-                            raise Exception(f"SERVER_ERROR: {error_msg}")
-                    else:
-                        # 기타 알 수 없는 오류
-                        error_msg = f"API 호출 중 알 수 없는 오류가 발생했습니다: {str(e)}"
-                        skip_msg = f"[오류] 배치 {current_batch} 처리 중 예외: {e} — 스킵"
-                        if log_callback:
-                            log_callback(skip_msg)
-                        else:
-                            print(skip_msg)
-                        raise Exception(f"UNKNOWN_API_ERROR: {error_msg}")
+            def call(ep):
+                start = time.perf_counter()
+                resp = self._request_correction(
+                    clients[ep], model or ep.model, prompt, batch_no, max_retries, log_callback, cancel_token,
+                    stats=ep.stats
+                )
+                if resp is not None:
+                    ledger.record(tier, model or ep.model, time.perf_counter() - start,
+                                  getattr(resp, 'usage', None), len(indices))
+                return resp
 
+            # 실패하면 다른 엔드포인트로 넘김 (엔드포인트가 하나면 기존처럼 오류/None)
+            resp = router.request(call, log_callback=log_callback, cancel_token=cancel_token)
             if resp is None:
-                # 실패한 경우 원본 텍스트 사용
-                for b in chunk:
-                    new_b = b.copy()
-                    new_b['text_corrected'] = b['text_raw']
-                    corrected.append(new_b)
-                continue
-
-            # 토큰 사용량 업데이트
+                return None
             try:
-                usage += resp.usage.total_tokens
-                self.save_token_usage(usage)
-            except:
-                pass
-
-            # 응답을 줄 단위로 나누어 인덱스 기반으로 매핑
-            texts = [line for line in resp.choices[0].message.content.split('\n') if line.strip()]
-            idx_to_text = {}
-            import re
-            for line in texts:
-                m = re.match(r'^\[(\d+)\]\s*(.*)$', line)
-                if m:
-                    idx = int(m.group(1))
-                    txt = m.group(2)
-                    idx_to_text[idx] = txt
-            for i, b in enumerate(chunk):
-                idx = batch_idx + i
-                new_b = b.copy()
-                if idx in idx_to_text:
-                    new_b['text_corrected'] = idx_to_text[idx]
+                tokens = resp.usage.total_tokens
+            except AttributeError:
+                tokens = 0
+            return self._parse_indexed_lines(resp.choices[0].message.content), tokens
+
+        def request_batch(indices, batch_no, context):
+            if not cascade:
+                return send(indices, batch_no, 'single', None, context)
+            # 1차: 저렴한 모델 → 검증 실패한 줄만 모아 강한 모델로 승격
+            first = send(indices, batch_no, 'fast', fast_model, context)
+            idx_to_text, tokens = first if first is not None else ({}, 0)
+            reasons = {i: validator.check(items[i], idx_to_text.get(i)) for i in indices}
+            escalate = [i for i in indices if reasons[i]]
+            ledger.record_escalations(len(indices), [reasons[i] for i in escalate])
+            if escalate:
+                second = send(escalate, batch_no, 'strong', strong_model, context)
+                if second is not None:
+                    # 승격한 줄만 교체 (강한 모델이 다른 번호를 섞어 보내도 검증을 통과한 줄은 유지)
+                    escalated = set(escalate)
+                    idx_to_text.update((i, t) for i, t in second[0].items() if i in escalated)
+                    tokens += second[1]
+                elif first is None:
+                    return None
+            return idx_to_text, tokens
+
+        # 동시에 보낼 수 있는 배치 수만큼 미리 요청하고 결과는 배치 순서대로 반영
+        # (체크포인트와 page_callback은 앞에서부터 완료된 구간만 다룸)
+        window = router.total_concurrency
+        executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix='api-batch') if window > 1 else None
+        futures = {}
+        # 응답받았지만 아직 구간이 끝나지 않은 블록의 교정 결과 (큰 페이지를 여러 배치로 나눈 경우)
+        answered = {}
+
+        try:
+            for n, (chunk_start, batch_end, indices, batch_no, context) in enumerate(plans):
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                if page_callback:
+                    next_span = self._emit_pages(page_spans, next_span, items, done, page_callback)
+
+                if progress_callback:
+                    progress_callback(f"API 교정 중... 배치 {batch_no}/{total_batches}", (batch_no / total_batches) * 100)
+
+                if not indices:
+                    for idx in range(chunk_start, batch_end):
+                        items[idx]['text_corrected'] = preset[idx]
+                    done = batch_end
+                    continue
+
+                if executor:
+                    for m in range(n, min(len(plans), n + window)):
+                        if m not in futures and plans[m][2]:
+                            futures[m] = executor.submit(request_batch, *plans[m][2:5])
+                    result = futures.pop(n).result()
+                else:
+                    result = request_batch(indices, batch_no, context)
+
+                if result is None:
+                    # 실패한 경우 원본 텍스트 사용
+                    idx_to_text = {}
                 else:
-                    new_b['text_corrected'] = b['text_raw']
-                corrected.append(new_b)
+                    # 토큰 사용량 업데이트
+                    idx_to_text, tokens = result
+                    if tokens:
+                        self.add_token_usage(tokens)
+                        batching['tokens'] += tokens
+                # 요청한 블록의 응답만 반영 (응답이 없는 블록은 원문 사용)
+                answered.update((i, idx_to_text[i]) for i in indices if i in idx_to_text)
+                batching['fallback_blocks'] += sum(1 for i in indices if i not in idx_to_text)
 
-        # 결과 저장
-        with open(out_json, 'w', encoding='utf-8') as f:
-            json.dump(corrected, f, ensure_ascii=False, indent=2)
+                # 응답 줄의 [번호]로 블록에 매핑
+                for idx in range(chunk_start, batch_end):
+                    b = items[idx]
+                    if idx in preset:
+                        b['text_corrected'] = preset[idx]
+                    else:
+                        b['text_corrected'] = answered.pop(idx, b['text_raw'])
+                done = batch_end
+            if page_callback:
+                self._emit_pages(page_spans, next_span, items, done, page_callback)
+        except BaseException:
+            # 중단(취소/오류) 시 완료된 배치까지 체크포인트 저장
+            if done:
+                self._write_json(partial_path, items[:done])
+            raise
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if cancel_token:
+                for client in clients.values():
+                    cancel_token.unregister(client.close)
+            run_stats = LatencyStats()
+            for ep in router.endpoints:
+                run_stats.merge(ep.stats)
+            self.request_stats.merge(run_stats)
+            self.last_batching = batching
+            if run_stats.requests and log_callback:
+                log_callback(run_stats.format())
+                log_callback(self._format_batching(batching))
+                if len(router.endpoints) > 1:
+                    for line in router.describe():
+                        log_callback(f"  {line}")
+                log_callback(ledger.format())
+
+        # 중복 페이지 재사용을 위해 페이지별 교정 결과 저장
+        if page_store:
+            for (page_hash, _), indices in page_groups.items():
+                if all(i in preset for i in indices):
+                    continue
+                page_store.put_corrections(
+                    page_hash, settings_key(self.config), model_key,
+                    [items[i]['text_raw'] for i in indices],
+                    [items[i]['text_corrected'] for i in indices]
+                )
+            page_store.close()
+
+        # 결과 저장 (모델별 비용/지연 집계는 문서별 '_cost.json')
+        self._write_json(out_json, items)
+        self.last_cost = ledger.summary()
+        if ledger.tiers:
+            self._write_json(os.path.splitext(out_json)[0] + '_cost.json', self.last_cost)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
         
         if progress_callback:
             progress_callback("API 교정 완료", 100)
         
-        return corrected
+        return items
+
+    def _request_correction(self, client, base_model, prompt, current_batch, max_retries, log_callback=None,
+                            cancel_token=None, stats=None):
+        """교정 요청 1회 (오류 유형별 재시도/중단 처리 포함). 시도마다 지연 시간을 stats에 기록"""
+        retries = 0
+        resp = None
+        while retries < max_retries:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            try:
+                resp = timed_request(
+                    stats or self.request_stats, client.chat.completions.create,
+                    model=base_model,
+                    messages=[
+                        {
+                            'role': 'system',
+                            'content': (
+                                '당신은 EasyOCR 텍스트 데이터 복구 전문가입니다. '
+                                '주어진 OCR 결과는 정확하지 않습니다, 따라서 복구 전문가인 당신의 지식을 사용하여 원문 텍스트를 추론해야 합니다.'
+                                '주어진 텍스트 조각 배열을 원본 형태로 복원하여, '
+                                '반드시 같은 순서와 개수의 줄로 응답해야 하며, 각 줄 앞의 [번호]는 반드시 그대로 유지해야 합니다.'
+                            )
+                        },
+                        {'role': 'user', 'content': prompt}
+                    ],
+                    temperature=0
+                )
+                break
+            except Exception as e:
+                # 취소로 연결이 끊긴 경우 오류 분류 없이 중단
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                error_str = str(e).lower()
+                # ...existing code...
+                if any(keyword in error_str for keyword in ['invalid_api_key', 'incorrect api key', 'error code: 401', 'unauthorized']):
+                    error_msg = ("유효한 API Key를 입력하지 않아 정상적인 교정 작업이 이루어지지 않았습니다. 작업을 중단합니다.\n"
+                               "API Key를 다시 확인하고 올바른 API Key를 입력해주세요.")
+                    raise Exception(f"API_KEY_ERROR: {error_msg}")
+                elif any(keyword in error_str for keyword in ['quota', 'rate limit', 'billing', 'exceeded']):
+                    error_msg = ("API 사용량 한도를 초과했거나 결제 문제가 발생했습니다.\n"
+                               "OpenAI 계정의 사용량 및 결제 상태를 확인해주세요.")
+                    raise Exception(f"QUOTA_ERROR: {error_msg}")
+                elif any(keyword in error_str for keyword in ['model not found', 'invalid model', 'model']):
+                    error_msg = ("지정된 모델을 찾을 수 없습니다.\n"
+                               "사용 가능한 모델명을 확인하고 다시 시도해주세요.")
+                    raise Exception(f"MODEL_ERROR: {error_msg}")
+                elif any(keyword in error_str for keyword in ['context length', 'token limit', 'too long']):
+                    error_msg = ("입력 텍스트가 너무 길어서 처리할 수 없습니다.\n"
+                               "더 작은 단위로 나누어 처리해주세요.")
+                    raise Exception(f"TOKEN_LIMIT_ERROR: {error_msg}")
+                elif any(keyword in error_str for keyword in ['connection', 'network', 'timeout', 'timed out']):
+                    retries += 1
+                    if retries < 3:
+                        retry_msg = f"[재시도] 네트워크 오류로 재시도 중... ({retries}/3)"
+                        if log_callback:
+                            log_callback(retry_msg)
+                        else:
+                            print(retry_msg)
+                        self._sleep(2, cancel_token)
+                        continue
+                    else:
+                        error_msg = ("네트워크 연결 문제가 지속되고 있습니다.\n"
+                                   "인터넷 연결을 확인하고 잠시 후 다시 시도해주세요.")
+                        raise Exception(f"NETWORK_ERROR: {error_msg}")
+                elif any(keyword in error_str for keyword in ['server error', '500', '502', '503']):
+                    retries += 1
+                    if retries < 3:
+                        retry_msg = f"[재시도] 서버 오류로 재시도 중... ({retries}/3)"
+                        if log_callback:
+                            log_callback(retry_msg)
+                        else:
+                            print(retry_msg)
+                        self._sleep(5, cancel_token)
+                        continue
+                    else:
+                        error_msg = ("OpenAI 서버에 일시적인 문제가 발생했습니다.\n"
+                                   "잠시 후 다시 시도해주세요.")
+                        raise Exception(f"SERVER_ERROR: {error_msg}")
+                else:
+                    # 기타 알 수 없는 오류
+                    error_msg = f"API 호출 중 알 수 없는 오류가 발생했습니다: {str(e)}"
+                    skip_msg = f"[오류] 배치 {current_batch} 처리 중 예외: {e} — 스킵"
+                    if log_callback:
+                        log_callback(skip_msg)
+                    else:
+                        print(skip_msg)
+                    raise Exception(f"UNKNOWN_API_ERROR: {error_msg}")
+        return resp
+
+    def _flat_chunks(self, items, preset, done, batch_size):
+        """블록 순서대로 교정이 필요한 블록이 batch_size개씩 들어가도록 구간 분할 → [(시작, 끝, 인덱스 목록)]"""
+        total = len(items)
+        chunks = []
+        start = done
+        while start < total:
+            end = start
+            indices = []
+            while end < total and len(indices) < batch_size:
+                if end not in preset:
+                    indices.append(end)
+                end += 1
+            chunks.append((start, end, indices))
+            start = end
+        return chunks
+
+    def _reading_order_chunks(self, items, page_spans, preset, done, batch_size):
+        """
+        페이지를 통째로 담는 구간 분할 → [(시작, 끝, 읽기 순서의 인덱스 목록)]
+        batch_size보다 큰 페이지는 읽기 순서대로 나누며, 앞 조각들은 빈 구간(시작 == 끝)으로 두고
+        마지막 조각의 구간이 페이지를 완료합니다 (체크포인트/page_callback은 구간 끝 기준).
+        """
+        chunks = []
+        start, indices = done, []
+        for _, s, e in page_spans:
+            if e <= done:
+                continue
+            s = max(s, done)
+            todo = [i for i in self._reading_order(items, s, e) if i not in preset]
+            if indices and len(indices) + len(todo) > batch_size:
+                chunks.append((start, s, indices))
+                start, indices = s, []
+            while len(todo) > batch_size:
+                chunks.append((start, start, todo[:batch_size]))
+                todo = todo[batch_size:]
+            indices += todo
+        if start < len(items):
+            chunks.append((start, len(items), indices))
+        return chunks
+
+    def _reading_order(self, items, start, end):
+        """한 페이지 구간의 블록 인덱스를 OCR 레이아웃 단계와 같은 기준의 읽기 순서로 정렬 (빈 페이지 표시 블록은 뒤)"""
+        boxes = [i for i in range(start, end) if not items[i].get('blank')]
+        order = self.layout.reading_order([items[i] for i in boxes])
+        return [boxes[k] for k in order] + [i for i in range(start, end) if items[i].get('blank')]
+
+    def _reading_sequence(self, items, page_spans):
+        """문맥을 고르기 위한 문서 전체의 읽기 순서 (빈 페이지 표시 블록 제외)"""
+        sequence = []
+        for _, s, e in page_spans:
+            sequence += [i for i in self._reading_order(items, s, e) if not items[i].get('blank')]
+        return sequence
+
+    def _format_batching(self, batching):
+        requested = batching['requested_blocks']
+        per_block = batching['tokens'] / requested if requested else 0.0
+        fallback = batching['fallback_blocks'] / requested if requested else 0.0
+        return (f"[배치] {batching['strategy']}: {batching['batches']}개 배치, 블록당 {per_block:.1f} 토큰, "
+                f"원문 유지(fallback) {batching['fallback_blocks']}/{requested} ({fallback:.1%}), "
+                f"참고 문맥 {batching['context_lines']}줄")
+
+    def _emit_pages(self, page_spans, next_span, items, done, page_callback):
+        """교정이 끝난(앞에서 done개) 페이지를 순서대로 page_callback에 전달하고 다음 구간 위치 반환"""
+        while next_span < len(page_spans) and page_spans[next_span][2] <= done:
+            page_num, start, end = page_spans[next_span]
+            page_callback(page_num, items[start:end])
+            next_span += 1
+        return next_span
+
+    def _page_hash_groups(self, items):
+        """페이지 해시가 기록된 블록을 (해시, 페이지)별 인덱스 목록으로 묶기"""
+        groups = {}
+        for idx, b in enumerate(items):
+            if b.get('page_hash'):
+                groups.setdefault((b['page_hash'], b['page']), []).append(idx)
+        return groups
+
+    def _sleep(self, seconds, cancel_token=None):
+        """재시도 대기 (취소 시 즉시 중단)"""
+        if cancel_token:
+            cancel_token.wait(seconds)
+            cancel_token.raise_if_cancelled()
+        else:
+            time.sleep(seconds)
+
+    def _parse_indexed_lines(self, content):
+        """'[번호] 텍스트' 형식의 응답을 {번호: 텍스트}로 변환"""
+        texts = [line for line in content.split('\n') if line.strip()]
+        idx_to_text = {}
+        for line in texts:
+            m = re.match(r'^\[(\d+)\]\s*(.*)$', line)
+            if m:
+                idx = int(m.group(1))
+                txt = m.group(2)
+                idx_to_text[idx] = txt
+        return idx_to_text
+
+    def _load_previous(self, out_json):
+        """이전 실행의 교정 결과 로드 (없거나 읽을 수 없으면 빈 목록)"""
+        try:
+            if not os.path.exists(out_json):
+                return []
+            with open(out_json, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except Exception as e:
+            print(f"기존 교정 결과 로드 오류: {e}")
+            return []
+
+    def _load_checkpoint(self, partial_path, items):
+        """
+        중단된 교정 체크포인트 로드.
+        체크포인트의 블록이 현재 raw 데이터의 앞부분과 일치할 때만 재사용하며,
+        교정 결과를 items 앞부분에 기록하고 재사용한 블록 수를 반환합니다.
+        """
+        try:
+            if not os.path.exists(partial_path):
+                return 0
+            with open(partial_path, 'r', encoding='utf-8') as f:
+                done = json.load(f)
+            if not isinstance(done, list) or len(done) > len(items):
+                return 0
+            for b, raw in zip(done, items):
+                if (b.get('id') != raw.get('id') or b.get('text_raw') != raw.get('text_raw')
+                        or 'text_corrected' not in b):
+                    return 0
+            for b, raw in zip(done, items):
+                raw['text_corrected'] = b['text_corrected']
+            return len(done)
+        except Exception as e:
+            print(f"교정 체크포인트 로드 오류: {e}")
+            return 0
+
+    def _write_json(self, path, data):
+        """임시 파일에 쓴 뒤 교체하여 중단 시에도 깨지지 않게 저장"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,153 @@
+"""
+교정 배치 방식 벤치마크
+batch_strategy(flat / reading_order)에 따른 요청 수, 교정 블록당 토큰, fallback 비율(응답에 줄이 없어 원문을 유지한 블록),
+페이지를 넘나드는 배치 비율을 비교합니다.
+합성 문서의 정답 줄을 단어 단위 블록으로 나누고 EasyOCR처럼 세로 위치가 조금씩 어긋난 검출 순서로 섞어 교정 입력을 만듭니다.
+기본은 로컬 스텁 LLM 서버(응답 = 원문)이므로 fallback은 실제 모델(--llm-base-url)로 측정해야 의미가 있습니다.
+
+사용 예:
+  python benchmarks/bench_batching.py --pages 20
+  python benchmarks/bench_batching.py --pages 5 --llm-base-url https://api.openai.com/v1 --api-key sk-...
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config_manager import ConfigManager
+from synthetic import generate_pdf, PAGE_SIZES
+from stub_llm_server import StubLLMServer
+
+# synthetic.generate_pdf의 배치 (여백, 줄 간격 = fontsize * 1.6)
+MARGIN = 50
+FONTSIZE = 11
+
+
+def make_raw_blocks(ground_truth, page_size, jitter, seed):
+    """정답 줄을 단어 블록으로 나누고 페이지마다 검출 순서(세로 위치 + 흔들림)로 정렬한 OCR 결과"""
+    rng = random.Random(seed)
+    width, height = PAGE_SIZES[page_size]
+    line_gap = FONTSIZE * 1.6
+    char_w = FONTSIZE * 0.55
+    blocks = []
+    for page_num, lines in enumerate(ground_truth, start=1):
+        page_blocks = []
+        for i, text in enumerate(lines):
+            top = MARGIN + (i + 1) * line_gap - FONTSIZE
+            x = MARGIN
+            for word in text.split():
+                w = len(word) * char_w
+                page_blocks.append({
+                    'page': page_num,
+                    'text_raw': word,
+                    'confidence': 0.9,
+                    'x_rel': x / width,
+                    'y_rel': top / height,
+                    'w_rel': w / width,
+                    'h_rel': FONTSIZE / height,
+                    'font_size': FONTSIZE,
+                })
+                x += w + char_w
+        page_blocks.sort(key=lambda b: b['y_rel'] + rng.uniform(-jitter, jitter) * line_gap / height)
+        blocks.extend(page_blocks)
+    for n, b in enumerate(blocks):
+        b['id'] = n
+    return blocks
+
+
+def batch_pages(api, items, strategy, batch_size):
+    """배치마다 포함된 페이지 수 (여러 페이지에 걸친 배치 비율 계산용)"""
+    spans = []
+    for idx, b in enumerate(items):
+        if spans and spans[-1][0] == b['page']:
+            spans[-1][2] = idx + 1
+        else:
+            spans.append([b['page'], idx, idx + 1])
+    if strategy == 'reading_order':
+        chunks = api._reading_order_chunks(items, spans, {}, 0, batch_size)
+    else:
+        chunks = api._flat_chunks(items, {}, 0, batch_size)
+    return [len({items[i]['page'] for i in indices}) for _, _, indices in chunks if indices]
+
+
+def run_strategy(strategy, raw_json, workdir, settings):
+    from api_processor import APIProcessor
+
+    config = ConfigManager(os.path.join(workdir, 'config.json'))
+    config.override_settings({**settings, 'batch_strategy': strategy})
+    api = APIProcessor(config)
+    api.token_usage_file = os.path.join(workdir, 'token_usage.json')
+    corr_json = os.path.join(workdir, f"{strategy}_ocr_corr.json")
+    start = time.perf_counter()
+    items = api.recover_text_with_api(raw_json, corr_json, settings['api_key'])
+    seconds = time.perf_counter() - start
+    stats = api.last_batching
+    requested = stats['requested_blocks'] or 1
+    pages_per_batch = batch_pages(api, items, strategy, settings['batch_size'])
+    return {
+        'strategy': strategy,
+        'seconds': round(seconds, 2),
+        'batches': stats['batches'],
+        'tokens': stats['tokens'],
+        'tokens_per_block': round(stats['tokens'] / requested, 2),
+        'fallback_blocks': stats['fallback_blocks'],
+        'fallback_rate': round(stats['fallback_blocks'] / requested, 4),
+        'context_lines': stats['context_lines'],
+        'multi_page_batches': round(sum(1 for n in pages_per_batch if n > 1) / max(1, len(pages_per_batch)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="교정 배치 방식별 토큰/fallback 벤치마크")
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--lines-per-page', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--context-lines', type=int, default=2)
+    parser.add_argument('--jitter', type=float, default=0.3, help="검출 순서 흔들림 (줄 간격 배수)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--llm-base-url', help="실제 OpenAI 호환 서버 주소 (미지정 시 스텁 서버 사용)")
+    parser.add_argument('--api-key', default='stub-key')
+    parser.add_argument('--model', default='gpt-4.1-mini')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'batching.json'))
+    args = parser.parse_args()
+
+    stub = None if args.llm_base_url else StubLLMServer(seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='bench_batching_')
+    try:
+        ground_truth = generate_pdf(os.path.join(workdir, 'input.pdf'), pages=args.pages,
+                                    lines_per_page=args.lines_per_page, fontsize=FONTSIZE, seed=args.seed)
+        raw_json = os.path.join(workdir, 'input_ocr_raw.json')
+        with open(raw_json, 'w', encoding='utf-8') as f:
+            json.dump(make_raw_blocks(ground_truth, 'a4', args.jitter, args.seed), f, ensure_ascii=False)
+        settings = {
+            'api_base_url': args.llm_base_url or stub.base_url, 'api_key': args.api_key,
+            'base_model': args.model, 'batch_size': args.batch_size,
+            'batch_context_lines': args.context_lines, 'page_store_enabled': False,
+        }
+        rows = []
+        for strategy in ('flat', 'reading_order'):
+            row = run_strategy(strategy, raw_json, workdir, settings)
+            rows.append(row)
+            print(f"{strategy:13s} 배치 {row['batches']:4d}  블록당 {row['tokens_per_block']:6.2f} 토큰  "
+                  f"fallback {row['fallback_rate']:.2%}  여러 페이지 배치 {row['multi_page_batches']:.1%}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if stub:
+            stub.stop()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pages': args.pages,
+                   'batch_size': args.batch_size, 'results': rows}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
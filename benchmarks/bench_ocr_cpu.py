@@ -0,0 +1,111 @@
+"""
+CPU OCR 설정 벤치마크
+torch 스레드 수와 양자화(int8) 여부에 따른 EasyOCR의 pages/s와 정확도(문자 오류율)를 비교합니다.
+합성 PDF의 정답 텍스트와 줄 단위로 비교하므로 layout_mode는 'line'으로 고정합니다.
+
+사용 예:
+  python benchmarks/bench_ocr_cpu.py --pages 5 --threads 1 4
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config_manager import ConfigManager
+from synthetic import generate_pdf
+
+
+def edit_distance(a, b):
+    """레벤슈타인 거리 (두 줄 DP)"""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def char_error_rate(blocks, ground_truth):
+    """페이지별 OCR 텍스트(읽기 순서)와 정답의 문자 오류율"""
+    errors = total = 0
+    for page_num, lines in enumerate(ground_truth, start=1):
+        expected = '\n'.join(lines)
+        actual = '\n'.join(b['text_raw'] for b in blocks if b['page'] == page_num and not b.get('blank'))
+        errors += edit_distance(expected, actual)
+        total += len(expected)
+    return errors / total if total else 0.0
+
+
+def run_variant(input_pdf, ground_truth, workdir, quantize, threads, dpi, batch_size):
+    """새 프로세서로 한 가지 설정을 실행 (모델 로드 시간은 처리량에서 제외)"""
+    from ocr_processor import OCRProcessor
+
+    config = ConfigManager(os.path.join(workdir, 'config.json'))
+    config.override_settings({
+        'dpi': dpi, 'layout_mode': 'line', 'ocr_device': 'cpu',
+        'ocr_quantize': quantize, 'torch_threads': threads, 'ocr_batch_size': batch_size,
+    })
+    ocr = OCRProcessor(config)
+    load_start = time.perf_counter()
+    ocr.initialize_reader()
+    load_seconds = time.perf_counter() - load_start
+
+    json_path = os.path.join(workdir, f"q{int(quantize)}_t{threads}.json")
+    start = time.perf_counter()
+    blocks = ocr.preprocess_pdf(input_pdf, json_path, None, None)
+    seconds = time.perf_counter() - start
+    return {
+        'quantize': quantize,
+        'torch_threads': threads,
+        'ocr_batch_size': batch_size,
+        'model_load_s': round(load_seconds, 2),
+        'seconds': round(seconds, 2),
+        'pages_per_s': round(len(ground_truth) / seconds, 3),
+        'cer': round(char_error_rate(blocks, ground_truth), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU EasyOCR 양자화/스레드 벤치마크")
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--korean-ratio', type=float, default=0.5)
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--threads', type=int, nargs='+', default=[os.cpu_count() or 1])
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'ocr_cpu.json'))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_ocr_cpu_')
+    try:
+        input_pdf = os.path.join(workdir, 'input.pdf')
+        ground_truth = generate_pdf(input_pdf, pages=args.pages, korean_ratio=args.korean_ratio,
+                                    lines_per_page=25, fontsize=12)
+        rows = []
+        for threads in args.threads:
+            for quantize in (False, True):
+                row = run_variant(input_pdf, ground_truth, workdir, quantize, threads, args.dpi, args.batch_size)
+                rows.append(row)
+                label = 'int8 ' if quantize else 'float'
+                print(f"{label} threads={threads:3d}  {row['pages_per_s']:7.3f} pages/s  "
+                      f"CER={row['cer']:.4f}  (모델 로드 {row['model_load_s']}s)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pages': args.pages,
+                   'dpi': args.dpi, 'results': rows}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+결과 PDF 저장 방식 벤치마크
+overlay_save_mode(compact / balanced / fast)에 따른 오버레이·저장 시간과 입력 대비 결과 파일 크기,
+한 페이지만 바뀌었을 때 update_overlay로 갱신하는 시간과 파일 크기 증가를 비교합니다.
+합성 PDF의 정답 줄 위치로 교정 블록을 만들어 OCR/교정 없이 오버레이 단계만 측정합니다.
+
+사용 예:
+  python benchmarks/bench_overlay_save.py --pages 1000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config_manager import ConfigManager
+from synthetic import generate_pdf, PAGE_SIZES
+
+# synthetic.generate_pdf의 배치 (여백, 줄 간격 = fontsize * 1.6)
+MARGIN = 50
+FONTSIZE = 11
+
+
+def make_blocks(ground_truth, page_size, dpi):
+    """정답 줄마다 한 줄짜리 교정 블록 (OCR 결과와 같은 상대좌표/픽셀 글자 크기)"""
+    width, height = PAGE_SIZES[page_size]
+    line_gap = FONTSIZE * 1.6
+    blocks = []
+    for page_num, lines in enumerate(ground_truth, start=1):
+        for i, text in enumerate(lines):
+            top = MARGIN + (i + 1) * line_gap - FONTSIZE
+            blocks.append({
+                'id': len(blocks),
+                'page': page_num,
+                'text_raw': text,
+                'text_corrected': text,
+                'confidence': 1.0,
+                'x_rel': MARGIN / width,
+                'y_rel': top / height,
+                'w_rel': (width - 2 * MARGIN) / width,
+                'h_rel': line_gap / height,
+                'font_size': FONTSIZE * dpi / 72.0,
+            })
+    return blocks
+
+
+def rasterize(text_pdf, output_pdf, dpi):
+    """텍스트 PDF를 페이지 이미지만 있는 스캔 문서로 변환 (실제 입력과 같이 원본 폰트 없음)"""
+    import fitz
+
+    src = fitz.open(text_pdf)
+    doc = fitz.open()
+    for page in src:
+        image_page = doc.new_page(width=page.rect.width, height=page.rect.height)
+        image_page.insert_image(image_page.rect, pixmap=page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY))
+    doc.save(output_pdf, deflate=True)
+    doc.close()
+    src.close()
+
+
+def run_mode(mode, input_pdf, blocks, workdir, dpi, update_page):
+    """전체 오버레이 후 한 페이지 텍스트를 바꿔 update_overlay로 갱신했을 때의 시간/크기"""
+    from pdf_processor import PDFProcessor
+
+    config = ConfigManager(os.path.join(workdir, 'config.json'))
+    config.override_settings({'dpi': dpi, 'overlay_save_mode': mode})
+    processor = PDFProcessor(config)
+    output_pdf = os.path.join(workdir, f"{mode}_recovered.pdf")
+    start = time.perf_counter()
+    processor.overlay_with_fitz(input_pdf, blocks, output_pdf)
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(output_pdf)
+
+    # 교정 결과가 바뀐 경우 (새 글자 포함)
+    changed = [dict(b, text_corrected=b['text_corrected'] + ' 갱신뷁') if b['page'] == update_page else b
+               for b in blocks]
+    logs = []
+    start = time.perf_counter()
+    processor.update_overlay(input_pdf, changed, output_pdf, log_callback=logs.append)
+    update_seconds = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'seconds': round(seconds, 2),
+        'save_s': round(processor.last_save_seconds, 2),
+        'size_kb': round(size / 1024),
+        'update_s': round(update_seconds, 2),
+        'update_incremental': any('증분 저장' in line for line in logs),
+        'update_growth_kb': round((os.path.getsize(output_pdf) - size) / 1024),
+    }
+
+
+def main():
+    from pdf_processor import SAVE_MODES
+
+    parser = argparse.ArgumentParser(description="결과 PDF 저장 방식별 시간/크기 벤치마크")
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--page-size', default='a4', choices=sorted(PAGE_SIZES))
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--source', choices=['scanned', 'text'], default='scanned',
+                        help="입력 문서: 페이지 이미지만 있는 스캔 문서 또는 텍스트 PDF")
+    parser.add_argument('--scan-dpi', type=int, default=72, help="스캔 문서 이미지 해상도")
+    parser.add_argument('--modes', nargs='+', default=list(SAVE_MODES), choices=list(SAVE_MODES))
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'overlay_save.json'))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_overlay_save_')
+    try:
+        input_pdf = os.path.join(workdir, 'input.pdf')
+        ground_truth = generate_pdf(input_pdf, pages=args.pages, page_size=args.page_size, fontsize=FONTSIZE)
+        if args.source == 'scanned':
+            text_pdf, input_pdf = input_pdf, os.path.join(workdir, 'scanned.pdf')
+            rasterize(text_pdf, input_pdf, args.scan_dpi)
+        blocks = make_blocks(ground_truth, args.page_size, args.dpi)
+        input_kb = round(os.path.getsize(input_pdf) / 1024)
+        print(f"입력({args.source}): {args.pages}페이지, 블록 {len(blocks)}개, {input_kb}KB")
+        rows = []
+        for mode in args.modes:
+            row = run_mode(mode, input_pdf, blocks, workdir, args.dpi, update_page=min(3, args.pages))
+            row['overlay_kb'] = row['size_kb'] - input_kb
+            rows.append(row)
+            kind = '증분' if row['update_incremental'] else '전체'
+            print(f"{mode:9s} 전체 {row['seconds']:8.2f}s  저장 {row['save_s']:8.2f}s  "
+                  f"{input_kb}KB → {row['size_kb']}KB (+{row['overlay_kb']}KB)  "
+                  f"1페이지 갱신({kind}) {row['update_s']:.2f}s +{row['update_growth_kb']}KB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'pages': args.pages,
+                   'page_size': args.page_size, 'source': args.source, 'input_kb': input_kb,
+                   'results': rows},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+파이프라인 단계별 벤치마크
+합성 PDF로 OCR(preprocess_pdf) → 교정(recover_text_with_api) → 오버레이(overlay_with_fitz)를
+실행하고 pages/s, blocks/s, 지연 백분위수, 최대 메모리를 결과 파일에 기록합니다.
+
+사용 예:
+  python benchmarks/run_benchmarks.py                              # 스텁 OCR + 스텁 LLM
+  python benchmarks/run_benchmarks.py --engine easyocr --scenarios small-a4-mixed
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config_manager import ConfigManager
+from synthetic import generate_pdf
+from stub_ocr import StubReader
+from stub_llm_server import StubLLMServer
+
+SCENARIOS = {
+    'small-a4-en': dict(pages=5, page_size='a4', lines_per_page=30, korean_ratio=0.0),
+    'small-a4-mixed': dict(pages=5, page_size='a4', lines_per_page=30, korean_ratio=0.5),
+    'dense-a3-ko': dict(pages=5, page_size='a3', lines_per_page=70, words_per_line=12, korean_ratio=1.0),
+    'sparse-letter-mixed': dict(pages=20, page_size='letter', lines_per_page=5, korean_ratio=0.5),
+    'long-a4-mixed': dict(pages=100, page_size='a4', lines_per_page=20, korean_ratio=0.5),
+}
+
+STAGES = ('ocr', 'api', 'overlay')
+
+
+def percentile(values, q):
+    """선형 보간 백분위수 (q: 0~100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class EventClock:
+    """progress_callback 호출 간격으로 페이지/배치 단위 지연 측정"""
+
+    def __init__(self):
+        self.times = []
+
+    def __call__(self, message, percentage):
+        self.times.append(time.perf_counter())
+
+    def latencies_ms(self):
+        return [(b - a) * 1000 for a, b in zip(self.times, self.times[1:])]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(BENCH_DIR),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+class PipelineBench:
+    def __init__(self, workdir, engine='stub', dpi=150, settings=None):
+        from ocr_processor import OCRProcessor
+        from api_processor import APIProcessor
+        from pdf_processor import PDFProcessor
+
+        self.workdir = workdir
+        self.config = ConfigManager(os.path.join(workdir, 'config.json'))
+        self.config.override_settings({'dpi': dpi, **(settings or {})})
+        self.ocr = OCRProcessor(self.config)
+        if engine == 'stub':
+            self.ocr.reader = StubReader()
+        self.api = APIProcessor(self.config)
+        self.api.token_usage_file = os.path.join(workdir, 'token_usage.json')
+        self.pdf = PDFProcessor(self.config)
+
+    def run_stage(self, stage, input_pdf, trace_memory=False):
+        """단계 1회 실행 → (소요 시간, 지연 목록, 블록 수, 최대 메모리 MB)"""
+        raw_json = os.path.join(self.workdir, 'bench_ocr_raw.json')
+        corr_json = os.path.join(self.workdir, 'bench_ocr_corr.json')
+        output_pdf = os.path.join(self.workdir, 'bench_recovered.pdf')
+        clock = EventClock()
+
+        if stage == 'api':
+            # 이전 실행의 체크포인트가 남지 않도록 정리
+            for path in (corr_json, corr_json + '.partial'):
+                if os.path.exists(path):
+                    os.remove(path)
+        if stage == 'ocr' and os.path.exists(raw_json + '.partial'):
+            os.remove(raw_json + '.partial')
+
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        clock.times.append(start)
+        if stage == 'ocr':
+            blocks = self.ocr.preprocess_pdf(input_pdf, raw_json, None, None, progress_callback=clock)
+        elif stage == 'api':
+            blocks = self.api.recover_text_with_api(raw_json, corr_json, 'stub-key', progress_callback=clock)
+        else:
+            with open(corr_json, 'r', encoding='utf-8') as f:
+                blocks = json.load(f)
+            self.pdf.overlay_with_fitz(input_pdf, blocks, output_pdf, progress_callback=clock)
+        elapsed = time.perf_counter() - start
+        peak_mb = None
+        if trace_memory:
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+        # 첫 항목(시작 시각)과 완료 콜백 사이 구간만 단위 지연으로 사용
+        return elapsed, clock.latencies_ms()[1:], len(blocks), peak_mb
+
+
+def run_scenario(name, params, args):
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        input_pdf = os.path.join(workdir, 'input.pdf')
+        generate_pdf(input_pdf, seed=args.seed, **params)
+        settings = {'api_base_url': args.llm_base_url or ''}
+        if args.llm_endpoints:
+            # 스텁 서버 여러 대에 배치를 나눠 보내는 라우팅 측정
+            settings['api_endpoints'] = [
+                {'name': f"stub-{n + 1}", 'base_url': url, 'max_concurrency': args.llm_concurrency}
+                for n, url in enumerate(args.llm_endpoints)
+            ]
+        if args.profile:
+            settings.update({'profile_mode': args.profile,
+                             'profile_dir': os.path.join(BENCH_DIR, 'results', 'profiles', name)})
+        bench = PipelineBench(workdir, engine=args.engine, dpi=args.dpi, settings=settings)
+        pages = params['pages']
+
+        results = {}
+        for stage in args.stages:
+            timings, latencies, blocks = [], [], 0
+            for _ in range(args.repeat):
+                elapsed, lat, blocks, _ = bench.run_stage(stage, input_pdf)
+                timings.append(elapsed)
+                latencies.extend(lat)
+            seconds = statistics.median(timings)
+            peak_mb = None
+            if args.memory:
+                peak_mb = bench.run_stage(stage, input_pdf, trace_memory=True)[3]
+            results[stage] = {
+                'seconds': round(seconds, 4),
+                'pages_per_s': round(pages / seconds, 3),
+                'blocks_per_s': round(blocks / seconds, 3),
+                'blocks': blocks,
+                'latency_ms': {
+                    'p50': percentile(latencies, 50),
+                    'p90': percentile(latencies, 90),
+                    'p99': percentile(latencies, 99),
+                },
+                'peak_mem_mb': round(peak_mb, 2) if peak_mb is not None else None,
+            }
+            if stage == 'api':
+                # HTTP 요청 단위 지연 시간 (연결 재사용 효과 확인용)
+                results[stage]['request_ms'] = bench.api.request_stats.summary()
+            print(f"  {stage:8s} {results[stage]['pages_per_s']:9.2f} pages/s "
+                  f"{results[stage]['blocks_per_s']:10.1f} blocks/s "
+                  f"p50={results[stage]['latency_ms']['p50'] or 0:8.1f}ms "
+                  f"peak={results[stage]['peak_mem_mb']}MB")
+        return {'params': params, 'stages': results}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current, baseline_path, threshold):
+    """기준 결과 대비 pages/s가 threshold 비율 이상 떨어진 항목 출력. 회귀 개수 반환"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if isinstance(baseline, list):
+        baseline = baseline[-1]
+
+    regressions = 0
+    print(f"\n기준 비교: {baseline_path} (commit {baseline.get('commit')})")
+    for name, scenario in current['scenarios'].items():
+        base_scenario = baseline.get('scenarios', {}).get(name)
+        if not base_scenario:
+            continue
+        for stage, res in scenario['stages'].items():
+            base = base_scenario['stages'].get(stage)
+            if not base:
+                continue
+            ratio = res['pages_per_s'] / base['pages_per_s'] if base['pages_per_s'] else 0
+            flag = ''
+            if ratio < 1 - threshold:
+                flag = '  <-- 회귀'
+                regressions += 1
+            print(f"  {name:22s} {stage:8s} {base['pages_per_s']:9.2f} → {res['pages_per_s']:9.2f} pages/s "
+                  f"({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파이프라인 단계별 벤치마크")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--engine', choices=['stub', 'easyocr'], default='stub', help="OCR 엔진")
+    parser.add_argument('--llm-base-url', help="실제 OpenAI 호환 서버 주소 (미지정 시 스텁 서버 사용)")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="스텁 서버 요청당 지연(초)")
+    parser.add_argument('--llm-servers', type=int, default=1,
+                        help="스텁 서버 수 (2 이상이면 api_endpoints로 나눠 보냄)")
+    parser.add_argument('--llm-concurrency', type=int, default=1, help="엔드포인트별 동시 요청 수")
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="메모리 측정 생략")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'],
+                        help="단계별 프로파일 저장 (benchmarks/results/profiles, 측정 시간에 영향 있음)")
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'results.json'),
+                        help="결과 파일 (실행 기록이 목록으로 누적됨)")
+    parser.add_argument('--compare', help="비교할 기준 결과 파일")
+    parser.add_argument('--threshold', type=float, default=0.1, help="회귀로 판단할 처리량 감소 비율")
+    args = parser.parse_args()
+
+    servers = []
+    args.llm_endpoints = None
+    if 'api' in args.stages and not args.llm_base_url:
+        servers = [StubLLMServer(latency=args.llm_latency, seed=n).start() for n in range(max(1, args.llm_servers))]
+        # 교정 단계 클라이언트가 사용할 주소 (api_base_url/api_endpoints 설정으로 전달)
+        args.llm_base_url = servers[0].base_url
+        if len(servers) > 1:
+            args.llm_endpoints = [server.base_url for server in servers]
+
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': args.engine,
+        'dpi': args.dpi,
+        'repeat': args.repeat,
+        'scenarios': {},
+    }
+    try:
+        for name in args.scenarios:
+            print(f"[{name}] {SCENARIOS[name]}")
+            run['scenarios'][name] = run_scenario(name, SCENARIOS[name], args)
+    finally:
+        for server in servers:
+            server.stop()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    history = []
+    if os.path.exists(args.output):
+        with open(args.output, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    history.append(run)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.compare:
+        regressions = compare(run, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+스텁 LLM 서버
+OpenAI 호환 /v1/chat/completions 엔드포인트를 로컬에서 흉내 내는 HTTP 서버.
+'[번호] 텍스트' 줄을 그대로 돌려주며, 지연 시간과 오류율을 조절할 수 있습니다.
+garble_models에 있는 모델로 요청하면 garble_rate 비율의 줄을 망가뜨려 응답합니다 (캐스케이드 승격 확인용).
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            self._send(503, {'error': {'message': 'server error (stub)', 'type': 'server_error'}})
+            return
+
+        messages = body.get('messages', [])
+        prompt = messages[-1]['content'] if messages else ''
+        # 번호가 붙은 줄만 그대로 응답 (교정 결과 = 원문)
+        lines = [line for line in prompt.split('\n') if line.startswith('[')]
+        if body.get('model') in server.garble_models and server.garble_rate:
+            lines = [self._garble(line) if server.rng.random() < server.garble_rate else line for line in lines]
+        content = '\n'.join(lines)
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 2
+        completion_tokens = len(content) // 2
+
+        with server.lock:
+            server.request_count += 1
+        self._send(200, {
+            'id': 'stub-completion',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _garble(self, line):
+        # 번호는 유지하고 본문을 길게 반복 (길이 검증에 걸리도록)
+        number, _, text = line.partition(' ')
+        return f"{number} {text * 4}"
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubLLMServer:
+    """with 문으로 사용하는 백그라운드 스텁 서버"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, seed=0,
+                 garble_rate=0.0, garble_models=()):
+        self.httpd = ThreadingHTTPServer((host, port), StubLLMHandler)
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.rng = random.Random(seed)
+        self.httpd.garble_rate = garble_rate
+        self.httpd.garble_models = set(garble_models)
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 스텁 LLM 서버")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503 응답 비율")
+    args = parser.parse_args()
+    server = StubLLMServer(port=args.port, latency=args.latency, error_rate=args.error_rate)
+    print(f"스텁 LLM 서버: {server.base_url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+스텁 OCR 엔진
+EasyOCR 대신 잉크 투영(projection)으로 줄/단어 박스를 찾는 가벼운 readtext 구현.
+모델 추론 비용을 제외한 파이프라인 자체의 처리량 측정에 사용합니다.
+"""
+import numpy as np
+
+
+def _runs(mask, min_gap=1):
+    """True 구간 [(start, end), ...] (end 미포함), min_gap 미만의 틈은 이어 붙임"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    diff = np.diff(padded)
+    starts = np.flatnonzero(diff == 1)
+    ends = np.flatnonzero(diff == -1)
+    runs = []
+    for s, e in zip(starts, ends):
+        if runs and s - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], e)
+        else:
+            runs.append((s, e))
+    return runs
+
+
+class StubReader:
+    def __init__(self, threshold=128):
+        self.threshold = threshold
+
+    def readtext(self, arr, **kwargs):
+        """EasyOCR과 같은 형식 [(bbox, text, confidence), ...] 반환"""
+        gray = arr.mean(axis=2) if arr.ndim == 3 else arr
+        ink = gray < self.threshold
+        results = []
+        for y0, y1 in _runs(ink.any(axis=1), min_gap=2):
+            height = y1 - y0
+            cols = ink[y0:y1].any(axis=0)
+            # 줄 높이의 절반 이상 벌어지면 다른 단어로 취급
+            for x0, x1 in _runs(cols, min_gap=max(2, height // 2)):
+                bbox = [[int(x0), int(y0)], [int(x1), int(y0)], [int(x1), int(y1)], [int(x0), int(y1)]]
+                results.append((bbox, f"w{len(results)}", 0.9))
+        return results
@@ -0,0 +1,62 @@
+"""
+블록 비교 모듈
+OCR 결과가 일부 페이지만 다시 만들어졌을 때 바뀐 블록/페이지를 찾아
+교정과 오버레이를 필요한 부분만 다시 수행
+"""
+import json
+import hashlib
+from collections import deque
+
+
+def text_digest(text):
+    """블록 원문 내용 해시"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def reuse_corrections(old_blocks, new_blocks):
+    """
+    이전 교정 결과 중 (페이지, 원문 해시)가 같은 블록의 교정 텍스트를 새 블록에 대응시킵니다.
+    같은 페이지에 같은 원문이 여러 번 있으면 등장 순서대로 짝지음.
+    반환: {새 블록 인덱스: text_corrected}
+    """
+    pool = {}
+    for b in old_blocks:
+        if not isinstance(b, dict) or 'text_corrected' not in b or b.get('blank'):
+            continue
+        key = (b.get('page'), text_digest(b.get('text_raw', '')))
+        pool.setdefault(key, deque()).append(b['text_corrected'])
+
+    reused = {}
+    for idx, b in enumerate(new_blocks):
+        if b.get('blank'):
+            continue
+        candidates = pool.get((b.get('page'), text_digest(b['text_raw'])))
+        if candidates:
+            reused[idx] = candidates.popleft()
+    return reused
+
+
+def page_digests(blocks):
+    """
+    페이지별 오버레이 내용 해시 {'페이지 번호': 해시}.
+    기록할 텍스트가 없는 페이지(빈 페이지 표시 블록만 있는 경우)는 포함하지 않습니다.
+    """
+    pages = {}
+    for b in blocks:
+        if b.get('blank'):
+            continue
+        pages.setdefault(b['page'], []).append([
+            b.get('text_corrected', b['text_raw']),
+            round(b['x_rel'], 6), round(b['y_rel'], 6), round(b['w_rel'], 6), round(b['h_rel'], 6),
+            round(float(b['font_size']), 3), b.get('lines', 1),
+        ])
+    return {
+        str(page): hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+        for page, rows in pages.items()
+    }
+
+
+def changed_pages(old_digests, new_digests):
+    """내용이 바뀌었거나 추가/삭제된 페이지 번호 목록 (오름차순)"""
+    return sorted(int(p) for p in set(old_digests) | set(new_digests)
+                  if old_digests.get(p) != new_digests.get(p))
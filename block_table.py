@@ -0,0 +1,95 @@
+"""
+OCR 박스 표 모듈
+한 페이지의 EasyOCR 결과를 박스마다 dict를 만들지 않고 열 단위(NumPy 구조화 배열 + 텍스트 리스트)로 보관하고,
+사각형(quad) → 좌표 범위 변환을 페이지 단위로 한 번에 계산합니다.
+저장할 때는 기존 JSON 형식(x_rel/y_rel/w_rel/h_rel/confidence/font_size)의 dict로 변환합니다.
+"""
+import numpy as np
+
+# 픽셀 좌표와 신뢰도
+BOX_DTYPE = np.dtype([
+    ('x0', 'f8'), ('y0', 'f8'), ('x1', 'f8'), ('y1', 'f8'),
+    ('confidence', 'f8'),
+])
+
+
+def quads_to_rects(quads):
+    """(N, 4, 2) 꼭짓점 배열 → (N, 4) [x0, y0, x1, y1] 배열 (EasyOCR 좌표 그대로, 이미지 밖 값도 유지)"""
+    quads = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2)
+    return np.concatenate([quads.min(axis=1), quads.max(axis=1)], axis=1)
+
+
+class BoxTable:
+    """한 페이지의 OCR 박스 (data: BOX_DTYPE 구조화 배열, texts: 같은 순서의 텍스트 리스트)"""
+
+    __slots__ = ('texts', 'data', 'img_w', 'img_h')
+
+    def __init__(self, texts, data, img_w, img_h):
+        self.texts = texts
+        self.data = data
+        self.img_w = img_w
+        self.img_h = img_h
+
+    @classmethod
+    def from_readtext(cls, results, img_w, img_h, map_points=None):
+        """
+        readtext 결과 [(bbox, text, confidence), ...]로 표 생성.
+        map_points(quads)를 주면 (N, 4, 2) 꼭짓점을 한 번에 변환한 뒤 범위를 계산합니다 (기울기 보정 역변환 등).
+        """
+        data = np.zeros(len(results), dtype=BOX_DTYPE)
+        if not results:
+            return cls([], data, img_w, img_h)
+        quads = np.asarray([r[0] for r in results], dtype=np.float64).reshape(-1, 4, 2)
+        if map_points is not None:
+            quads = map_points(quads)
+        rects = quads_to_rects(quads)
+        data['x0'], data['y0'], data['x1'], data['y1'] = rects.T
+        data['confidence'] = [r[2] for r in results]
+        return cls([r[1] for r in results], data, img_w, img_h)
+
+    @classmethod
+    def from_blocks(cls, boxes, img_w, img_h):
+        """기존 형식(상대좌표 dict) 박스 목록으로 표 생성"""
+        data = np.zeros(len(boxes), dtype=BOX_DTYPE)
+        for i, box in enumerate(boxes):
+            x0 = box['x_rel'] * img_w
+            y0 = box['y_rel'] * img_h
+            data[i] = (x0, y0, x0 + box['w_rel'] * img_w, y0 + box['h_rel'] * img_h, box['confidence'])
+        return cls([box['text_raw'] for box in boxes], data, img_w, img_h)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def rects(self):
+        """(N, 4) [x0, y0, x1, y1] 픽셀 좌표"""
+        d = self.data
+        return np.stack([d['x0'], d['y0'], d['x1'], d['y1']], axis=1)
+
+    def relative(self):
+        """(N, 4) [x_rel, y_rel, w_rel, h_rel] 상대좌표 (0~1)"""
+        d = self.data
+        return np.stack([
+            d['x0'] / self.img_w,
+            d['y0'] / self.img_h,
+            (d['x1'] - d['x0']) / self.img_w,
+            (d['y1'] - d['y0']) / self.img_h,
+        ], axis=1)
+
+    def to_dicts(self):
+        """기존 JSON 형식의 박스 dict 목록"""
+        rel = self.relative().tolist()
+        confs = self.data['confidence'].tolist()
+        heights = (self.data['y1'] - self.data['y0']).tolist()
+        return [
+            {
+                'text_raw': text,
+                'confidence': conf,
+                'x_rel': r[0],
+                'y_rel': r[1],
+                'w_rel': r[2],
+                'h_rel': r[3],
+                # baseline font size approximation
+                'font_size': h,
+            }
+            for text, conf, r, h in zip(self.texts, confs, rel, heights)
+        ]
@@ -0,0 +1,56 @@
+"""
+작업 취소 모듈
+처리 단계 전반에 전달되는 취소 토큰
+"""
+import threading
+
+
+class OperationCancelled(Exception):
+    """사용자 요청으로 작업이 중단되었을 때 발생"""
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def cancel(self):
+        """취소 요청. 등록된 콜백(진행 중인 HTTP 연결 종료 등)을 호출합니다."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"취소 콜백 오류: {e}")
+
+    def is_cancelled(self):
+        """취소 요청 여부"""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """취소되었으면 OperationCancelled 발생"""
+        if self._event.is_set():
+            raise OperationCancelled("작업이 취소되었습니다.")
+
+    def wait(self, seconds):
+        """취소 시 즉시 깨어나는 sleep. 취소되었으면 True 반환"""
+        return self._event.wait(seconds)
+
+    def register(self, callback):
+        """취소 시 호출할 콜백 등록 (이미 취소된 경우 즉시 호출)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback):
+        """등록한 콜백 해제"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
@@ -18,9 +18,67 @@ class ConfigManager:
             'daily_token_limit': 2000000,
             'max_retries': 3,
             'timeout_seconds': 60,
+            'api_base_url': '',
+            'api_connect_timeout': 10,
+            'api_max_connections': 10,
+            'api_keepalive_seconds': 60,
+            'api_http2': False,
+            'api_endpoints': [],
+            'api_circuit_failures': 3,
+            'api_circuit_cooldown': 30,
+            'correction_mode': 'single',
+            'cascade_fast_model': 'gpt-4.1-nano',
+            'cascade_strong_model': '',
+            'cascade_max_edit_ratio': 0.4,
+            'cascade_min_confidence': 0.3,
+            'cascade_max_length_ratio': 1.8,
+            'model_prices': {},
+            'schedule_policy': 'sjf',
+            'schedule_split_pages': 200,
+            'schedule_priorities': {},
+            'watch_poll_seconds': 5,
+            'watch_settle_seconds': 10,
+            'watch_recursive': False,
+            'document_cache_max_open': 8,
+            'document_cache_mmap': False,
+            'overlay_save_mode': 'balanced',
             'base_model': 'gpt-5-mini',
             'dpi': 300,
             'batch_size': 50,
+            'batch_strategy': 'flat',
+            'batch_context_lines': 2,
+            'layout_mode': 'none',
+            'skip_blank_pages': True,
+            'blank_check_dpi': 36,
+            'blank_ink_ratio': 0.0003,
+            'page_store_enabled': False,
+            'page_store_path': 'page_store.sqlite3',
+            'page_hash_max_distance': 3,
+            'page_store_verify_diff': 16.0,
+            'page_store_max_entries': 50000,
+            'page_cache_enabled': False,
+            'page_cache_dir': 'page_cache',
+            'page_cache_max_mb': 2048,
+            'ocr_device': 'auto',
+            'torch_threads': 0,
+            'ocr_batch_size': 1,
+            'ocr_quantize': True,
+            'preprocess_enabled': False,
+            'preprocess_steps': ['grayscale', 'denoise', 'threshold', 'deskew'],
+            'threshold_block_size': 31,
+            'threshold_c': 10,
+            'deskew_max_angle': 10.0,
+            'distributed_pages_per_unit': 10,
+            'distributed_max_attempts': 3,
+            'export_formats': [],
+            'search_index_enabled': False,
+            'search_index_path': 'search_index.sqlite3',
+            'profile_mode': 'off',
+            'profile_dir': 'profiles',
+            'profile_top_n': 20,
+            'result_store_enabled': False,
+            'result_store_dir': 'result_store',
+            'result_store_max_mb': 4096,
             'output_folder': '',
             'last_pdf_folder': '',
         }
@@ -50,6 +108,10 @@ class ConfigManager:
         self.config[key] = value
         self.save_config()
 
+    def override_settings(self, overrides):
+        """설정값을 파일에 저장하지 않고 현재 실행에서만 덮어쓰기"""
+        self.config.update(overrides)
+
     def has_api_key(self):
         """API 키가 있는지 확인"""
         return bool(self.config.get('api_key'))
@@ -0,0 +1,184 @@
+"""
+교정 캐스케이드 모듈
+모든 배치를 먼저 빠르고 저렴한 모델로 교정하고, 검증을 통과하지 못한 줄만
+강한 모델로 다시 보내는 방식(cascade)의 검증 규칙과 모델별 비용/지연 집계
+
+검증 실패(승격) 기준:
+  - 응답에 해당 줄이 없음
+  - 원문 대비 편집 거리 비율이 cascade_max_edit_ratio 초과
+  - 원문에 없던 문자 체계(한자/키릴 등)가 많이 섞이거나 깨진 문자(U+FFFD, 제어 문자) 포함
+  - OCR 신뢰도가 cascade_min_confidence 미만
+  - 길이가 원문의 cascade_max_length_ratio배를 넘게 늘거나 줄어듦
+"""
+import json
+import difflib
+import threading
+import unicodedata
+
+# 문자 체계 분류 (코드 포인트 범위)
+_SCRIPTS = (
+    ('hangul', ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7A3))),
+    ('kana', ((0x3040, 0x30FF),)),
+    ('han', ((0x3400, 0x4DBF), (0x4E00, 0x9FFF))),
+    ('cyrillic', ((0x0400, 0x04FF),)),
+    ('greek', ((0x0370, 0x03FF),)),
+    ('latin', ((0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F))),
+)
+
+
+def char_script(ch):
+    code = ord(ch)
+    for name, ranges in _SCRIPTS:
+        if any(lo <= code <= hi for lo, hi in ranges):
+            return name
+    return 'other' if ch.isalpha() else None
+
+
+def script_counts(text):
+    counts = {}
+    for ch in text:
+        script = char_script(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def edit_ratio(a, b):
+    """0(동일) ~ 1(완전히 다름) 사이의 편집 거리 비율"""
+    if not a and not b:
+        return 0.0
+    return 1.0 - difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def charset_anomaly(raw, corrected, max_foreign_ratio=0.3):
+    """깨진 문자나 원문에 없던 문자 체계가 교정 결과 글자의 일정 비율 이상이면 True"""
+    if '\ufffd' in corrected:
+        return True
+    if any(unicodedata.category(ch) == 'Cc' and ch not in '\t' for ch in corrected):
+        return True
+    out_counts = script_counts(corrected)
+    letters = sum(out_counts.values())
+    if not letters:
+        return False
+    raw_scripts = set(script_counts(raw))
+    foreign = sum(n for script, n in out_counts.items() if script not in raw_scripts)
+    return foreign / letters > max_foreign_ratio
+
+
+def correction_model_key(config_manager):
+    """교정 결과를 재사용할 때 비교하는 모델 식별자 (캐스케이드면 두 모델 조합)"""
+    base_model = config_manager.get_setting('base_model', 'gpt-5-mini')
+    if config_manager.get_setting('correction_mode', 'single') != 'cascade':
+        return base_model
+    fast_model = config_manager.get_setting('cascade_fast_model', 'gpt-4.1-nano')
+    strong_model = config_manager.get_setting('cascade_strong_model', '') or base_model
+    return f"cascade:{fast_model}>{strong_model}"
+
+
+class CascadeValidator:
+    def __init__(self, max_edit_ratio=0.4, min_confidence=0.3, max_length_ratio=1.8):
+        self.max_edit_ratio = max_edit_ratio
+        self.min_confidence = min_confidence
+        self.max_length_ratio = max_length_ratio
+
+    @classmethod
+    def from_config(cls, config_manager):
+        return cls(
+            max_edit_ratio=config_manager.get_setting('cascade_max_edit_ratio', 0.4),
+            min_confidence=config_manager.get_setting('cascade_min_confidence', 0.3),
+            max_length_ratio=config_manager.get_setting('cascade_max_length_ratio', 1.8),
+        )
+
+    def check(self, block, corrected):
+        """검증 실패 사유 문자열, 통과하면 None"""
+        raw = block.get('text_raw', '')
+        if corrected is None:
+            return "응답 누락"
+        confidence = block.get('confidence')
+        if confidence is not None and confidence < self.min_confidence:
+            return f"낮은 OCR 신뢰도 {confidence:.2f}"
+        raw_len, out_len = len(raw.strip()), len(corrected.strip())
+        # 짧은 줄은 몇 글자만 바뀌어도 비율이 커지므로 5글자 여유를 둠
+        if out_len > raw_len * self.max_length_ratio + 5 or raw_len > out_len * self.max_length_ratio + 5:
+            return f"길이 변화 {raw_len}→{out_len}"
+        if charset_anomaly(raw, corrected):
+            return "문자 체계 이상"
+        if raw_len >= 4 and edit_ratio(raw, corrected) > self.max_edit_ratio:
+            return "원문과 차이 큼"
+        return None
+
+
+class CostLedger:
+    """
+    문서 한 개의 교정 비용/지연 집계 (단계: 'fast' 1차 모델, 'strong' 승격 모델, 'single' 단일 모델).
+    model_prices: {모델: [입력, 출력]} 100만 토큰당 가격 (없으면 비용은 None)
+    """
+
+    def __init__(self, model_prices=None):
+        self.model_prices = model_prices or {}
+        self._lock = threading.Lock()
+        self.tiers = {}
+        self.lines_total = 0
+        self.lines_escalated = 0
+        self.escalation_reasons = {}
+
+    def record(self, tier, model, seconds, usage=None, lines=0):
+        with self._lock:
+            t = self.tiers.setdefault(tier, {
+                'model': model, 'requests': 0, 'lines': 0, 'seconds': 0.0,
+                'prompt_tokens': 0, 'completion_tokens': 0,
+            })
+            t['requests'] += 1
+            t['lines'] += lines
+            t['seconds'] += seconds
+            if usage is not None:
+                t['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+                t['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+
+    def record_escalations(self, total_lines, reasons):
+        """reasons: 승격한 줄의 사유 목록"""
+        with self._lock:
+            self.lines_total += total_lines
+            self.lines_escalated += len(reasons)
+            for reason in reasons:
+                # 수치가 붙은 사유는 앞부분으로 묶음
+                key = reason.rsplit(' ', 1)[0] if reason[-1].isdigit() else reason
+                self.escalation_reasons[key] = self.escalation_reasons.get(key, 0) + 1
+
+    def cost(self, tier):
+        t = self.tiers[tier]
+        price = self.model_prices.get(t['model'])
+        if not price:
+            return None
+        return (t['prompt_tokens'] * price[0] + t['completion_tokens'] * price[1]) / 1e6
+
+    def summary(self):
+        with self._lock:
+            tiers = {name: dict(t, seconds=round(t['seconds'], 3)) for name, t in self.tiers.items()}
+            data = {
+                'tiers': tiers,
+                'lines_total': self.lines_total,
+                'lines_escalated': self.lines_escalated,
+                'escalation_reasons': dict(self.escalation_reasons),
+            }
+        for name in tiers:
+            tiers[name]['cost_usd'] = self.cost(name)
+        costs = [t['cost_usd'] for t in tiers.values()]
+        data['cost_usd'] = sum(costs) if costs and None not in costs else None
+        return data
+
+    def format(self):
+        data = self.summary()
+        parts = []
+        for name, t in data['tiers'].items():
+            cost = f", ${t['cost_usd']:.4f}" if t['cost_usd'] is not None else ''
+            parts.append(f"{name}({t['model']}) 요청 {t['requests']}회, {t['lines']}줄, "
+                         f"토큰 {t['prompt_tokens']}+{t['completion_tokens']}, {t['seconds']:.1f}s{cost}")
+        if data['lines_total']:
+            parts.append(f"승격 {data['lines_escalated']}/{data['lines_total']}줄 "
+                         f"({data['lines_escalated'] / data['lines_total']:.1%})")
+        return "교정 집계: " + " | ".join(parts)
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,520 @@
+"""
+분산 OCR 모듈
+공유 파일시스템의 작업 디렉터리를 큐로 사용하여 여러 워커가 페이지 범위를 나눠 OCR
+
+작업 디렉터리 구조:
+  job.json               입력 PDF, 설정, 페이지 범위 단위 목록
+  leases/<unit>.lease    워커의 작업 점유 정보 (하트비트로 만료 시각 갱신)
+  work/<unit>.<worker>.json*  워커별 진행 중인 OCR 결과/체크포인트 (lease를 잃은 워커와 섞이지 않도록 분리)
+  results/<unit>.json    완료된 페이지 범위의 OCR 결과
+  attempts/<unit>.json   점유(시도) 횟수와 마지막 오류 (max_attempts회 시도하고도 완료되지 않으면 실패 단위)
+
+사용 예:
+  python distributed_ocr.py run input.pdf out_ocr_raw.json --job-dir /mnt/share/job1 --local-workers 4
+  python distributed_ocr.py submit input.pdf --job-dir /mnt/share/job1
+  python distributed_ocr.py worker --job-dir /mnt/share/job1      (각 호스트에서 실행)
+  python distributed_ocr.py merge out_ocr_raw.json --job-dir /mnt/share/job1
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+import subprocess
+from config_manager import ConfigManager
+from cancellation import CancellationToken, OperationCancelled
+from document_cache import shared_cache
+
+
+class SharedJobQueue:
+    def __init__(self, job_dir, lease_seconds=60):
+        self.job_dir = job_dir
+        self.lease_seconds = lease_seconds
+        self.lease_dir = os.path.join(job_dir, 'leases')
+        self.work_dir = os.path.join(job_dir, 'work')
+        self.result_dir = os.path.join(job_dir, 'results')
+        self.attempt_dir = os.path.join(job_dir, 'attempts')
+
+    def create_job(self, input_pdf, start_page, end_page, pages_per_unit, settings, max_attempts=3):
+        """
+        페이지 범위를 pages_per_unit 단위로 나눠 작업을 등록합니다.
+        start_page, end_page가 None인 경우 전체 페이지를 대상으로 합니다.
+        max_attempts: 한 단위를 이 횟수만큼 점유하고도 완료하지 못하면(오류, 워커 비정상 종료)
+        다시 시도하지 않고 실패로 둡니다.
+        """
+        for path in (self.lease_dir, self.work_dir, self.result_dir, self.attempt_dir):
+            os.makedirs(path, exist_ok=True)
+
+        total_pages = shared_cache().page_count(input_pdf)
+        first = start_page or 1
+        last = end_page or total_pages
+
+        units = []
+        for s in range(first, last + 1, pages_per_unit):
+            e = min(s + pages_per_unit - 1, last)
+            units.append(f"{s:05d}-{e:05d}")
+
+        job = {
+            'input_pdf': os.path.abspath(input_pdf),
+            'start_page': first,
+            'end_page': last,
+            'settings': settings,
+            'units': units,
+            'max_attempts': max(1, max_attempts),
+            'created': time.time(),
+        }
+        self._write_json(os.path.join(self.job_dir, 'job.json'), job)
+        return job
+
+    def load_job(self):
+        """등록된 작업 정보 로드"""
+        with open(os.path.join(self.job_dir, 'job.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def unit_range(self, unit):
+        """'00001-00010' → (1, 10)"""
+        s, e = unit.split('-')
+        return int(s), int(e)
+
+    def result_path(self, unit):
+        return os.path.join(self.result_dir, f"{unit}.json")
+
+    def work_path(self, unit, worker_id):
+        return os.path.join(self.work_dir, f"{unit}.{worker_id}.json")
+
+    def lease_path(self, unit):
+        return os.path.join(self.lease_dir, f"{unit}.lease")
+
+    def attempt_path(self, unit):
+        return os.path.join(self.attempt_dir, f"{unit}.json")
+
+    def pending_units(self):
+        """결과가 아직 없고 실패로 확정되지 않은 단위 목록"""
+        job = self.load_job()
+        return [u for u in job['units']
+                if not os.path.exists(self.result_path(u)) and not self._is_failed(u, job)]
+
+    def failed_units(self):
+        """max_attempts회 시도하고도 완료하지 못해 더 이상 시도하지 않는 단위 → 마지막 오류"""
+        job = self.load_job()
+        failed = {}
+        for unit in job['units']:
+            if os.path.exists(self.result_path(unit)):
+                continue
+            attempts = self._read_json(self.attempt_path(unit))
+            if self._is_failed(unit, job, attempts):
+                failed[unit] = attempts.get('error') or "워커 비정상 종료 (lease 만료)"
+        return failed
+
+    def is_done(self):
+        return not self.pending_units()
+
+    def _is_failed(self, unit, job, attempts=None):
+        # 마지막 시도가 아직 진행 중(lease 유효)이면 실패로 보지 않음
+        attempts = attempts or self._read_json(self.attempt_path(unit))
+        if attempts is None or attempts.get('attempts', 0) < job.get('max_attempts', 3):
+            return False
+        lease_path = self.lease_path(unit)
+        return not os.path.exists(lease_path) or self._lease_expired(lease_path)
+
+    def _lease_expired(self, path):
+        """lease 파일이 만료되었는지 (읽을 수 없는 파일은 수정 시각 기준으로 lease_seconds가 지났으면 만료)"""
+        lease = self._read_json(path)
+        if lease is not None:
+            return lease.get('expires_at', 0) <= time.time()
+        try:
+            return os.path.getmtime(path) + self.lease_seconds <= time.time()
+        except OSError:
+            return False
+
+    def claim(self, worker_id):
+        """
+        처리할 단위 하나를 점유합니다.
+        lease 내용을 임시 파일에 다 쓴 뒤 os.link로 lease 경로에 게시하므로(이미 있으면 실패)
+        한 워커만 점유하고, 다른 워커가 내용이 비어 있는 lease를 보는 일이 없습니다.
+        만료된 lease는 rename으로 원자적으로 치운 뒤, 치운 파일을 다시 읽어 그 사이 다른 워커가
+        새로 점유한 lease였으면 되돌려 놓습니다 (충돌한 워커 복구).
+        점유할 때마다 시도 횟수를 기록해 워커를 죽게 만드는 단위도 max_attempts회 후 실패로 둡니다.
+        """
+        for unit in self.pending_units():
+            lease_path = self.lease_path(unit)
+            if os.path.exists(lease_path):
+                if not self._lease_expired(lease_path):
+                    continue
+                stale_path = f"{lease_path}.stale-{worker_id}-{uuid.uuid4().hex[:8]}"
+                try:
+                    os.rename(lease_path, stale_path)
+                except OSError:
+                    # 다른 워커가 먼저 치움
+                    continue
+                if not self._lease_expired(stale_path):
+                    # 확인과 rename 사이에 다른 워커가 새로 점유한 lease → 되돌리고 건너뜀
+                    try:
+                        os.link(stale_path, lease_path)
+                    except OSError:
+                        pass
+                    os.remove(stale_path)
+                    continue
+                os.remove(stale_path)
+
+            if not self._publish_lease(lease_path, worker_id):
+                continue
+            # 점유 직전에 다른 워커가 완료했을 수 있음
+            if os.path.exists(self.result_path(unit)):
+                self.release(unit, worker_id)
+                continue
+            # lease를 가진 워커만 시도 횟수를 기록하므로 경합 없음
+            path = self.attempt_path(unit)
+            attempts = self._read_json(path) or {'attempts': 0, 'error': None}
+            attempts['attempts'] += 1
+            attempts['worker'] = worker_id
+            self._write_json(path, attempts)
+            return unit
+        return None
+
+    def _publish_lease(self, lease_path, worker_id):
+        """lease를 임시 파일에 쓴 뒤 하드 링크로 게시. 다른 워커의 lease가 이미 있으면 False"""
+        tmp_path = f"{lease_path}.new-{worker_id}-{uuid.uuid4().hex[:8]}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._lease_data(worker_id), f)
+        try:
+            os.link(tmp_path, lease_path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def renew(self, unit, worker_id):
+        """
+        하트비트: lease 만료 시각 갱신. 점유를 잃었으면 False.
+        다른 워커는 만료된 lease만 치우므로, 만료까지 lease_seconds/4 이상 남았을 때만
+        임시 파일 + os.replace로 교체합니다. 그보다 늦으면 그 사이 다른 워커가 점유했을 수 있어
+        (새 lease를 덮어쓰지 않도록) 점유를 잃은 것으로 봅니다.
+        """
+        lease_path = self.lease_path(unit)
+        lease = self._read_json(lease_path)
+        if lease is None or lease.get('worker') != worker_id:
+            return False
+        if lease.get('expires_at', 0) - time.time() < self.lease_seconds / 4:
+            return False
+        tmp_path = f"{lease_path}.renew-{worker_id}-{uuid.uuid4().hex[:8]}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._lease_data(worker_id), f)
+        os.replace(tmp_path, lease_path)
+        return True
+
+    def owns(self, unit, worker_id):
+        lease = self._read_json(self.lease_path(unit))
+        return lease is not None and lease.get('worker') == worker_id
+
+    def release(self, unit, worker_id, refund=False):
+        """
+        점유 해제 (본인 lease일 때만). 해제했으면 True.
+        refund: 작업 취소/서비스 종료처럼 단위 문제가 아닌 중단이면 이번 시도를 횟수에서 뺌
+        """
+        if not self.owns(unit, worker_id):
+            return False
+        if refund:
+            path = self.attempt_path(unit)
+            attempts = self._read_json(path)
+            if attempts and attempts.get('attempts', 0) > 0:
+                attempts['attempts'] -= 1
+                self._write_json(path, attempts)
+        try:
+            os.remove(self.lease_path(unit))
+        except OSError:
+            pass
+        return True
+
+    def record_failure(self, unit, worker_id, error):
+        """
+        단위 처리 오류를 기록하고 lease를 해제합니다 (시도 횟수는 점유할 때 이미 기록됨).
+        반환: 지금까지의 시도 횟수
+        """
+        path = self.attempt_path(unit)
+        attempts = self._read_json(path) or {'attempts': 1}
+        if self.owns(unit, worker_id):
+            attempts['error'] = str(error)
+            attempts['worker'] = worker_id
+            self._write_json(path, attempts)
+            self.release(unit, worker_id)
+        return attempts['attempts']
+
+    def complete(self, unit, worker_id, work_json):
+        """
+        워커가 만든 OCR 결과를 완료 결과로 원자적으로 이동합니다.
+        lease를 잃은 워커는 결과를 게시하지 않고 작업 파일만 지운 뒤 False를 반환합니다.
+        """
+        if not self.owns(unit, worker_id):
+            try:
+                os.remove(work_json)
+            except OSError:
+                pass
+            return False
+        os.replace(work_json, self.result_path(unit))
+        self.release(unit, worker_id)
+        return True
+
+    def merge_results(self, json_path):
+        """모든 단위 결과를 페이지 순서로 합치고 id를 다시 매겨 저장"""
+        job = self.load_job()
+        blocks = []
+        for unit in job['units']:
+            with open(self.result_path(unit), 'r', encoding='utf-8') as f:
+                blocks.extend(json.load(f))
+        blocks.sort(key=lambda b: (b['page'], b['id']))
+        for new_id, b in enumerate(blocks):
+            b['id'] = new_id
+        self._write_json(json_path, blocks)
+        return blocks
+
+    def _lease_data(self, worker_id):
+        return {
+            'worker': worker_id,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'expires_at': time.time() + self.lease_seconds,
+        }
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+class DistributedWorker:
+    def __init__(self, config_manager, job_dir, worker_id=None, lease_seconds=60, log_callback=None):
+        self.config = config_manager
+        self.queue = SharedJobQueue(job_dir, lease_seconds)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.log_callback = log_callback or print
+        self.ocr_processor = None
+
+    def run(self, idle_exit=True, poll_interval=2.0, cancel_token=None):
+        """작업이 남아 있는 동안 단위를 점유해 OCR 수행. 처리한 단위 수 반환"""
+        from ocr_processor import OCRProcessor
+
+        job = self.queue.load_job()
+        # 모든 워커가 같은 DPI/레이아웃 설정으로 처리하도록 작업 설정 적용
+        self.config.override_settings(job['settings'])
+        if self.ocr_processor is None:
+            self.ocr_processor = OCRProcessor(self.config)
+
+        processed = 0
+        while not (cancel_token and cancel_token.is_cancelled()):
+            unit = self.queue.claim(self.worker_id)
+            if unit is None:
+                if self.queue.is_done() or idle_exit:
+                    break
+                time.sleep(poll_interval)
+                continue
+            if self._process_unit(job, unit, cancel_token):
+                processed += 1
+        return processed
+
+    def _process_unit(self, job, unit, cancel_token=None):
+        start_page, end_page = self.queue.unit_range(unit)
+        self.log_callback(f"[{self.worker_id}] 페이지 {start_page}-{end_page} OCR 시작")
+
+        # lease를 잃거나 작업이 취소되면 현재 단위 중단
+        unit_token = CancellationToken()
+        if cancel_token:
+            cancel_token.register(unit_token.cancel)
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.queue.lease_seconds / 3):
+                if not self.queue.renew(unit, self.worker_id):
+                    self.log_callback(f"[{self.worker_id}] {unit} lease 상실 - 중단")
+                    unit_token.cancel()
+                    return
+
+        hb_thread = threading.Thread(target=heartbeat, daemon=True)
+        hb_thread.start()
+        # 워커별 작업 파일: lease를 잃은 워커가 새 점유자의 파일을 덮어쓰지 않음
+        work_json = self.queue.work_path(unit, self.worker_id)
+        try:
+            self.ocr_processor.preprocess_pdf(
+                job['input_pdf'], work_json, start_page, end_page, cancel_token=unit_token
+            )
+            if not self.queue.complete(unit, self.worker_id, work_json):
+                self.log_callback(f"[{self.worker_id}] {unit} lease 상실 - 결과를 게시하지 않음")
+                return False
+            self.log_callback(f"[{self.worker_id}] 페이지 {start_page}-{end_page} OCR 완료")
+            return True
+        except OperationCancelled:
+            # 서비스 종료 등으로 취소된 시도는 횟수에서 뺌 (lease를 잃었으면 해제도 환급도 안 됨)
+            self.queue.release(unit, self.worker_id, refund=True)
+            self._remove_work_files(work_json)
+            return False
+        except Exception as e:
+            # 오류를 남기고 lease를 해제해 다른 워커가 다시 시도하도록 함 (max_attempts회까지)
+            attempts = self.queue.record_failure(unit, self.worker_id, e)
+            self._remove_work_files(work_json)
+            max_attempts = job.get('max_attempts', 3)
+            if attempts >= max_attempts:
+                self.log_callback(f"[{self.worker_id}] {unit} 처리 중 오류 ({attempts}/{max_attempts}회, 실패 처리): {e}")
+            else:
+                self.log_callback(f"[{self.worker_id}] {unit} 처리 중 오류 ({attempts}/{max_attempts}회): {e}")
+            return False
+        finally:
+            stop_heartbeat.set()
+            if cancel_token:
+                cancel_token.unregister(unit_token.cancel)
+
+
+    @staticmethod
+    def _remove_work_files(work_json):
+        for path in (work_json, work_json + '.partial', work_json + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class DistributedCoordinator:
+    def __init__(self, config_manager, job_dir, lease_seconds=60):
+        self.config = config_manager
+        self.queue = SharedJobQueue(job_dir, lease_seconds)
+        self.local_workers = []
+        self.worker_threads = 0
+
+    def submit(self, input_pdf, start_page=None, end_page=None, pages_per_unit=None):
+        """OCR 작업 등록"""
+        pages_per_unit = pages_per_unit or self.config.get_setting('distributed_pages_per_unit', 10)
+        # 결과에 영향을 주는 설정은 모든 워커가 같은 값을 쓰도록 작업에 기록
+        settings = {
+            key: self.config.get_setting(key)
+            for key in ('dpi', 'layout_mode', 'skip_blank_pages', 'preprocess_enabled', 'preprocess_steps',
+                        'ocr_quantize', 'ocr_batch_size')
+        }
+        max_attempts = self.config.get_setting('distributed_max_attempts', 3)
+        return self.queue.create_job(input_pdf, start_page, end_page, pages_per_unit, settings, max_attempts)
+
+    def spawn_local_workers(self, count):
+        """
+        현재 호스트에서 워커 프로세스 실행.
+        torch_threads가 지정되지 않았으면 코어를 워커 수로 나눠 과다 점유를 막습니다.
+        """
+        self.worker_threads = self.config.get_setting('torch_threads', 0) or max(1, (os.cpu_count() or 1) // count)
+        for _ in range(count):
+            self.local_workers.append(self._spawn_worker())
+
+    def _spawn_worker(self):
+        cmd = [
+            sys.executable, os.path.abspath(__file__), 'worker',
+            '--job-dir', self.queue.job_dir,
+            '--lease-seconds', str(self.queue.lease_seconds),
+            '--config', self.config.config_file,
+            '--torch-threads', str(self.worker_threads),
+            '--wait',
+        ]
+        return subprocess.Popen(cmd)
+
+    def wait_and_merge(self, json_path, progress_callback=None, poll_interval=2.0, cancel_token=None):
+        """
+        모든 단위가 완료될 때까지 기다린 뒤 결과를 하나의 _ocr_raw.json으로 합칩니다.
+        로컬 워커가 비정상 종료했는데 작업이 남아 있으면 새 워커를 띄웁니다.
+        max_attempts회 오류가 난 단위가 있으면 병합하지 않고 DISTRIBUTED_ERROR 예외를 발생시킵니다.
+        """
+        total = len(self.queue.load_job()['units'])
+        while True:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            pending = self.queue.pending_units()
+            if progress_callback:
+                done = total - len(pending)
+                progress_callback(f"분산 OCR 진행 중... {done}/{total} 단위 완료", done / total * 100)
+            if not pending:
+                break
+            for i, proc in enumerate(self.local_workers):
+                if proc.poll() is not None:
+                    self.local_workers[i] = self._spawn_worker()
+            time.sleep(poll_interval)
+
+        for proc in self.local_workers:
+            proc.wait()
+        self.local_workers = []
+
+        failed = self.queue.failed_units()
+        if failed:
+            details = ', '.join(f"{unit} ({error})" for unit, error in failed.items())
+            raise Exception(f"DISTRIBUTED_ERROR: 반복 오류로 처리하지 못한 페이지 범위가 있습니다: {details}")
+
+        blocks = self.queue.merge_results(json_path)
+        if progress_callback:
+            progress_callback("분산 OCR 완료", 100)
+        return blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 작업 디렉터리 기반 분산 OCR")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(p):
+        p.add_argument('--job-dir', required=True, help="공유 작업 디렉터리")
+        p.add_argument('--lease-seconds', type=int, default=60, help="lease 만료 시간(초)")
+        p.add_argument('--config', default='config.json', help="설정 파일 경로")
+
+    p_submit = sub.add_parser('submit', help="작업 등록")
+    p_submit.add_argument('input_pdf')
+    p_submit.add_argument('--start-page', type=int)
+    p_submit.add_argument('--end-page', type=int)
+    p_submit.add_argument('--pages-per-unit', type=int)
+    add_common(p_submit)
+
+    p_worker = sub.add_parser('worker', help="워커 실행")
+    p_worker.add_argument('--wait', action='store_true', help="작업이 없어도 완료될 때까지 대기")
+    p_worker.add_argument('--torch-threads', type=int, help="워커당 torch 스레드 수")
+    add_common(p_worker)
+
+    p_merge = sub.add_parser('merge', help="완료 대기 후 결과 병합")
+    p_merge.add_argument('json_path')
+    add_common(p_merge)
+
+    p_run = sub.add_parser('run', help="등록 + 로컬 워커 실행 + 병합")
+    p_run.add_argument('input_pdf')
+    p_run.add_argument('json_path')
+    p_run.add_argument('--start-page', type=int)
+    p_run.add_argument('--end-page', type=int)
+    p_run.add_argument('--pages-per-unit', type=int)
+    p_run.add_argument('--local-workers', type=int, default=2)
+    add_common(p_run)
+
+    args = parser.parse_args()
+    config = ConfigManager(args.config)
+
+    if args.command == 'worker':
+        if args.torch_threads:
+            config.override_settings({'torch_threads': args.torch_threads})
+        worker = DistributedWorker(config, args.job_dir, lease_seconds=args.lease_seconds)
+        count = worker.run(idle_exit=not args.wait)
+        print(f"[{worker.worker_id}] {count}개 단위 처리")
+        return
+
+    coordinator = DistributedCoordinator(config, args.job_dir, args.lease_seconds)
+    progress = lambda msg, pct: print(f"{msg} ({pct:.0f}%)")
+    if args.command in ('submit', 'run'):
+        job = coordinator.submit(args.input_pdf, args.start_page, args.end_page, args.pages_per_unit)
+        print(f"작업 등록: {len(job['units'])}개 단위 (페이지 {job['start_page']}-{job['end_page']})")
+    if args.command == 'run':
+        coordinator.spawn_local_workers(args.local_workers)
+    if args.command in ('merge', 'run'):
+        blocks = coordinator.wait_and_merge(args.json_path, progress_callback=progress)
+        print(f"병합 완료: {len(blocks)}개 블록 → {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+PDF 문서 캐시 모듈
+한 실행(작업) 안에서 완료 판정, OCR, 오버레이, 내보내기가 같은 PDF를 각각 fitz.open으로 다시 열고
+xref를 다시 해석하지 않도록 문서 핸들과 페이지 수/페이지 크기/메타데이터를 공유합니다.
+
+  - 핸들은 (경로, 크기, 수정 시각)으로 식별해 파일이 바뀌면 새로 엽니다.
+  - 열린 핸들 수가 document_cache_max_open을 넘으면 사용 중이 아닌 가장 오래된 핸들부터 닫습니다.
+  - document_cache_mmap을 켜면 파일을 메모리 맵으로 열어 네트워크 저장소에서도 한 번만 읽습니다.
+  - 공유 핸들은 읽기 전용입니다. 내용을 수정하는 오버레이는 open_copy로 별도 문서를 받아 사용합니다.
+  - MuPDF 문서는 스레드 간 동시 사용이 안전하지 않으므로 같은 문서는 한 번에 한 스레드만 사용합니다.
+"""
+import os
+import mmap
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import fitz
+
+# 페이지 수/크기 등 문서 정보 기록 상한 (핸들을 닫아도 유지)
+MAX_INFO_ENTRIES = 4096
+
+
+class _Entry:
+    __slots__ = ('version', 'doc', 'buffer', 'lock', 'pins', 'closed')
+
+    def __init__(self, version, doc, buffer):
+        self.version = version
+        self.doc = doc
+        self.buffer = buffer
+        self.lock = threading.RLock()
+        self.pins = 0        # 사용 중인 호출 수 (0일 때만 닫을 수 있음)
+        self.closed = False
+
+
+class DocumentCache:
+    def __init__(self, max_open=8, use_mmap=False):
+        self.max_open = max(1, max_open)
+        self.use_mmap = use_mmap
+        self._entries = OrderedDict()   # 절대 경로 → _Entry (LRU 순서)
+        self._info = OrderedDict()      # 버전 → {'page_count', 'page_sizes', 'metadata', 'sizes'(페이지별)} 중 계산한 항목
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.hits = 0
+
+    @classmethod
+    def from_config(cls, config_manager):
+        return cls(
+            max_open=config_manager.get_setting('document_cache_max_open', 8),
+            use_mmap=config_manager.get_setting('document_cache_mmap', False),
+        )
+
+    def _version(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        return (path, st.st_size, st.st_mtime_ns)
+
+    def _open(self, path):
+        if not self.use_mmap:
+            return fitz.open(path), None
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return fitz.open(stream=memoryview(buffer), filetype='pdf'), buffer
+        except BaseException:
+            buffer.close()
+            raise
+
+    def _close(self, entry):
+        if entry.closed:
+            return
+        entry.closed = True
+        entry.doc.close()
+        if entry.buffer is not None:
+            try:
+                entry.buffer.close()
+            except BufferError:
+                # open_copy로 만든 문서가 아직 버퍼를 참조 중이면 가비지 컬렉션에 맡김
+                pass
+
+    def _acquire(self, path):
+        version = self._version(path)
+        with self._lock:
+            entry = self._entries.get(version[0])
+            if entry is not None and entry.version == version:
+                entry.pins += 1
+                self._entries.move_to_end(version[0])
+                self.hits += 1
+                return entry
+        # 느린 저장소에서 여는 동안 다른 문서 요청을 막지 않도록 잠금 밖에서 열기
+        doc, buffer = self._open(path)
+        with self._lock:
+            entry = self._entries.get(version[0])
+            if entry is not None and entry.version == version:
+                # 그 사이 다른 스레드가 먼저 연 경우
+                self._close(_Entry(version, doc, buffer))
+                entry.pins += 1
+                self._entries.move_to_end(version[0])
+                self.hits += 1
+                return entry
+            if entry is not None and entry.pins == 0:
+                # 파일이 바뀐 이전 버전 핸들 (사용 중이면 반환할 때 닫음)
+                self._close(entry)
+            entry = _Entry(version, doc, buffer)
+            entry.pins = 1
+            self._entries[version[0]] = entry
+            self.opens += 1
+            self._evict()
+            return entry
+
+    def _release(self, entry):
+        with self._lock:
+            entry.pins -= 1
+            if entry.pins == 0 and self._entries.get(entry.version[0]) is not entry:
+                self._close(entry)
+            self._evict()
+
+    def _evict(self):
+        """열린 핸들이 max_open을 넘으면 사용 중이 아닌 가장 오래된 핸들부터 닫기 (잠금 안에서 호출)"""
+        if len(self._entries) <= self.max_open:
+            return
+        for path in list(self._entries):
+            if len(self._entries) <= self.max_open:
+                break
+            entry = self._entries[path]
+            if entry.pins == 0:
+                del self._entries[path]
+                self._close(entry)
+
+    @contextmanager
+    def document(self, path):
+        """읽기 전용으로 공유하는 문서 핸들 (같은 문서를 쓰는 다른 스레드는 끝날 때까지 대기)"""
+        entry = self._acquire(path)
+        try:
+            with entry.lock:
+                yield entry.doc
+        finally:
+            self._release(entry)
+
+    def open_copy(self, path):
+        """수정용으로 새로 연 문서 (호출한 쪽에서 닫음). 메모리 맵을 쓰면 파일을 다시 읽지 않음"""
+        entry = self._acquire(path)
+        try:
+            if entry.buffer is not None:
+                return fitz.open(stream=memoryview(entry.buffer), filetype='pdf')
+            return fitz.open(path)
+        finally:
+            self._release(entry)
+
+    # 문서 정보 항목별 계산 (page_sizes는 모든 페이지를 읽으므로 요청될 때만 계산)
+    _INFO_LOADERS = {
+        'page_count': len,
+        'page_sizes': lambda doc: [(page.rect.width, page.rect.height) for page in doc],
+        'metadata': lambda doc: dict(doc.metadata or {}),
+    }
+
+    def _info_for(self, path, key):
+        version = self._version(path)
+        with self._lock:
+            info = self._info.get(version)
+            if info is not None:
+                self._info.move_to_end(version)
+                if key in info:
+                    return info[key]
+        with self.document(path) as doc:
+            value = self._INFO_LOADERS[key](doc)
+        with self._lock:
+            self._info.setdefault(version, {})[key] = value
+            self._info.move_to_end(version)
+            while len(self._info) > MAX_INFO_ENTRIES:
+                self._info.popitem(last=False)
+        return value
+
+    def page_count(self, path):
+        """페이지 수 (페이지 트리만 확인하며 페이지 내용은 읽지 않음)"""
+        return self._info_for(path, 'page_count')
+
+    def page_sizes(self, path):
+        """페이지별 (너비, 높이) pt 목록 (처음 요청할 때 모든 페이지를 읽어 계산)"""
+        return self._info_for(path, 'page_sizes')
+
+    def page_size(self, path, page_num):
+        """한 페이지의 (너비, 높이) pt (해당 페이지만 읽어 기록)"""
+        version = self._version(path)
+        with self._lock:
+            info = self._info.get(version)
+            if info is not None:
+                if 'page_sizes' in info:
+                    return info['page_sizes'][page_num - 1]
+                size = info.get('sizes', {}).get(page_num)
+                if size is not None:
+                    return size
+        with self.document(path) as doc:
+            rect = doc[page_num - 1].rect
+        size = (rect.width, rect.height)
+        with self._lock:
+            self._info.setdefault(version, {}).setdefault('sizes', {})[page_num] = size
+            while len(self._info) > MAX_INFO_ENTRIES:
+                self._info.popitem(last=False)
+        return size
+
+    def metadata(self, path):
+        return self._info_for(path, 'metadata')
+
+    def close_all(self):
+        """사용 중이 아닌 핸들을 모두 닫기 (실행이 끝날 때 파일 핸들/메모리 반환)"""
+        with self._lock:
+            for path in list(self._entries):
+                entry = self._entries[path]
+                if entry.pins == 0:
+                    del self._entries[path]
+                    self._close(entry)
+
+    def stats(self):
+        with self._lock:
+            return {'open': len(self._entries), 'opens': self.opens, 'hits': self.hits}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(config_manager=None):
+    """프로세스에서 공유하는 문서 캐시 (config_manager를 주면 핸들 수 상한/메모리 맵 설정 반영)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DocumentCache.from_config(config_manager) if config_manager else DocumentCache()
+        elif config_manager is not None:
+            _shared.max_open = max(1, config_manager.get_setting('document_cache_max_open', 8))
+            _shared.use_mmap = config_manager.get_setting('document_cache_mmap', False)
+        return _shared
@@ -0,0 +1,185 @@
+"""
+API 엔드포인트 라우팅 모듈
+여러 OpenAI 호환 엔드포인트(API 키/프로젝트, 자체 호스팅 서버)에 교정 배치를 나눠 보내고,
+관측한 지연 시간과 오류율로 다음 배치를 보낼 곳을 고릅니다.
+
+설정 api_endpoints (비우면 api_base_url/api_key/base_model의 단일 엔드포인트):
+  [{"name": "main", "base_url": "", "api_key": "", "model": "gpt-5-mini",
+    "weight": 1.0, "max_concurrency": 4}, ...]
+  비운 항목은 기본 설정(api_base_url, 실행 시 API 키, base_model)을 사용합니다.
+
+연속 api_circuit_failures회 실패한 엔드포인트는 api_circuit_cooldown초 동안 제외(회로 차단)하고,
+이후 한 배치로 상태를 확인해 성공하면 다시 사용합니다. 배치 요청이 실패하면 다른 엔드포인트로 넘깁니다.
+"""
+import time
+import threading
+from llm_client import LatencyStats
+
+# 요청 내용 문제로 엔드포인트를 바꿔도 결과가 같은 오류 (다른 엔드포인트로 넘기지 않음)
+NON_RETRYABLE_PREFIXES = ('TOKEN_LIMIT_ERROR:',)
+
+# 지연 시간/오류율 지수 이동 평균의 새 관측값 비중
+EWMA_ALPHA = 0.3
+
+
+class Endpoint:
+    def __init__(self, name, base_url, api_key, model, weight=1.0, max_concurrency=1):
+        self.name = name
+        self.base_url = base_url or None
+        self.api_key = api_key
+        self.model = model
+        self.weight = max(float(weight), 0.01)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.in_flight = 0
+        self.latency = None       # 성공한 요청의 평균 지연 (초, 이동 평균)
+        self.error_rate = 0.0     # 실패 비율 (이동 평균)
+        self.consecutive_failures = 0
+        self.open_until = 0.0     # 회로 차단 해제 시각
+        self.probing = False      # 차단 해제 후 상태 확인 요청 진행 중
+        self.stats = LatencyStats()
+
+    def available(self, now):
+        if self.in_flight >= self.max_concurrency:
+            return False
+        if self.open_until > now:
+            return False
+        if self.open_until and self.probing:
+            # 차단 해제 직후에는 상태 확인용 요청 하나만 허용
+            return False
+        return True
+
+    def score(self, default_latency):
+        """낮을수록 우선 (예상 지연 × 대기 요청 수 보정 × 오류율 보정 / 가중치)"""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + self.in_flight) * (1 + 4 * self.error_rate) / self.weight
+
+    def describe(self):
+        s = self.stats.summary()
+        state = '차단' if self.open_until > time.monotonic() else '정상'
+        if not s['requests']:
+            return f"{self.name}: 요청 없음 ({state})"
+        return (f"{self.name}: 요청 {s['requests']}회, 오류 {s['errors']}회, "
+                f"평균 {s['mean_ms']:.0f}ms, p95 {s['p95_ms']:.0f}ms ({state})")
+
+
+class EndpointRouter:
+    def __init__(self, endpoints, failure_threshold=3, cooldown_seconds=30.0):
+        if not endpoints:
+            raise ValueError("API 엔드포인트가 없습니다.")
+        self.endpoints = endpoints
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config_manager, api_key):
+        """설정의 api_endpoints로 라우터 생성 (없으면 기본 설정의 단일 엔드포인트)"""
+        base_model = config_manager.get_setting('base_model', 'gpt-5-mini')
+        base_url = config_manager.get_setting('api_base_url', '')
+        entries = config_manager.get_setting('api_endpoints', []) or [{}]
+        endpoints = []
+        for n, entry in enumerate(entries):
+            endpoints.append(Endpoint(
+                entry.get('name') or entry.get('base_url') or f"endpoint-{n + 1}",
+                entry.get('base_url') or base_url,
+                entry.get('api_key') or api_key,
+                entry.get('model') or base_model,
+                weight=entry.get('weight', 1.0),
+                max_concurrency=entry.get('max_concurrency', 1),
+            ))
+        return cls(
+            endpoints,
+            failure_threshold=config_manager.get_setting('api_circuit_failures', 3),
+            cooldown_seconds=config_manager.get_setting('api_circuit_cooldown', 30),
+        )
+
+    @property
+    def total_concurrency(self):
+        return sum(ep.max_concurrency for ep in self.endpoints)
+
+    def _default_latency(self):
+        known = [ep.latency for ep in self.endpoints if ep.latency is not None]
+        return sum(known) / len(known) if known else 1.0
+
+    def acquire(self, exclude=(), cancel_token=None):
+        """
+        요청을 보낼 엔드포인트를 골라 사용 중으로 표시합니다. 모두 사용 중이면 빈자리가 날 때까지 대기.
+        exclude를 제외하면 보낼 곳이 없거나 모두 차단된 경우 None.
+        """
+        with self._cond:
+            while True:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                now = time.monotonic()
+                candidates = [ep for ep in self.endpoints if ep not in exclude]
+                if not candidates:
+                    return None
+                ready = [ep for ep in candidates if ep.available(now)]
+                if ready:
+                    default_latency = self._default_latency()
+                    ep = min(ready, key=lambda e: e.score(default_latency))
+                    ep.in_flight += 1
+                    if ep.open_until:
+                        ep.probing = True
+                    return ep
+                if all(ep.open_until > now for ep in candidates):
+                    return None
+                self._cond.wait(timeout=0.5)
+
+    def release(self, ep, seconds, ok):
+        """요청 결과를 반영해 엔드포인트 상태(이동 평균, 회로 차단)를 갱신"""
+        with self._cond:
+            ep.in_flight -= 1
+            ep.error_rate = (1 - EWMA_ALPHA) * ep.error_rate + EWMA_ALPHA * (0.0 if ok else 1.0)
+            if ok:
+                ep.latency = seconds if ep.latency is None else (1 - EWMA_ALPHA) * ep.latency + EWMA_ALPHA * seconds
+                ep.consecutive_failures = 0
+                ep.open_until = 0.0
+                ep.probing = False
+            else:
+                ep.consecutive_failures += 1
+                # 엔드포인트가 하나뿐이면 차단하지 않음 (기존처럼 배치마다 재시도)
+                if len(self.endpoints) > 1 and (ep.probing or ep.consecutive_failures >= self.failure_threshold):
+                    ep.open_until = time.monotonic() + self.cooldown_seconds
+                    ep.probing = False
+            self._cond.notify_all()
+
+    def request(self, send, log_callback=None, cancel_token=None):
+        """
+        send(endpoint)로 요청을 보내고 응답을 반환합니다. 실패하면 아직 시도하지 않은
+        다른 엔드포인트로 넘기고, 모두 실패하면 마지막 오류를 다시 발생시킵니다.
+        send가 None을 반환하면(재시도 소진) 실패로 보고 다음 엔드포인트를 시도하며,
+        남은 곳이 없으면 None을 반환합니다.
+        """
+        tried = []
+        last_error = None
+        while True:
+            ep = self.acquire(exclude=tried, cancel_token=cancel_token)
+            if ep is None:
+                if last_error is not None:
+                    raise last_error
+                if not tried:
+                    raise Exception("SERVER_ERROR: 사용 가능한 API 엔드포인트가 없습니다 (모두 회로 차단 상태).")
+                return None
+            tried.append(ep)
+            start = time.perf_counter()
+            try:
+                resp = send(ep)
+            except BaseException as e:
+                self.release(ep, time.perf_counter() - start, ok=False)
+                if not isinstance(e, Exception) or str(e).startswith(NON_RETRYABLE_PREFIXES):
+                    raise
+                if cancel_token and cancel_token.is_cancelled():
+                    raise
+                last_error = e
+                if len(self.endpoints) > 1 and log_callback:
+                    log_callback(f"[엔드포인트] {ep.name} 요청 실패, 다른 엔드포인트로 전환: {str(e)[:80]}")
+                continue
+            self.release(ep, time.perf_counter() - start, ok=resp is not None)
+            if resp is not None:
+                return resp
+            if len(self.endpoints) > 1 and log_callback:
+                log_callback(f"[엔드포인트] {ep.name} 재시도 소진, 다른 엔드포인트로 전환")
+
+    def describe(self):
+        return [ep.describe() for ep in self.endpoints]
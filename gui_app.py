@@ -3,25 +3,39 @@
 OCR PDF 처리를 위한 GUI 인터페이스
 """
 import os
-import json
-import fitz  # PyMuPDF for page counting in completion checks
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import threading
+import queue
+import datetime
 from config_manager import ConfigManager
 from ocr_processor import OCRProcessor
 from api_processor import APIProcessor
 from pdf_processor import PDFProcessor
+from pipeline import run_document, run_ocr_part, merge_ocr_parts
+from job_scheduler import JobScheduler
+from document_cache import shared_cache
+from cancellation import CancellationToken, OperationCancelled
+
+
+# 로그에 표시할 단계 이름
+STAGE_NAMES = {'ocr': 'OCR', 'api': '교정', 'overlay': 'PDF 오버레이'}
 
 
 class OCRApp:
-    def __init__(self, root):
+    # 작업 스레드 이벤트를 UI에 반영하는 주기 (ms)
+    UI_POLL_MS = 100
+
+    def __init__(self, root, setting_overrides=None):
         self.root = root
         self.root.title("PDF OCR 처리기")
         self.root.geometry("800x700")
         
         # 설정 관리자 초기화
         self.config_manager = ConfigManager()
+        if setting_overrides:
+            # 명령행 옵션 등 현재 실행에만 적용할 설정 (파일에 저장하지 않음)
+            self.config_manager.override_settings(setting_overrides)
         
         # 프로세서 초기화
         self.ocr_processor = OCRProcessor(self.config_manager)
@@ -36,9 +50,13 @@ class OCRApp:
         self.debug_mode = tk.BooleanVar(value=True)
         self.api_key = ""
         self.processing_cancelled = False
+        self.cancel_token = CancellationToken()
+        # 작업 스레드 → UI 스레드 이벤트 큐 (Tk 위젯은 UI 스레드에서만 접근)
+        self.ui_events = queue.Queue()
         
         self.setup_ui()
         self.load_settings()
+        self.root.after(self.UI_POLL_MS, self.drain_ui_events)
     
     def setup_ui(self):
         """UI 설정"""
@@ -349,10 +367,52 @@ class OCRApp:
         return True
     
     def update_progress(self, message, percentage):
-        """진행률 업데이트"""
-        self.progress_var.set(message)
-        self.progress_bar['value'] = percentage
-        self.root.update_idletasks()
+        """진행률 업데이트 (어느 스레드에서든 호출 가능, 큐에 적재만 함)"""
+        self.ui_events.put(('progress', message, percentage))
+
+    def post_ui(self, func, *args):
+        """UI 스레드에서 실행할 함수 예약 (메시지 박스, 버튼 상태 등)"""
+        self.ui_events.put(('call', func, args))
+
+    def drain_ui_events(self):
+        """
+        큐에 쌓인 이벤트를 타이머마다 한 번에 반영합니다.
+        진행률은 마지막 값만, 로그는 모아서 한 번에 삽입하므로
+        작업 스레드는 UI 갱신을 기다리지 않습니다.
+        """
+        latest_progress = None
+        pending_logs = []
+        try:
+            while True:
+                try:
+                    event = self.ui_events.get_nowait()
+                except queue.Empty:
+                    break
+                kind = event[0]
+                if kind == 'progress':
+                    latest_progress = event[1:]
+                elif kind == 'log':
+                    pending_logs.append(event[1])
+                elif kind == 'call':
+                    # 예약된 호출 전에 앞선 진행률/로그를 먼저 반영해 순서 유지
+                    self._apply_ui_updates(latest_progress, pending_logs)
+                    latest_progress, pending_logs = None, []
+                    event[1](*event[2])
+            self._apply_ui_updates(latest_progress, pending_logs)
+        finally:
+            self.root.after(self.UI_POLL_MS, self.drain_ui_events)
+
+    def _apply_ui_updates(self, progress, logs):
+        """모아 둔 진행률/로그를 위젯에 반영"""
+        if progress is not None:
+            message, percentage = progress
+            self.progress_var.set(message)
+            self.progress_bar['value'] = percentage
+        if logs and self.debug_mode.get():
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, ''.join(logs))
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
     
     def start_processing(self):
         """OCR 처리 시작"""
@@ -372,22 +432,29 @@ class OCRApp:
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.processing_cancelled = False
+        self.cancel_token = CancellationToken()
         
+        # Tk 변수는 작업 스레드에서 읽지 않도록 미리 값을 확정
+        output_folder = self.output_folder_path.get()
+        page_range = self.get_page_range()
+
         # 별도 스레드에서 처리
-        self.processing_thread = threading.Thread(target=self.process_ocr, args=(api_key,))
+        self.processing_thread = threading.Thread(
+            target=self.process_ocr, args=(api_key, output_folder, page_range)
+        )
         self.processing_thread.daemon = True
         self.processing_thread.start()
     
     def stop_processing(self):
         """처리 중지"""
         self.processing_cancelled = True
+        # 진행 중인 OCR/교정/오버레이 루프와 HTTP 요청까지 중단
+        self.cancel_token.cancel()
         self.update_progress("처리 중지 중...", 0)
     
-    def process_ocr(self, api_key):
+    def process_ocr(self, api_key, output_folder, page_range):
         """OCR 처리 메인 함수 - 단일/복수 파일 처리 지원"""
         try:
-            output_folder = self.output_folder_path.get()
-            
             # 복수 파일 처리
             if len(self.input_pdf_paths) > 1:
                 self.log_debug_message(f"복수 파일 처리 시작: {len(self.input_pdf_paths)}개 파일")
@@ -396,175 +463,143 @@ class OCRApp:
                 # 단일 파일 처리
                 input_pdf = self.input_pdf_paths[0]
                 self.log_debug_message(f"단일 파일 처리 시작: {os.path.basename(input_pdf)}")
-                self.process_single_pdf(api_key, input_pdf, output_folder)
+                self.process_single_pdf(api_key, input_pdf, output_folder, page_range)
                 
+        except OperationCancelled:
+            self.update_progress("처리 중지됨 (다음 실행 시 이어서 처리)", 0)
+            self.log_debug_message("사용자 요청으로 처리를 중지했습니다.")
         except Exception as e:
             if not self.processing_cancelled:
-                self.handle_processing_error(e)
+                self.post_ui(self.handle_processing_error, e)
         finally:
+            # 이번 실행에서 연 PDF 핸들 정리
+            shared_cache().close_all()
             # UI 상태 복원
-            self.start_button.config(state=tk.NORMAL)
-            self.stop_button.config(state=tk.DISABLED)
+            self.post_ui(self.start_button.config, {'state': tk.NORMAL})
+            self.post_ui(self.stop_button.config, {'state': tk.DISABLED})
     
-    def process_single_pdf(self, api_key, input_pdf, output_folder):
+    def process_single_pdf(self, api_key, input_pdf, output_folder, page_range):
         """단일 PDF 파일 처리"""
-        start_page, end_page = self.get_page_range()
-        
-        base_name = os.path.splitext(os.path.basename(input_pdf))[0]
-        raw_json = os.path.join(output_folder, f"{base_name}_ocr_raw.json")
-        corr_json = os.path.join(output_folder, f"{base_name}_ocr_corr.json")
-        output_pdf = os.path.join(output_folder, f"{base_name}_recovered.pdf")
-        
-        # 1단계: OCR (완료 여부 확인 후 스킵 가능)
+        start_page, end_page = page_range
         if self.processing_cancelled:
             return
 
-        if self.is_ocr_complete(input_pdf, raw_json, start_page, end_page):
-            self.update_progress("기존 OCR 결과 재사용...", 15)
-            self.log_debug_message("이미 완료된 OCR 결과를 스킵합니다.")
-            with open(raw_json, 'r', encoding='utf-8') as f:
-                blocks = json.load(f)
-        else:
-            self.update_progress("OCR 전처리 시작...", 10)
-            self.log_debug_message("OCR 전처리 단계 시작")
-            blocks = self.ocr_processor.preprocess_pdf(
-                input_pdf, raw_json, start_page, end_page,
-                progress_callback=lambda msg, pct: self.update_progress(msg, 10 + pct * 0.3)
-            )
-        
-        # 2단계: API 교정 (완료 여부 확인 후 스킵 가능)
-        if self.processing_cancelled:
-            return
-        if self.is_correction_complete(raw_json, corr_json):
-            self.update_progress("기존 교정 결과 재사용...", 55)
-            self.log_debug_message("이미 완료된 LLM 교정 결과를 스킵합니다.")
-            with open(corr_json, 'r', encoding='utf-8') as f:
-                corrected_blocks = json.load(f)
-        else:
-            reason = getattr(self, '_last_correction_incomplete_reason', None)
-            if reason:
-                self.log_debug_message(f"교정 재실행 사유: {reason}")
-            self.update_progress("API 교정 시작...", 40)
-            self.log_debug_message("API 교정 단계 시작")
-            corrected_blocks = self.api_processor.recover_text_with_api(
-                raw_json, corr_json, api_key,
-                progress_callback=lambda msg, pct: self.update_progress(msg, 40 + pct * 0.4),
-                log_callback=self.log_debug_message
-            )
-        
-        # 3단계: PDF 오버레이 (이미 결과 PDF가 있고 교정 결과 길이 >0 이면 스킵)
-        if self.processing_cancelled:
-            return
-        if os.path.exists(output_pdf) and corrected_blocks:
-            self.update_progress("기존 PDF 오버레이 결과 존재 - 스킵", 90)
-            self.log_debug_message("이미 생성된 PDF를 재사용합니다.")
-        else:
-            self.update_progress("PDF 오버레이 시작...", 80)
-            self.log_debug_message("PDF 오버레이 단계 시작")
-            self.pdf_processor.overlay_with_fitz(
-                input_pdf, corrected_blocks, output_pdf,
-                progress_callback=lambda msg, pct: self.update_progress(msg, 80 + pct * 0.2)
-            )
-        
+        # 단계별 진행률 구간: OCR 10~40%, 교정 40~80%, 오버레이 80~100%
+        stage_ranges = {'ocr': (10, 30), 'api': (40, 40), 'overlay': (80, 20)}
+
+        def on_progress(stage, msg, pct):
+            offset, span = stage_ranges[stage]
+            self.update_progress(msg, offset + pct * span / 100)
+
+        self.update_progress("OCR 전처리 시작...", 10)
+        result = run_document(
+            self.ocr_processor, self.api_processor, self.pdf_processor, self.config_manager,
+            input_pdf, output_folder, api_key, start_page, end_page,
+            progress_callback=on_progress, log_callback=self.log_debug_message,
+            cancel_token=self.cancel_token
+        )
+        for stage in result['skipped']:
+            self.log_debug_message(f"{STAGE_NAMES[stage]} 단계: 기존 결과 재사용")
+        output_pdf = result['outputs']['output_pdf']
+
         self.update_progress("처리 완료!", 100)
         self.log_debug_message(f"단일 파일 처리 완료: {output_pdf}")
-        messagebox.showinfo("완료", f"OCR 처리가 완료되었습니다.\n\n출력 파일: {output_pdf}")
+        self.post_ui(messagebox.showinfo, "완료", f"OCR 처리가 완료되었습니다.\n\n출력 파일: {output_pdf}")
     
     def process_multiple_pdfs(self, api_key, output_folder):
-        """복수 PDF 파일 처리"""
+        """복수 PDF 파일 처리 (schedule_policy 순서, 큰 파일은 페이지 구간으로 나눠 다른 파일과 번갈아 처리)"""
+        scheduler = JobScheduler.from_config(self.config_manager)
+        units = scheduler.plan(self.input_pdf_paths)
         total_files = len(self.input_pdf_paths)
+        total_pages = sum(unit.pages for unit in units) or 1
         completed_files = []
-        
-        for i, input_pdf in enumerate(self.input_pdf_paths):
-            if self.processing_cancelled:
-                break
-                
-            file_progress_start = (i / total_files) * 100
-            file_progress_range = (1 / total_files) * 100
-            
-            base_name = os.path.splitext(os.path.basename(input_pdf))[0]
-            self.update_progress(f"파일 {i+1}/{total_files} 처리 중: {base_name}", file_progress_start)
-            self.log_debug_message(f"파일 {i+1}/{total_files} 처리 시작: {base_name}")
-            
-            try:
-                raw_json = os.path.join(output_folder, f"{base_name}_ocr_raw.json")
-                corr_json = os.path.join(output_folder, f"{base_name}_ocr_corr.json")
-                output_pdf = os.path.join(output_folder, f"{base_name}_recovered.pdf")
-                
-                # OCR 전처리 (전체 페이지) - 완료 시 스킵
-                if self.is_ocr_complete(input_pdf, raw_json, None, None):
-                    self.log_debug_message(f"{base_name}: 기존 OCR 결과 스킵")
-                    with open(raw_json, 'r', encoding='utf-8') as f:
-                        blocks = json.load(f)
-                else:
-                    self.log_debug_message(f"{base_name}: OCR 전처리 시작")
-                    blocks = self.ocr_processor.preprocess_pdf(
-                        input_pdf, raw_json, None, None,  # 전체 페이지
-                        progress_callback=lambda msg, pct: self.update_progress(
-                            f"파일 {i+1}/{total_files} OCR: {base_name}", 
-                            file_progress_start + pct * 0.3 * file_progress_range / 100
-                        )
-                    )
-                
+        failed_files = set()
+        done_pages = 0
+        self.log_debug_message(f"처리 순서({scheduler.policy}): " + ", ".join(unit.describe() for unit in units))
+
+        # 단위 안에서의 단계별 진행률 구간: OCR 0~30%, 교정 30~70%, 오버레이 70~100%
+        # (나눈 파일의 중간 구간은 OCR만 하므로 0~100%)
+        stage_ranges = {'ocr': (0.0, 0.3), 'api': (0.3, 0.4), 'overlay': (0.7, 0.3)}
+        stage_labels = {'ocr': 'OCR', 'api': 'API', 'overlay': 'PDF'}
+
+        try:
+            for unit in units:
                 if self.processing_cancelled:
                     break
-                  # API 교정
-                if self.is_correction_complete(raw_json, corr_json):
-                    self.log_debug_message(f"{base_name}: 기존 교정 결과 스킵")
-                    with open(corr_json, 'r', encoding='utf-8') as f:
-                        corrected_blocks = json.load(f)
-                else:
-                    reason = getattr(self, '_last_correction_incomplete_reason', None)
-                    if reason:
-                        self.log_debug_message(f"{base_name}: 교정 재실행 사유: {reason}")
-                    self.log_debug_message(f"{base_name}: API 교정 시작")
-                    corrected_blocks = self.api_processor.recover_text_with_api(
-                        raw_json, corr_json, api_key,
-                        progress_callback=lambda msg, pct: self.update_progress(
-                            f"파일 {i+1}/{total_files} API: {base_name}", 
-                            file_progress_start + (0.3 + pct * 0.4) * file_progress_range / 100
-                        ),
-                        log_callback=self.log_debug_message
+                input_pdf = unit.input_pdf
+                if input_pdf in failed_files:
+                    continue
+
+                unit_progress_start = done_pages / total_pages * 100
+                unit_progress_range = unit.pages / total_pages * 100
+                done_pages += unit.pages
+                base_name = os.path.splitext(os.path.basename(input_pdf))[0]
+                file_no = self.input_pdf_paths.index(input_pdf) + 1
+                self.update_progress(f"파일 {file_no}/{total_files} 처리 중: {unit.describe()}", unit_progress_start)
+                self.log_debug_message(f"파일 {file_no}/{total_files} 처리 시작: {unit.describe()}")
+
+                def on_progress(stage, msg, pct, file_no=file_no, unit=unit, start=unit_progress_start,
+                                span_total=unit_progress_range):
+                    offset, span = (0.0, 1.0) if unit.split and not unit.finish else stage_ranges[stage]
+                    self.update_progress(
+                        f"파일 {file_no}/{total_files} {stage_labels[stage]}: {unit.describe()}",
+                        start + (offset + pct * span / 100) * span_total
                     )
-                
-                if self.processing_cancelled:
-                    break
-                
-                # PDF 오버레이
-                if os.path.exists(output_pdf) and corrected_blocks:
-                    self.log_debug_message(f"{base_name}: 기존 PDF 결과 스킵")
-                else:
-                    self.log_debug_message(f"{base_name}: PDF 오버레이 시작")
-                    self.pdf_processor.overlay_with_fitz(
-                        input_pdf, corrected_blocks, output_pdf,
-                        progress_callback=lambda msg, pct: self.update_progress(
-                            f"파일 {i+1}/{total_files} PDF: {base_name}", 
-                            file_progress_start + (0.7 + pct * 0.3) * file_progress_range / 100
+
+                scheduler.unit_started(unit)
+                try:
+                    if unit.split:
+                        run_ocr_part(
+                            self.ocr_processor, self.config_manager, input_pdf, output_folder,
+                            unit.start_page, unit.end_page,
+                            progress_callback=lambda msg, pct, cb=on_progress: cb('ocr', msg, pct),
+                            log_callback=self.log_debug_message, cancel_token=self.cancel_token
                         )
+                        if not unit.finish:
+                            scheduler.unit_finished(unit)
+                            continue
+                        merge_ocr_parts(self.config_manager, input_pdf, output_folder, unit.ranges)
+
+                    # 전체 페이지 처리, 완료된 단계는 스킵
+                    result = run_document(
+                        self.ocr_processor, self.api_processor, self.pdf_processor, self.config_manager,
+                        input_pdf, output_folder, api_key,
+                        progress_callback=on_progress, log_callback=self.log_debug_message,
+                        cancel_token=self.cancel_token
                     )
-                
-                completed_files.append(output_pdf)
-                self.log_debug_message(f"{base_name}: 처리 완료")
-                
-            except Exception as e:
-                self.log_debug_message(f"{base_name}: 처리 중 오류 - {str(e)}")
-                if "API_KEY_ERROR:" in str(e) or "QUOTA_ERROR:" in str(e):
-                    # 심각한 오류는 전체 처리 중단
-                    raise e
-                # 그 외 오류는 해당 파일만 스킵
-                continue
-        
+                    for stage in result['skipped']:
+                        self.log_debug_message(f"{base_name}: 기존 {STAGE_NAMES[stage]} 결과 스킵")
+
+                    scheduler.unit_finished(unit)
+                    completed_files.append(result['outputs']['output_pdf'])
+                    self.log_debug_message(f"{base_name}: 처리 완료")
+
+                except OperationCancelled:
+                    raise
+                except Exception as e:
+                    scheduler.unit_finished(unit, ok=False)
+                    self.log_debug_message(f"{base_name}: 처리 중 오류 - {str(e)}")
+                    if "API_KEY_ERROR:" in str(e) or "QUOTA_ERROR:" in str(e):
+                        # 심각한 오류는 전체 처리 중단
+                        raise e
+                    # 그 외 오류는 해당 파일의 남은 구간까지 스킵
+                    failed_files.add(input_pdf)
+                    continue
+        finally:
+            for line in scheduler.format_report():
+                self.log_debug_message(f"[스케줄] {line}")
+
         if completed_files:
             self.update_progress("복수 파일 처리 완료!", 100)
             self.log_debug_message(f"복수 파일 처리 완료: {len(completed_files)}개 파일")
-            messagebox.showinfo("완료", 
+            self.post_ui(messagebox.showinfo, "완료",
                               f"OCR 처리가 완료되었습니다.\n\n"
                               f"처리 완료: {len(completed_files)}개 파일\n"
                               f"출력 폴더: {output_folder}")
         else:
             self.update_progress("처리 실패", 0)
             self.log_debug_message("복수 파일 처리 실패")
-    
+
     def handle_processing_error(self, e):
         """처리 중 오류 핸들링"""
         error_msg = str(e)
@@ -645,83 +680,9 @@ class OCRApp:
         self.log_text.config(state=tk.DISABLED)
     
     def log_debug_message(self, message):
-        """디버그 로그에 메시지 추가"""
-        if self.debug_mode.get():
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            formatted_message = f"[{timestamp}] {message}\n"
-            
-            self.log_text.config(state=tk.NORMAL)
-            self.log_text.insert(tk.END, formatted_message)
-            self.log_text.see(tk.END)
-            self.log_text.config(state=tk.DISABLED)
-            self.root.update_idletasks()
-
-    # ====== 신규: 완료 여부 판단 유틸 ======
-    def is_ocr_complete(self, input_pdf_path, raw_json_path, start_page, end_page):
-        """이미 OCR이 완료되었는지 검사.
-        기준:
-          - raw_json 파일 존재 & 올바른 JSON (list)
-          - 요청한 페이지 범위 내 모든 페이지 번호가 최소 1회 이상 등장 (빈 페이지는 예외적으로 빠질 수 있으니 허용 옵션 필요할 수 있으나 우선 엄격)
-        """
-        try:
-            if not os.path.exists(raw_json_path):
-                return False
-            with open(raw_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if not isinstance(data, list) or len(data) == 0:
-                return False
-            doc = fitz.open(input_pdf_path)
-            total_pages = len(doc)
-            if start_page is None and end_page is None:
-                expected_pages = set(range(1, total_pages + 1))
-            else:
-                s = start_page if start_page else 1
-                e = end_page if end_page else total_pages
-                expected_pages = set(range(s, e + 1))
-            pages_present = {b.get('page') for b in data if isinstance(b, dict) and 'page' in b}
-            missing = expected_pages - pages_present
-            # 허용: 한 페이지도 블록이 없는 경우(완전히 빈 페이지) -> 일단 기본 정책으론 미싱 페이지 있으면 미완료
-            if missing:
-                self.log_debug_message(f"OCR 재실행: 누락 페이지 {sorted(list(missing))}")
-                return False
-            return True
-        except Exception as e:
-            self.log_debug_message(f"OCR 완료 판정 오류 -> 재실행: {e}")
-            return False
-
-    def is_correction_complete(self, raw_json_path, corr_json_path):
-        """LLM 교정 완료 여부 판정.
-        기준:
-          - 두 파일 존재
-          - 두 파일 모두 list
-          - 길이 동일
-          - 모든 항목에 text_corrected 키 존재
-        """
-        try:
-            self._last_correction_incomplete_reason = None
-            if not (os.path.exists(raw_json_path) and os.path.exists(corr_json_path)):
-                self._last_correction_incomplete_reason = "결과 파일 없음"
-                return False
-            with open(raw_json_path, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
-            with open(corr_json_path, 'r', encoding='utf-8') as f:
-                corr_data = json.load(f)
-            if not (isinstance(raw_data, list) and isinstance(corr_data, list)):
-                self._last_correction_incomplete_reason = "JSON 구조(list 아님)"
-                return False
-            if len(raw_data) == 0 or len(raw_data) != len(corr_data):
-                self._last_correction_incomplete_reason = f"길이 불일치 raw={len(raw_data)} corr={len(corr_data)}"
-                return False
-            missing_key_count = sum(1 for b in corr_data if 'text_corrected' not in b)
-            if missing_key_count:
-                self._last_correction_incomplete_reason = f"text_corrected 누락 {missing_key_count}개"
-                return False
-            return True
-        except Exception as e:
-            self.log_debug_message(f"교정 완료 판정 오류 -> 재실행: {e}")
-            self._last_correction_incomplete_reason = f"예외: {e}"
-            return False
+        """디버그 로그에 메시지 추가 (큐에 적재, 디버그 모드 여부는 반영 시 확인)"""
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self.ui_events.put(('log', f"[{timestamp}] {message}\n"))
 
 class APIKeyDialog:
     def __init__(self, parent, title):
@@ -780,9 +741,9 @@ class APIKeyDialog:
         self.dialog.destroy()
 
 
-def main():
+def main(setting_overrides=None):
     root = tk.Tk()
-    app = OCRApp(root)
+    app = OCRApp(root, setting_overrides)
     root.mainloop()
 
 
@@ -0,0 +1,163 @@
+"""
+작업 순서 결정 모듈
+복수 파일 처리 시 페이지 수를 먼저 읽어 처리 순서를 정하고, 큰 파일은 OCR을 페이지 구간 단위로 나눠
+다른 파일과 번갈아 처리해 짧은 문서가 긴 문서 뒤에서 오래 기다리지 않도록 합니다.
+
+설정:
+  schedule_policy       'fifo'(선택 순서) | 'sjf'(페이지 수가 적은 파일부터) | 'priority'(우선순위 높은 파일부터)
+  schedule_priorities   {"파일 이름 패턴": 우선순위} (예: {"*긴급*": 10}, 일치하지 않으면 0)
+  schedule_split_pages  이 값보다 페이지가 많은 파일은 이 크기의 구간으로 나눠 OCR (0이면 나누지 않음)
+
+나눈 파일은 지금까지 배정된 페이지가 가장 적은 파일의 다음 구간을 고르는 방식으로 끼워 넣고,
+마지막 구간에서 구간별 OCR 결과를 합친 뒤 교정/오버레이까지 처리합니다.
+"""
+import os
+import time
+import fnmatch
+from document_cache import shared_cache
+
+POLICIES = ('fifo', 'sjf', 'priority')
+
+
+def read_page_count(path):
+    """PDF 페이지 수 (본문을 읽지 않고 페이지 트리만 확인, 이후 단계와 핸들 공유). 열 수 없으면 0"""
+    try:
+        return shared_cache().page_count(path)
+    except Exception:
+        return 0
+
+
+class WorkUnit:
+    """
+    처리 단위. 나누지 않은 파일은 start_page/end_page가 None인 단위 하나,
+    나눈 파일은 페이지 구간별 OCR 단위이며 마지막 구간(finish=True)이 병합과 교정/오버레이를 맡습니다.
+    """
+
+    def __init__(self, input_pdf, pages, start_page=None, end_page=None, part=1, parts=1, ranges=None):
+        self.input_pdf = input_pdf
+        self.pages = pages
+        self.start_page = start_page
+        self.end_page = end_page
+        self.part = part
+        self.parts = parts
+        self.ranges = ranges or []  # 나눈 파일의 전체 구간 목록 (병합용)
+
+    @property
+    def split(self):
+        return self.parts > 1
+
+    @property
+    def finish(self):
+        return self.part == self.parts
+
+    def describe(self):
+        name = os.path.basename(self.input_pdf)
+        if not self.split:
+            return f"{name} ({self.pages}쪽)"
+        return f"{name} {self.start_page}-{self.end_page}쪽 ({self.part}/{self.parts})"
+
+
+class JobScheduler:
+    def __init__(self, policy='sjf', split_pages=0, priorities=None):
+        if policy not in POLICIES:
+            raise ValueError(f"지원하지 않는 스케줄 정책: {policy}")
+        self.policy = policy
+        self.split_pages = split_pages
+        self.priorities = priorities or {}
+        self.files = {}   # 입력 PDF → 대기/처리 시간 기록
+        self.started_at = None
+
+    @classmethod
+    def from_config(cls, config_manager):
+        return cls(
+            policy=config_manager.get_setting('schedule_policy', 'sjf'),
+            split_pages=config_manager.get_setting('schedule_split_pages', 200),
+            priorities=config_manager.get_setting('schedule_priorities', {}),
+        )
+
+    def priority_of(self, path):
+        name = os.path.basename(path)
+        matched = [p for pattern, p in self.priorities.items() if fnmatch.fnmatch(name, pattern)]
+        return max(matched) if matched else 0
+
+    def plan(self, input_pdfs):
+        """입력 파일 목록 → 처리할 WorkUnit 순서"""
+        files = []
+        for order, path in enumerate(input_pdfs):
+            pages = read_page_count(path)
+            if self.policy == 'sjf':
+                key = (pages, order)
+            elif self.policy == 'priority':
+                key = (-self.priority_of(path), pages, order)
+            else:
+                key = (order,)
+            files.append((key, path, pages))
+        files.sort(key=lambda f: f[0])
+
+        # 파일별 단위 목록
+        queues = []
+        for key, path, pages in files:
+            if self.split_pages and pages > self.split_pages:
+                ranges = [(s, min(s + self.split_pages - 1, pages))
+                          for s in range(1, pages + 1, self.split_pages)]
+                units = [WorkUnit(path, e - s + 1, s, e, part=n + 1, parts=len(ranges), ranges=ranges)
+                         for n, (s, e) in enumerate(ranges)]
+            else:
+                units = [WorkUnit(path, pages)]
+            # 우선순위 정책에서는 높은 우선순위 파일끼리만 번갈아 처리
+            level = key[0] if self.policy == 'priority' else 0
+            queues.append({'level': level, 'units': units, 'assigned': 0})
+
+        # 같은 등급에서 배정된 페이지가 가장 적은 파일의 다음 단위 선택 (같으면 정책 순서)
+        ordered = []
+        while True:
+            remaining = [q for q in queues if q['units']]
+            if not remaining:
+                break
+            top = min(q['level'] for q in remaining)
+            q = min((q for q in remaining if q['level'] == top), key=lambda q: q['assigned'])
+            unit = q['units'].pop(0)
+            q['assigned'] += unit.pages
+            ordered.append(unit)
+
+        self.started_at = time.time()
+        self.files = {path: {'pages': pages, 'first_start': None, 'finished': None, 'busy': 0.0, 'ok': None}
+                      for _, path, pages in files}
+        return ordered
+
+    def unit_started(self, unit):
+        record = self.files[unit.input_pdf]
+        if record['first_start'] is None:
+            record['first_start'] = time.time()
+        unit._started = time.perf_counter()
+
+    def unit_finished(self, unit, ok=True):
+        record = self.files[unit.input_pdf]
+        record['busy'] += time.perf_counter() - getattr(unit, '_started', time.perf_counter())
+        if not ok or unit.finish:
+            record['finished'] = time.time()
+            record['ok'] = ok
+
+    def report(self):
+        """파일별 {'pages', 'wait_s'(시작까지 대기), 'turnaround_s'(요청~완료), 'processing_s', 'ok'}"""
+        result = {}
+        for path, r in self.files.items():
+            if r['first_start'] is None:
+                continue
+            end = r['finished'] or time.time()
+            result[path] = {
+                'pages': r['pages'],
+                'wait_s': round(r['first_start'] - self.started_at, 2),
+                'turnaround_s': round(end - self.started_at, 2),
+                'processing_s': round(r['busy'], 2),
+                'ok': r['ok'],
+            }
+        return result
+
+    def format_report(self):
+        lines = []
+        for path, r in self.report().items():
+            state = {True: '완료', False: '실패', None: '중단'}[r['ok']]
+            lines.append(f"{os.path.basename(path)}: {r['pages']}쪽, 대기 {r['wait_s']:.1f}s, "
+                         f"처리 {r['processing_s']:.1f}s, 완료까지 {r['turnaround_s']:.1f}s ({state})")
+        return lines
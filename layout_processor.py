@@ -0,0 +1,187 @@
+"""
+레이아웃 처리 모듈
+EasyOCR 박스를 읽기 순서의 줄/문단 단위로 묶기
+"""
+import numpy as np
+from block_table import BoxTable
+
+
+class LayoutProcessor:
+    # 같은 줄로 판정할 최소 세로 겹침 비율 (작은 박스 높이 기준)
+    LINE_OVERLAP_RATIO = 0.5
+    # 같은 줄 안에서 허용하는 최대 가로 간격 (줄 높이의 배수)
+    WORD_GAP_FACTOR = 2.5
+    # 같은 문단으로 묶을 최대 줄 간격 (줄 높이의 배수)
+    PARAGRAPH_GAP_FACTOR = 0.8
+    # 같은 문단으로 묶을 최대 글자 크기 비율
+    PARAGRAPH_FONT_RATIO = 1.5
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+
+    def group_page(self, boxes, img_w, img_h):
+        """
+        한 페이지의 박스를 설정된 레이아웃 단위로 묶습니다.
+        boxes는 BoxTable 또는 preprocess_pdf가 만드는 블록 형식(상대좌표 dict) 목록이며,
+        반환되는 블록은 같은 형식에 원본 박스 목록('boxes')이 추가됩니다.
+        page/id는 호출하는 쪽에서 지정합니다.
+        """
+        table = boxes if isinstance(boxes, BoxTable) else BoxTable.from_blocks(boxes, img_w, img_h)
+        mode = self.config.get_setting('layout_mode', 'none')
+        if mode == 'none' or not len(table):
+            return table.to_dicts()
+
+        lines = self._group_lines(table)
+        if mode == 'paragraph':
+            groups = self._group_paragraphs(lines)
+        else:
+            groups = lines
+
+        # 원본 박스 기록용 상대좌표/신뢰도 열을 한 번에 계산
+        columns = (table.texts, table.data['confidence'].tolist(), table.relative().tolist())
+        return [self._merge_group(group, columns, img_w, img_h) for group in groups]
+
+    def reading_order(self, blocks):
+        """
+        한 페이지 블록(상대좌표 dict) 목록의 읽기 순서 인덱스 (교정 배치 구성용).
+        line/paragraph 모드로 묶인 블록('boxes'가 있는 블록)은 이미 읽기 순서이므로 그대로 두고,
+        박스 단위(none) 블록은 group_page와 같은 줄 묶기로 위→아래, 왼쪽→오른쪽 순서를 정합니다.
+        (상대좌표를 그대로 쓰므로 페이지 가로/세로 비율은 단어 간격 판정에만 영향)
+        """
+        if not blocks or any('boxes' in b for b in blocks):
+            return list(range(len(blocks)))
+        table = BoxTable.from_blocks(blocks, 1.0, 1.0)
+        return [box for line in self._group_lines(table) for _, box in line[4]]
+
+    def _group_lines(self, table):
+        """
+        세로 중심 기준 정렬 후 한 번 훑으며(sweep) 박스를 줄로 묶습니다.
+        현재 박스의 중심보다 위에서 끝난 줄은 더 이상 박스를 받을 수 없으므로
+        활성 목록에서 제외해 비교 횟수를 줄입니다.
+        """
+        rects = table.rects()
+        order = np.argsort((rects[:, 1] + rects[:, 3]) / 2, kind='stable')
+        rect_list = rects.tolist()
+
+        lines = []   # [x0, y0, x1, y1, [(rect, 박스 번호), ...]]
+        active = []
+        for box in order.tolist():
+            rect = rect_list[box]
+            x0, y0, x1, y1 = rect
+            cy = (y0 + y1) / 2
+            h = max(y1 - y0, 1e-6)
+            active = [line for line in active if line[3] >= cy]
+
+            best = None
+            best_overlap = 0.0
+            for line in active:
+                overlap = min(y1, line[3]) - max(y0, line[1])
+                line_h = max(line[3] - line[1], 1e-6)
+                ratio = overlap / min(h, line_h)
+                if ratio < self.LINE_OVERLAP_RATIO:
+                    continue
+                gap = max(line[0] - x1, x0 - line[2], 0)
+                if gap > self.WORD_GAP_FACTOR * max(h, line_h):
+                    continue
+                if ratio > best_overlap:
+                    best, best_overlap = line, ratio
+
+            if best is None:
+                best = [x0, y0, x1, y1, []]
+                lines.append(best)
+                active.append(best)
+            else:
+                best[0] = min(best[0], x0)
+                best[1] = min(best[1], y0)
+                best[2] = max(best[2], x1)
+                best[3] = max(best[3], y1)
+            best[4].append((rect, box))
+
+        # 줄 안에서는 왼쪽→오른쪽, 줄 사이는 위→아래 순서
+        for line in lines:
+            line[4].sort(key=lambda it: it[0][0])
+        lines.sort(key=lambda line: (line[1], line[0]))
+        return lines
+
+    def _group_paragraphs(self, lines):
+        """줄 간격과 가로 겹침을 기준으로 연속된 줄을 문단으로 묶습니다."""
+        paragraphs = []  # [x0, y0, x1, y1, last_line_h, [line, ...]]
+        active = []
+        for line in lines:
+            x0, y0, x1, y1, _ = line
+            h = max(y1 - y0, 1e-6)
+
+            target = None
+            for para in active:
+                last_h = para[4]
+                gap = y0 - para[3]
+                if gap > self.PARAGRAPH_GAP_FACTOR * max(h, last_h):
+                    continue
+                if min(x1, para[2]) - max(x0, para[0]) <= 0:
+                    continue
+                if max(h, last_h) / min(h, last_h) > self.PARAGRAPH_FONT_RATIO:
+                    continue
+                target = para
+                break
+
+            if target is None:
+                target = [x0, y0, x1, y1, h, []]
+                paragraphs.append(target)
+                active.append(target)
+            else:
+                target[0] = min(target[0], x0)
+                target[2] = max(target[2], x1)
+                target[3] = max(target[3], y1)
+                target[4] = h
+            target[5].append(line)
+
+            # 현재 줄보다 충분히 위에서 끝난 문단은 더 이상 확장되지 않음
+            active = [p for p in active
+                      if y0 - p[3] <= self.PARAGRAPH_GAP_FACTOR * max(h, p[4])]
+
+        # 문단을 줄 형식([x0, y0, x1, y1, items])으로 평탄화
+        result = []
+        for para in paragraphs:
+            items = [it for line in para[5] for it in line[4]]
+            merged = [para[0], para[1], para[2], para[3], items]
+            merged.append(len(para[5]))
+            result.append(merged)
+        return result
+
+    def _merge_group(self, group, columns, img_w, img_h):
+        """
+        묶인 박스들을 하나의 블록으로 합칩니다 (원본 박스 좌표 보존).
+        columns: 박스 번호로 찾는 (텍스트, 신뢰도, 상대좌표) 열
+        """
+        x0, y0, x1, y1, items = group[:5]
+        line_count = group[5] if len(group) > 5 else 1
+        all_texts, all_confs, all_rel = columns
+
+        texts = [all_texts[box] for _, box in items]
+        confs = [all_confs[box] for _, box in items]
+        heights = sorted(rect[3] - rect[1] for rect, _ in items)
+
+        block = {
+            'text_raw': ' '.join(texts),
+            'confidence': sum(confs) / len(confs),
+            'x_rel': x0 / img_w,
+            'y_rel': y0 / img_h,
+            'w_rel': (x1 - x0) / img_w,
+            'h_rel': (y1 - y0) / img_h,
+            # 줄 단위 글자 크기: 박스 높이의 중앙값
+            'font_size': heights[len(heights) // 2],
+            'boxes': [
+                {
+                    'text_raw': all_texts[box],
+                    'confidence': all_confs[box],
+                    'x_rel': all_rel[box][0],
+                    'y_rel': all_rel[box][1],
+                    'w_rel': all_rel[box][2],
+                    'h_rel': all_rel[box][3],
+                }
+                for _, box in items
+            ],
+        }
+        if line_count > 1:
+            block['lines'] = line_count
+        return block
@@ -0,0 +1,156 @@
+"""
+LLM 클라이언트 모듈
+교정 단계에서 재사용하는 OpenAI 호환 HTTP 클라이언트와 요청별 지연 시간 통계
+
+클라이언트는 (API 키, 기본 URL)마다 한 번 만들어 연결 풀(keep-alive)을 유지하고,
+모든 요청에 연결/응답 시간 제한을 적용합니다.
+
+설정:
+  api_base_url             OpenAI 호환 서버 주소 (비우면 OPENAI_BASE_URL 환경 변수 또는 OpenAI 기본값)
+  timeout_seconds          응답(읽기/쓰기) 시간 제한
+  api_connect_timeout      연결 시간 제한
+  api_max_connections      동시 연결 수 상한
+  api_keepalive_seconds    유휴 연결 유지 시간
+  api_http2                HTTP/2 사용 (h2 패키지 필요, 없으면 HTTP/1.1)
+"""
+import time
+import threading
+from collections import deque
+import httpx
+import openai
+
+
+def build_client(config_manager, api_key, base_url=None):
+    """설정의 연결 풀/시간 제한을 적용한 OpenAI 클라이언트 생성"""
+    read_timeout = config_manager.get_setting('timeout_seconds', 60)
+    timeout = httpx.Timeout(read_timeout, connect=config_manager.get_setting('api_connect_timeout', 10))
+    max_connections = config_manager.get_setting('api_max_connections', 10)
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=config_manager.get_setting('api_keepalive_seconds', 60),
+    )
+    http2 = config_manager.get_setting('api_http2', False)
+    try:
+        http_client = httpx.Client(limits=limits, timeout=timeout, http2=http2)
+    except ImportError:
+        # http2=True인데 h2 패키지가 없는 경우
+        print("HTTP/2를 사용하려면 h2 패키지가 필요합니다 (pip install httpx[http2]). HTTP/1.1로 연결합니다.")
+        http_client = httpx.Client(limits=limits, timeout=timeout)
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url or config_manager.get_setting('api_base_url', '') or None,
+        timeout=timeout,
+        http_client=http_client,
+    )
+
+
+class ClientPool:
+    """(API 키, 기본 URL)별로 클라이언트를 재사용. 취소 등으로 닫힌 클라이언트는 다시 생성"""
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key, base_url=None):
+        key = (api_key, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed():
+                client = build_client(self.config, api_key, base_url)
+                self._clients[key] = client
+            return client
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+class LatencyStats:
+    """요청별 지연 시간/오류/토큰 누적 (최근 max_samples개의 지연 시간으로 백분위 계산)"""
+
+    def __init__(self, max_samples=1000):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=max_samples)
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds, ok=True, tokens=0):
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+            self.tokens += tokens or 0
+
+    def summary(self):
+        """{'requests', 'errors', 'tokens', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'}"""
+        return combined_summary([self])
+
+    def format(self):
+        s = self.summary()
+        if not s['requests']:
+            return "API 요청 없음"
+        return (f"API 요청 {s['requests']}회 (오류 {s['errors']}회), 평균 {s['mean_ms']:.0f}ms, "
+                f"p50 {s['p50_ms']:.0f}ms, p95 {s['p95_ms']:.0f}ms, 최대 {s['max_ms']:.0f}ms")
+
+    def merge(self, other):
+        with other._lock:
+            latencies = list(other.latencies)
+            counts = (other.requests, other.errors, other.tokens, other.total_seconds)
+        with self._lock:
+            self.latencies.extend(latencies)
+            self.requests += counts[0]
+            self.errors += counts[1]
+            self.tokens += counts[2]
+            self.total_seconds += counts[3]
+
+
+def combined_summary(stats_list):
+    """여러 LatencyStats(워커별 등)를 합친 요약"""
+    latencies = []
+    requests = errors = tokens = 0
+    total_seconds = 0.0
+    for stats in stats_list:
+        with stats._lock:
+            latencies.extend(stats.latencies)
+            requests += stats.requests
+            errors += stats.errors
+            tokens += stats.tokens
+            total_seconds += stats.total_seconds
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'tokens': tokens,
+        'mean_ms': round(total_seconds / requests * 1000, 1) if requests else None,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'max_ms': round(latencies[-1] * 1000, 1) if latencies else None,
+    }
+
+
+def timed_request(stats, func, *args, **kwargs):
+    """func(요청)를 실행하며 지연 시간/성공 여부/토큰 수를 stats에 기록"""
+    start = time.perf_counter()
+    try:
+        resp = func(*args, **kwargs)
+    except BaseException:
+        stats.record(time.perf_counter() - start, ok=False)
+        raise
+    usage = getattr(resp, 'usage', None)
+    stats.record(time.perf_counter() - start, tokens=getattr(usage, 'total_tokens', 0))
+    return resp
@@ -4,118 +4,319 @@ EasyOCR을 사용한 PDF 텍스트 추출 및 전처리
 """
 import os
 import json
-import io
 import numpy as np
 import fitz
 from PIL import Image
 import easyocr
 from tqdm import tqdm
+from layout_processor import LayoutProcessor
+from block_table import BoxTable
+from document_cache import shared_cache
+from page_store import PageResultStore, page_fingerprint, settings_key
+from image_preprocessor import ImagePreprocessor
+from page_image_cache import PageImageCache, file_sha256, render_page
+from profiler import profile_stage
 
 
 class OCRProcessor:
     def __init__(self, config_manager):
         self.config = config_manager
         self.reader = None
+        self.layout = LayoutProcessor(config_manager)
+        self.page_store = None
+        self.page_cache = None
         
     def initialize_reader(self):
-        """EasyOCR 리더 초기화"""
+        """
+        EasyOCR 리더 초기화.
+        ocr_device: 'auto'(CUDA 가능 시 GPU) / 'cuda' / 'cpu'
+        CPU에서는 torch 스레드 수(torch_threads, 0이면 기본값)를 지정해 여러 워커 프로세스가
+        코어를 과다 점유하지 않도록 하고, ocr_quantize가 켜져 있으면 EasyOCR이
+        검출/인식 모델에 동적 int8 양자화를 적용합니다.
+        """
         if self.reader is None:
-            self.reader = easyocr.Reader(['ko', 'en'], gpu=True)
+            import torch
+
+            device = self.config.get_setting('ocr_device', 'auto')
+            use_gpu = device == 'cuda' or (device == 'auto' and torch.cuda.is_available())
+            if not use_gpu:
+                threads = self.config.get_setting('torch_threads', 0)
+                if threads:
+                    torch.set_num_threads(threads)
+                    try:
+                        torch.set_num_interop_threads(1)
+                    except RuntimeError:
+                        # 이미 병렬 작업이 시작된 뒤에는 변경 불가
+                        pass
+            self.reader = easyocr.Reader(
+                ['ko', 'en'], gpu=use_gpu,
+                quantize=self.config.get_setting('ocr_quantize', True)
+            )
     
-    def preprocess_pdf(self, input_pdf, json_path, start_page, end_page, progress_callback=None):
+    def get_page_store(self):
+        """중복 페이지 결과 저장소 (page_store_enabled 설정 시에만 생성)"""
+        if self.page_store is None:
+            self.page_store = PageResultStore.from_config(self.config)
+        return self.page_store
+
+    def get_page_cache(self):
+        """렌더링된 페이지 이미지 캐시 (page_cache_enabled 설정 시에만 생성)"""
+        if self.page_cache is None:
+            self.page_cache = PageImageCache.from_config(self.config)
+        return self.page_cache
+
+    @profile_stage('ocr')
+    def preprocess_pdf(self, input_pdf, json_path, start_page, end_page, progress_callback=None,
+                       cancel_token=None, log_callback=None):
         """
         EasyOCR을 사용해 PDF 전체 페이지를 이미지로 변환한 뒤
         텍스트 박스와 내용을 추출하여 상대좌표 리스트로 저장합니다.
         start_page, end_page가 None인 경우 전체 페이지를 처리합니다.
+        cancel_token이 취소되면 페이지 단위로 중단하고, 완료된 페이지는
+        체크포인트(json_path + '.partial')에 남겨 다음 실행에서 이어서 처리합니다.
+        빈 페이지는 OCR 없이 'blank' 표시 블록 하나로 기록합니다.
         """
         dpi = self.config.get_setting('dpi', 300)
+        skip_blank = self.config.get_setting('skip_blank_pages', True)
+        blank_pages = 0
+        skipped_pages = 0
+        reused_pages = 0
+        cached_pages = 0
+        page_store = self.get_page_store()
+        store_key = settings_key(self.config)
+        preprocessor = None
+        if self.config.get_setting('preprocess_enabled', False):
+            preprocessor = ImagePreprocessor(self.config)
         
-        # PDF 문서 열기
-        doc = fitz.open(input_pdf)
-        
-        # 페이지 범위 설정
-        if start_page is None and end_page is None:
-            # 전체 페이지
-            start_idx = 0
-            end_idx = len(doc) - 1
-        else:
-            # 특정 페이지 범위 (1-based → 0-based 변환)
-            start_idx = (start_page - 1) if start_page else 0
-            end_idx = (end_page - 1) if end_page else (len(doc) - 1)
-        
-        # 1) PDF → 이미지 변환 (PyMuPDF 사용)
-        images = []
-        page_numbers = []
-        
-        for page_idx in range(start_idx, end_idx + 1):
-            page = doc[page_idx]
-            # DPI를 매트릭스로 변환 (72 DPI 기준)
-            mat = fitz.Matrix(dpi / 72.0, dpi / 72.0)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("ppm")
-            img = Image.open(io.BytesIO(img_data))
-            images.append(img)
-            page_numbers.append(page_idx + 1)  # 1-based 페이지 번호
+        # 렌더링 결과 캐시는 PDF 내용 해시로 식별 (설정만 바꿔 다시 실행할 때 재사용)
+        page_cache = self.get_page_cache()
+        pdf_hash = file_sha256(input_pdf) if page_cache else None
+
+        # PDF 문서 열기 (완료 판정/오버레이 단계와 핸들 공유)
+        with shared_cache(self.config).document(input_pdf) as doc:
         
-        doc.close()
+            # 페이지 범위 설정
+            if start_page is None and end_page is None:
+                # 전체 페이지
+                start_idx = 0
+                end_idx = len(doc) - 1
+            else:
+                # 특정 페이지 범위 (1-based → 0-based 변환)
+                start_idx = (start_page - 1) if start_page else 0
+                end_idx = (end_page - 1) if end_page else (len(doc) - 1)
         
-        # 2) EasyOCR reader 초기화 (한글+영어)
-        self.initialize_reader()
-
-        blocks = []
-        id_counter = 0
-        total_pages = len(images)
-
-        # 3) 페이지별로 OCR 수행
-        for idx, (page_num, img) in enumerate(zip(page_numbers, images)):
-            if progress_callback:
-                if end_page is not None:
-                    progress_callback(f"OCR 처리 중... 페이지 {page_num}/{end_page}", 
-                                    (idx + 1) / total_pages * 100)
-                else:
-                    progress_callback(f"OCR 처리 중... 페이지 {page_num}/{total_pages}", 
-                                    (idx + 1) / total_pages * 100)
-            
-            img_w, img_h = img.size
-            # PIL 이미지를 NumPy 배열로 변환
-            arr = np.array(img.convert('RGB'))
-
-            # readtext → [(bbox, text, confidence), ...]
-            results = self.reader.readtext(arr)
-
-            for bbox, text, conf in results:
-                # bbox: [ [x1,y1], [x2,y2], [x3,y3], [x4,y4] ]
-                xs = [pt[0] for pt in bbox]
-                ys = [pt[1] for pt in bbox]
-                x_min, x_max = min(xs), max(xs)
-                y_min, y_max = min(ys), max(ys)
-
-                blocks.append({
-                    'page': page_num,
-                    'id': id_counter,
-                    'text_raw': text,
-                    'confidence': conf,
-                    # 상대좌표 (0~1)
-                    'x_rel': x_min / img_w,
-                    'y_rel': y_min / img_h,
-                    'w_rel': (x_max - x_min) / img_w,
-                    'h_rel': (y_max - y_min) / img_h,
-                    # baseline font size approximation
-                    'font_size': (y_max - y_min)
+            page_numbers = [page_idx + 1 for page_idx in range(start_idx, end_idx + 1)]  # 1-based
+            total_pages = len(page_numbers)
+
+            # 이전에 중단된 실행의 체크포인트가 있으면 완료된 페이지를 재사용
+            partial_path = json_path + '.partial'
+            blocks, pages_done = self._load_checkpoint(partial_path, page_numbers)
+            id_counter = max((b['id'] for b in blocks), default=-1) + 1
+
+            # EasyOCR reader 초기화 (한글+영어)
+            self.initialize_reader()
+
+            try:
+                # 페이지별로 이미지 변환 + OCR 수행
+                for idx, page_num in enumerate(page_numbers):
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
+                    if page_num in pages_done:
+                        continue
+
+                    if progress_callback:
+                        if end_page is not None:
+                            progress_callback(f"OCR 처리 중... 페이지 {page_num}/{end_page}", 
+                                            (idx + 1) / total_pages * 100)
+                        else:
+                            progress_callback(f"OCR 처리 중... 페이지 {page_num}/{total_pages}", 
+                                            (idx + 1) / total_pages * 100)
+
+                    page = doc[page_num - 1]
+
+                    # 저해상도 썸네일로 빈 페이지를 먼저 걸러 고해상도 변환/OCR 생략
+                    if skip_blank and self.is_blank_page(page):
+                        blocks.append(self._blank_block(page_num, id_counter))
+                        id_counter += 1
+                        blank_pages += 1
+                        skipped_pages += 1
+                        pages_done.add(page_num)
+                        continue
+
+                    # PDF → RGB 배열 변환 (PyMuPDF 사용, 캐시가 있으면 메모리 맵으로 읽기)
+                    if page_cache:
+                        arr, cache_hit = page_cache.get_or_render(page, pdf_hash, dpi)
+                        cached_pages += cache_hit
+                    else:
+                        arr = render_page(page, dpi)
+
+                    img_h, img_w = arr.shape[:2]
+
+                    # 이전에 처리한 것과 거의 같은 페이지면 저장된 블록 재사용
+                    fingerprint = None
+                    if page_store:
+                        fingerprint = page_fingerprint(Image.fromarray(arr))
+                        hit = page_store.lookup(fingerprint, store_key)
+                        if hit:
+                            stored_key, page_blocks = hit
+                            for block in page_blocks:
+                                blocks.append({'page': page_num, 'id': id_counter, **block,
+                                               'page_hash': stored_key})
+                                id_counter += 1
+                            reused_pages += 1
+                            pages_done.add(page_num)
+                            continue
+
+                    # 선택적 전처리 (회색조/잡음 제거/이진화/기울기 보정)
+                    transform = None
+                    if preprocessor:
+                        arr, transform = preprocessor.process(arr)
+
+                    # readtext → [(bbox, text, confidence), ...]
+                    results = self.reader.readtext(
+                        arr, batch_size=self.config.get_setting('ocr_batch_size', 1)
+                    )
+
+                    # 페이지의 모든 사각형(bbox 꼭짓점 4개)을 한 번에 좌표 범위로 변환
+                    # (기울기 보정을 했으면 원본 페이지 좌표로 되돌린 뒤 계산)
+                    page_boxes = BoxTable.from_readtext(
+                        results, img_w, img_h,
+                        map_points=(lambda quads, t=transform: preprocessor.map_points(quads, t))
+                        if transform is not None else None
+                    )
+
+                    # 박스를 읽기 순서의 줄/문단 단위로 묶기 (layout_mode 설정)
+                    page_blocks = self.layout.group_page(page_boxes, img_w, img_h)
+                    extra = {}
+                    if page_store and page_blocks:
+                        page_store.put(fingerprint, store_key, page_blocks)
+                        extra = {'page_hash': fingerprint[0]}
+                    for block in page_blocks:
+                        blocks.append({'page': page_num, 'id': id_counter, **block, **extra})
+                        id_counter += 1
+                    # 인식된 텍스트가 없는 페이지도 완료 판정에서 누락으로 보지 않도록 표시
+                    if not len(page_boxes):
+                        blocks.append(self._blank_block(page_num, id_counter))
+                        id_counter += 1
+                        blank_pages += 1
+                    pages_done.add(page_num)
+            except BaseException:
+                # 중단(취소/오류) 시 완료된 페이지까지 체크포인트 저장
+                self._write_json(partial_path, {
+                    'settings': settings_key(self.config),
+                    'pages_done': sorted(pages_done),
+                    'blocks': blocks,
                 })
-                id_counter += 1
+                raise
 
-        # 4) JSON 파일로 저장
+        # 페이지 순서대로 정렬 (체크포인트 재사용 시 순서 보정)
+        blocks.sort(key=lambda b: (b['page'], b['id']))
+
+        # JSON 파일로 저장
+        self._write_json(json_path, blocks)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        if preprocessor and preprocessor.timings:
+            timing_msg = "전처리 단계별 시간: " + ", ".join(
+                f"{step} {seconds:.2f}s" for step, seconds in preprocessor.timings.items()
+            )
+            if log_callback:
+                log_callback(timing_msg)
+            else:
+                print(timing_msg)
+
+        self.last_blank_pages = blank_pages
+        self.last_skipped_pages = skipped_pages
+        self.last_reused_pages = reused_pages
+        self.last_cached_pages = cached_pages
+        if cached_pages:
+            cache_msg = f"페이지 이미지 {cached_pages}개를 캐시에서 읽었습니다."
+            if log_callback:
+                log_callback(cache_msg)
+            else:
+                print(cache_msg)
+        if reused_pages:
+            reuse_msg = f"중복 페이지 {reused_pages}개는 저장된 OCR 결과를 재사용했습니다."
+            if log_callback:
+                log_callback(reuse_msg)
+            else:
+                print(reuse_msg)
+        if blank_pages:
+            blank_msg = f"빈 페이지 {blank_pages}개 기록 (OCR 생략 {skipped_pages}개)"
+            if log_callback:
+                log_callback(blank_msg)
+            else:
+                print(blank_msg)
+
+        if progress_callback:
+            progress_callback("OCR 처리 완료", 100)
+        
+        return blocks
+
+    def is_blank_page(self, page):
+        """
+        저해상도 회색조 썸네일의 잉크 비율로 빈 페이지 여부를 판정합니다.
+        스캔 가장자리의 그림자/펀치 구멍을 무시하도록 테두리 5%는 제외하고,
+        배경(중앙값)과 밝기가 충분히 다른 픽셀을 잉크로 셉니다
+        (어두운 배경의 밝은 글자, 반전/진하게 스캔된 페이지도 잉크로 인식).
+        """
+        check_dpi = self.config.get_setting('blank_check_dpi', 36)
+        max_ink_ratio = self.config.get_setting('blank_ink_ratio', 0.0003)
+
+        zoom = check_dpi / 72.0
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        if pix.width < 4 or pix.height < 4:
+            return False
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+
+        my, mx = max(1, pix.height // 20), max(1, pix.width // 20)
+        inner = gray[my:-my, mx:-mx]
+        background = np.median(inner)
+        ink_ratio = np.count_nonzero(np.abs(inner.astype(np.int16) - int(background)) > 40) / inner.size
+        return bool(ink_ratio <= max_ink_ratio)
+
+    def _blank_block(self, page_num, block_id):
+        """빈 페이지 표시 블록 (교정/오버레이 단계에서 건너뜀)"""
+        return {
+            'page': page_num,
+            'id': block_id,
+            'blank': True,
+            'text_raw': '',
+            'confidence': 1.0,
+            'x_rel': 0.0,
+            'y_rel': 0.0,
+            'w_rel': 0.0,
+            'h_rel': 0.0,
+            'font_size': 0
+        }
+
+    def _load_checkpoint(self, partial_path, page_numbers):
+        """중단된 OCR 체크포인트 로드. 설정이 다르면 무시합니다."""
+        try:
+            if not os.path.exists(partial_path):
+                return [], set()
+            with open(partial_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('settings') != settings_key(self.config):
+                return [], set()
+            wanted = set(page_numbers)
+            pages_done = set(data.get('pages_done', [])) & wanted
+            blocks = [b for b in data.get('blocks', []) if b.get('page') in pages_done]
+            return blocks, pages_done
+        except Exception as e:
+            print(f"OCR 체크포인트 로드 오류: {e}")
+            return [], set()
+
+    def _write_json(self, path, data):
+        """임시 파일에 쓴 뒤 교체하여 중단 시에도 깨지지 않게 저장"""
         def np_default(o):
             # numpy scalar 타입이면 .item()으로 파이썬 스칼라 추출
             if isinstance(o, np.generic):
                 return o.item()
             raise TypeError
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(blocks, f, ensure_ascii=False, indent=2, default=np_default)
 
-        if progress_callback:
-            progress_callback("OCR 처리 완료", 100)
-        
-        return blocks
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=np_default)
+        os.replace(tmp_path, path)
@@ -0,0 +1,581 @@
+"""
+로컬 작업 서비스 모듈
+EasyOCR 모델을 미리 로드한 워커를 상주시키고, PDF 작업을 영속 큐(SQLite)로 받아
+OCR → 교정 → 오버레이를 처리합니다. localhost HTTP 또는 Unix 소켓으로 작업 등록/상태/지표를 제공.
+
+HTTP API (JSON):
+  POST /jobs                {"input_pdf": 경로, "output_folder"?, "start_page"?, "end_page"?} → 작업
+  GET  /jobs[?status=...]   작업 목록
+  GET  /jobs/<id>           작업 상태 (단계, 진행률, 단계별 소요 시간)
+  POST /jobs/<id>/cancel    작업 취소
+  GET  /metrics             처리량/대기열 지표
+  GET  /health              워커 준비 상태
+
+사용 예:
+  python ocr_service.py serve --port 8765 --workers 1
+  python ocr_service.py submit input.pdf --output-folder out
+  python ocr_service.py status 3
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import socketserver
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config_manager import ConfigManager
+from cancellation import CancellationToken, OperationCancelled
+from pipeline import STAGES, run_document
+from document_cache import shared_cache
+
+DEFAULT_PORT = 8765
+
+
+class JobStore:
+    """작업 큐 (서비스를 다시 시작해도 남아 있도록 SQLite에 저장)"""
+
+    COLUMNS = ('id', 'input_pdf', 'output_folder', 'start_page', 'end_page', 'status', 'stage',
+               'progress', 'message', 'error', 'result', 'submitted_at', 'started_at', 'finished_at')
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                input_pdf TEXT NOT NULL,
+                output_folder TEXT NOT NULL,
+                start_page INTEGER,
+                end_page INTEGER,
+                status TEXT NOT NULL DEFAULT 'queued',
+                stage TEXT,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                error TEXT,
+                result TEXT,
+                submitted_at REAL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)")
+        self._conn.commit()
+
+    def submit(self, input_pdf, output_folder, start_page=None, end_page=None):
+        with self._lock:
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (input_pdf, output_folder, start_page, end_page, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (input_pdf, output_folder, start_page, end_page, time.time())
+            ).lastrowid
+            self._conn.commit()
+        return self.get(job_id)
+
+    def claim(self):
+        """가장 먼저 등록된 대기 작업을 실행 중으로 바꿔 반환 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, error = NULL WHERE id = ?",
+                (time.time(), row[0])
+            )
+            self._conn.commit()
+        return self.get(row[0])
+
+    def update(self, job_id, **fields):
+        if 'result' in fields and fields['result'] is not None:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def cancel_queued(self, job_id):
+        """대기 중인 작업을 취소. 취소했으면 True"""
+        with self._lock:
+            changed = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            ).rowcount
+            self._conn.commit()
+        return bool(changed)
+
+    def requeue_interrupted(self):
+        """이전 실행에서 처리 중이던 작업을 다시 대기열로 (단계별 체크포인트에서 이어서 처리)"""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', message = '서비스 재시작으로 다시 대기' "
+                "WHERE status = 'running'"
+            ).rowcount
+            self._conn.commit()
+        return count
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status=None, limit=100):
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def active_inputs(self):
+        """대기 중이거나 실행 중인 작업의 입력 PDF 경로 집합"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT input_pdf FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def count_by_status(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def _to_dict(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        if job['result']:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class OCRService:
+    def __init__(self, config_manager, db_path='service_jobs.sqlite3', workers=1, api_key=None):
+        self.config = config_manager
+        self.jobs = JobStore(db_path)
+        self.worker_count = max(1, workers)
+        self.api_key = api_key or config_manager.get_setting('api_key', '')
+        self.started_at = time.time()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._running = {}        # 작업 ID → 취소 토큰
+        self._live = {}           # 작업 ID → 실시간 진행 상황
+        self._lock = threading.Lock()
+        self.ready_workers = 0
+        self.model_load_seconds = []
+        self._api_processors = []  # 워커별 APIProcessor (교정 요청 지연 시간 집계용)
+        self.metrics_data = {
+            'jobs_done': 0, 'jobs_failed': 0, 'jobs_cancelled': 0, 'pages_done': 0,
+            'stages': {stage: {'seconds': 0.0, 'pages': 0, 'runs': 0} for stage in STAGES},
+        }
+
+    def start(self):
+        requeued = self.jobs.requeue_interrupted()
+        if requeued:
+            print(f"중단되었던 작업 {requeued}개를 다시 대기열에 넣었습니다.")
+        for n in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, args=(n,), name=f"ocr-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        새 작업을 받지 않고, 실행 중인 작업은 취소 후 대기열로 되돌림.
+        timeout 안에 끝나지 않은 워커가 있으면 작업 저장소를 닫지 않고 False를 반환합니다
+        (워커가 작업 상태를 기록하는 도중 연결이 닫히지 않도록).
+        """
+        self._stopping.set()
+        with self._lock:
+            tokens = list(self._running.values())
+        for token in tokens:
+            token.cancel()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        alive = [thread.name for thread in self._threads if thread.is_alive()]
+        if alive:
+            print(f"종료되지 않은 워커가 있어 작업 저장소를 닫지 않습니다: {', '.join(alive)}")
+            return False
+        self.jobs.close()
+        return True
+
+    def submit(self, input_pdf, output_folder=None, start_page=None, end_page=None):
+        input_pdf = os.path.abspath(input_pdf)
+        if not os.path.isfile(input_pdf):
+            raise ValueError(f"입력 PDF를 찾을 수 없습니다: {input_pdf}")
+        output_folder = os.path.abspath(
+            output_folder or self.config.get_setting('output_folder', '') or os.path.dirname(input_pdf)
+        )
+        job = self.jobs.submit(input_pdf, output_folder, start_page, end_page)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def cancel(self, job_id):
+        """대기 중이면 바로 취소, 실행 중이면 취소 토큰으로 중단. 취소 요청이 반영되면 True"""
+        if self.jobs.cancel_queued(job_id):
+            return True
+        with self._lock:
+            token = self._running.get(job_id)
+        if token:
+            token.cancel()
+            return True
+        return False
+
+    def job_status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            with self._lock:
+                live = self._live.get(job_id)
+            if live:
+                job.update(live)
+        return job
+
+    def metrics(self):
+        from llm_client import combined_summary
+        with self._lock:
+            data = json.loads(json.dumps(self.metrics_data))
+            running = len(self._running)
+            api_stats = [api.request_stats for api in self._api_processors]
+        for stats in data['stages'].values():
+            stats['pages_per_s'] = round(stats['pages'] / stats['seconds'], 3) if stats['seconds'] else None
+            stats['seconds'] = round(stats['seconds'], 3)
+        counts = self.jobs.count_by_status()
+        data.update({
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'workers': self.worker_count,
+            'ready_workers': self.ready_workers,
+            'model_load_s': [round(s, 2) for s in self.model_load_seconds],
+            'queued': counts.get('queued', 0),
+            'running': running,
+            'jobs_by_status': counts,
+            'api_requests': combined_summary(api_stats),
+        })
+        return data
+
+    def _worker_loop(self, worker_index):
+        # 워커마다 전용 프로세서와 미리 로드한 EasyOCR 모델을 유지
+        from ocr_processor import OCRProcessor
+        from api_processor import APIProcessor
+        from pdf_processor import PDFProcessor
+
+        ocr = OCRProcessor(self.config)
+        load_start = time.perf_counter()
+        ocr.initialize_reader()
+        with self._lock:
+            self.model_load_seconds.append(time.perf_counter() - load_start)
+            self.ready_workers += 1
+        api = APIProcessor(self.config)
+        pdf = PDFProcessor(self.config)
+        with self._lock:
+            self._api_processors.append(api)
+
+        while not self._stopping.is_set():
+            job = self.jobs.claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run_job(job, ocr, api, pdf)
+
+    def _run_job(self, job, ocr, api, pdf):
+        job_id = job['id']
+        token = CancellationToken()
+        with self._lock:
+            self._running[job_id] = token
+            self._live[job_id] = {'stage': None, 'progress': 0.0, 'message': '시작'}
+
+        def on_progress(stage, message, percentage):
+            with self._lock:
+                previous = self._live[job_id]['stage']
+                self._live[job_id] = {'stage': stage, 'progress': round(percentage, 1), 'message': message}
+            if stage != previous:
+                self.jobs.update(job_id, stage=stage)
+
+        try:
+            os.makedirs(job['output_folder'], exist_ok=True)
+            result = run_document(
+                ocr, api, pdf, self.config, job['input_pdf'], job['output_folder'], self.api_key,
+                start_page=job['start_page'], end_page=job['end_page'],
+                progress_callback=on_progress, log_callback=lambda msg: print(f"[작업 {job_id}] {msg}"),
+                cancel_token=token
+            )
+        except OperationCancelled:
+            if self._stopping.is_set():
+                # 서비스 종료로 중단된 작업은 다음 시작 시 체크포인트에서 이어서 처리
+                self.jobs.update(job_id, status='queued', message='서비스 종료로 다시 대기')
+            else:
+                self.jobs.update(job_id, status='cancelled', message='사용자 요청으로 취소', finished_at=time.time())
+                with self._lock:
+                    self.metrics_data['jobs_cancelled'] += 1
+        except Exception as e:
+            self.jobs.update(job_id, status='failed', error=str(e), finished_at=time.time())
+            with self._lock:
+                self.metrics_data['jobs_failed'] += 1
+        else:
+            self.jobs.update(job_id, status='done', stage=None, progress=100, message='완료',
+                             result=result, finished_at=time.time())
+            with self._lock:
+                self.metrics_data['jobs_done'] += 1
+                self.metrics_data['pages_done'] += result['pages']
+                for stage, seconds in result['stage_seconds'].items():
+                    if stage in result['skipped']:
+                        continue
+                    stats = self.metrics_data['stages'][stage]
+                    stats['seconds'] += seconds
+                    stats['pages'] += result['pages']
+                    stats['runs'] += 1
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._live.pop(job_id, None)
+            # 작업이 끝난 문서 핸들 정리 (다른 워커가 사용 중인 핸들은 유지)
+            shared_cache().close_all()
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PDFOCRService/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        parts = [p for p in path.split('/') if p]
+        if parts == ['health']:
+            self._send(200, {'status': 'ok', 'ready_workers': self.service.ready_workers,
+                             'workers': self.service.worker_count})
+        elif parts == ['metrics']:
+            self._send(200, self.service.metrics())
+        elif parts == ['jobs']:
+            params = dict(p.split('=', 1) for p in query.split('&') if '=' in p)
+            try:
+                limit = int(params.get('limit', 100))
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                self._send(400, {'error': 'limit은 1 이상의 정수여야 합니다'})
+                return
+            self._send(200, self.service.jobs.list(status=params.get('status'), limit=limit))
+        elif len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            job = self.service.job_status(int(parts[1]))
+            self._send(200 if job else 404, job or {'error': '작업 없음'})
+        else:
+            self._send(404, {'error': '알 수 없는 경로'})
+
+    def do_POST(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        try:
+            if parts == ['jobs']:
+                body = self._read_json()
+                job = self.service.submit(body['input_pdf'], body.get('output_folder'),
+                                          body.get('start_page'), body.get('end_page'))
+                self._send(201, job)
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[1].isdigit() and parts[2] == 'cancel':
+                cancelled = self.service.cancel(int(parts[1]))
+                self._send(200 if cancelled else 409, {'cancelled': cancelled})
+            else:
+                self._send(404, {'error': '알 수 없는 경로'})
+        except (KeyError, ValueError) as e:
+            self._send(400, {'error': str(e)})
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError("JSON 객체가 필요합니다")
+        return data
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix 소켓은 클라이언트 주소가 없음
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+        # BaseHTTPRequestHandler가 참조하는 값
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def create_server(service, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """HTTP 서버 생성 (socket_path가 있으면 Unix 소켓)"""
+    if socket_path:
+        server = UnixHTTPServer(socket_path, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        import socket
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """서비스 HTTP API 클라이언트"""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None):
+        if self.socket_path:
+            conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            body = json.dumps(payload).encode('utf-8') if payload is not None else None
+            headers = {'Content-Type': 'application/json'} if body else {}
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = json.loads(resp.read() or b'null')
+            if resp.status >= 400:
+                raise Exception(f"SERVICE_ERROR: {resp.status} {data}")
+            return data
+        finally:
+            conn.close()
+
+    def submit(self, input_pdf, output_folder=None, start_page=None, end_page=None):
+        return self.request('POST', '/jobs', {
+            'input_pdf': os.path.abspath(input_pdf),
+            'output_folder': output_folder and os.path.abspath(output_folder),
+            'start_page': start_page, 'end_page': end_page,
+        })
+
+    def status(self, job_id):
+        return self.request('GET', f'/jobs/{job_id}')
+
+    def jobs(self, status=None):
+        return self.request('GET', '/jobs' + (f'?status={status}' if status else ''))
+
+    def cancel(self, job_id):
+        return self.request('POST', f'/jobs/{job_id}/cancel')
+
+    def metrics(self):
+        return self.request('GET', '/metrics')
+
+    def wait(self, job_id, poll_seconds=1.0):
+        """작업이 끝날 때까지 대기 후 최종 상태 반환"""
+        while True:
+            job = self.status(job_id)
+            if job['status'] in ('done', 'failed', 'cancelled'):
+                return job
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상주 OCR 작업 서비스")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', help="TCP 대신 사용할 Unix 소켓 경로")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help="서비스 실행")
+    p_serve.add_argument('--workers', type=int, default=1, help="모델을 상주시킬 워커 수")
+    p_serve.add_argument('--db', default='service_jobs.sqlite3', help="작업 큐 파일")
+    p_serve.add_argument('--config', default='config.json', help="설정 파일 경로")
+    p_serve.add_argument('--verbose', action='store_true', help="요청 로그 출력")
+    p_serve.add_argument('--profile', choices=['off', 'cprofile', 'tracemalloc'], help="단계별 프로파일링 모드")
+
+    p_submit = sub.add_parser('submit', help="작업 등록")
+    p_submit.add_argument('input_pdf')
+    p_submit.add_argument('--output-folder')
+    p_submit.add_argument('--start-page', type=int)
+    p_submit.add_argument('--end-page', type=int)
+    p_submit.add_argument('--wait', action='store_true', help="완료까지 대기")
+
+    p_status = sub.add_parser('status', help="작업 상태 (ID 생략 시 목록)")
+    p_status.add_argument('job_id', type=int, nargs='?')
+
+    p_cancel = sub.add_parser('cancel', help="작업 취소")
+    p_cancel.add_argument('job_id', type=int)
+
+    sub.add_parser('metrics', help="처리량 지표")
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        config = ConfigManager(args.config)
+        if args.profile:
+            config.override_settings({'profile_mode': args.profile})
+        service = OCRService(config, db_path=args.db, workers=args.workers)
+        server = create_server(service, args.host, args.port, args.socket, args.verbose)
+        service.start()
+        where = args.socket or f"http://{args.host}:{args.port}"
+        print(f"OCR 서비스 시작: {where} (워커 {args.workers}개, 모델 로드 중...)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n서비스 종료 중...")
+        finally:
+            server.server_close()
+            service.stop(timeout=30)
+            if args.socket and os.path.exists(args.socket):
+                os.remove(args.socket)
+        return
+
+    client = ServiceClient(args.host, args.port, args.socket)
+    if args.command == 'submit':
+        job = client.submit(args.input_pdf, args.output_folder, args.start_page, args.end_page)
+        print(f"작업 등록: {job['id']}")
+        if args.wait:
+            job = client.wait(job['id'])
+            print(json.dumps(job, ensure_ascii=False, indent=2))
+            if job['status'] != 'done':
+                sys.exit(1)
+    elif args.command == 'status':
+        data = client.status(args.job_id) if args.job_id else client.jobs()
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    elif args.command == 'cancel':
+        print(json.dumps(client.cancel(args.job_id), ensure_ascii=False))
+    elif args.command == 'metrics':
+        print(json.dumps(client.metrics(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
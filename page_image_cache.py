@@ -0,0 +1,254 @@
+"""
+페이지 이미지 캐시 모듈
+렌더링한 페이지를 (PDF 내용 해시, 페이지, DPI, 색공간) 키로 .npy 원시 배열로 저장해
+OCR 설정을 바꿔 다시 실행할 때 get_pixmap/디코딩 없이 메모리 맵으로 바로 읽습니다.
+
+사용 예:
+  python page_image_cache.py prewarm input.pdf --dpi 300 --workers 4
+  python page_image_cache.py stats
+  python page_image_cache.py clear
+"""
+import os
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import fitz
+from config_manager import ConfigManager
+from document_cache import shared_cache
+
+COLORSPACES = {'rgb': (fitz.csRGB, 3), 'gray': (fitz.csGRAY, 1)}
+
+
+# (경로, 크기, 수정 시각) → 해시. 한 실행에서 같은 파일을 여러 단계가 해시할 때 다시 읽지 않음
+_hash_memo = {}
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """파일 내용의 SHA-256 (경로/수정 시각이 바뀌어도 같은 PDF면 같은 키)"""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    if len(_hash_memo) > 1024:
+        _hash_memo.clear()
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def render_page(page, dpi, colorspace='rgb'):
+    """페이지를 (높이, 너비, 채널) uint8 배열로 렌더링 (회색조는 2차원)"""
+    cs, channels = COLORSPACES[colorspace]
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72.0, dpi / 72.0), colorspace=cs, alpha=False)
+    arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    arr = arr[:, :pix.width * channels]
+    if channels > 1:
+        arr = arr.reshape(pix.height, pix.width, channels)
+    return np.ascontiguousarray(arr)
+
+
+class PageImageCache:
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """설정에서 캐시 생성 (비활성화 시 None)"""
+        if not config_manager.get_setting('page_cache_enabled', False):
+            return None
+        return cls(
+            config_manager.get_setting('page_cache_dir', 'page_cache'),
+            max_bytes=int(config_manager.get_setting('page_cache_max_mb', 2048) * 1024 * 1024),
+        )
+
+    def path_for(self, pdf_hash, page_num, dpi, colorspace='rgb'):
+        # 같은 PDF의 페이지를 한 하위 디렉터리에 모아 디렉터리당 파일 수를 제한
+        return os.path.join(self.cache_dir, pdf_hash[:2], pdf_hash,
+                            f"p{page_num:05d}_{dpi}dpi_{colorspace}.npy")
+
+    def get(self, pdf_hash, page_num, dpi, colorspace='rgb'):
+        """캐시된 페이지를 읽기 전용 메모리 맵 배열로 반환 (없으면 None)"""
+        path = self.path_for(pdf_hash, page_num, dpi, colorspace)
+        try:
+            arr = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            # 손상된 파일은 삭제하고 다시 렌더링
+            print(f"페이지 캐시 읽기 오류 ({path}): {e}")
+            self._remove(path)
+            return None
+        try:
+            # LRU 판단용으로 수정 시각 갱신
+            os.utime(path)
+        except OSError:
+            pass
+        return arr
+
+    def put(self, pdf_hash, page_num, dpi, arr, colorspace='rgb', evict=True):
+        """페이지 배열 저장 (임시 파일에 쓴 뒤 교체). 기록한 바이트 수 반환"""
+        path = self.path_for(pdf_hash, page_num, dpi, colorspace)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp_path, path)
+        written = os.path.getsize(path)
+        if evict:
+            if self._size is None:
+                self._size = self.total_size()
+            else:
+                self._size += written
+            if self._size > self.max_bytes:
+                self.evict()
+        return written
+
+    def get_or_render(self, page, pdf_hash, dpi, colorspace='rgb'):
+        """캐시에 있으면 메모리 맵으로, 없으면 렌더링 후 저장. → (배열, 캐시 적중 여부)"""
+        page_num = page.number + 1
+        arr = self.get(pdf_hash, page_num, dpi, colorspace)
+        if arr is not None:
+            return arr, True
+        arr = render_page(page, dpi, colorspace)
+        try:
+            self.put(pdf_hash, page_num, dpi, arr, colorspace)
+        except OSError as e:
+            # 디스크 부족 등으로 저장에 실패해도 OCR은 계속 진행
+            print(f"페이지 캐시 저장 오류: {e}")
+        return arr, False
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.npy'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_ratio=0.9):
+        """
+        전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터
+        max_bytes * target_ratio 이하가 될 때까지 삭제합니다. 삭제한 파일 수 반환.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * target_ratio
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                if self._remove(path):
+                    total -= size
+                    removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+        self._size = 0
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def prewarm(self, input_pdf, dpi, pages=None, colorspace='rgb', workers=None, progress_callback=None):
+        """
+        여러 프로세스로 페이지를 미리 렌더링해 캐시에 채웁니다.
+        pages: 1-based 페이지 번호 목록 (None이면 전체). 새로 렌더링한 페이지 수 반환.
+        """
+        pdf_hash = file_sha256(input_pdf)
+        if pages is None:
+            pages = list(range(1, shared_cache().page_count(input_pdf) + 1))
+        missing = [p for p in pages
+                   if not os.path.exists(self.path_for(pdf_hash, p, dpi, colorspace))]
+        if not missing:
+            return 0
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(missing)))
+        # 워커마다 문서를 한 번만 열도록 연속 구간으로 분할
+        chunk = -(-len(missing) // (workers * 4))
+        chunks = [missing[i:i + chunk] for i in range(0, len(missing), chunk)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_prewarm_pages, input_pdf, pdf_hash, part, dpi, colorspace, self.cache_dir)
+                       for part in chunks]
+            for future in futures:
+                done += future.result()
+                if progress_callback:
+                    progress_callback(f"페이지 캐시 준비 중... {done}/{len(missing)}",
+                                      done / len(missing) * 100)
+        self.evict()
+        return done
+
+
+def _prewarm_pages(input_pdf, pdf_hash, pages, dpi, colorspace, cache_dir):
+    """프로세스 풀 작업: 페이지 목록 렌더링 후 저장 (크기 제한은 부모 프로세스에서 처리)"""
+    cache = PageImageCache(cache_dir)
+    with fitz.open(input_pdf) as doc:
+        for page_num in pages:
+            cache.put(pdf_hash, page_num, dpi, render_page(doc[page_num - 1], dpi, colorspace),
+                      colorspace, evict=False)
+    return len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="렌더링된 페이지 이미지 캐시 관리")
+    parser.add_argument('--config', default='config.json', help="설정 파일 경로")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_prewarm = sub.add_parser('prewarm', help="페이지 미리 렌더링")
+    p_prewarm.add_argument('input_pdf')
+    p_prewarm.add_argument('--dpi', type=int, help="렌더링 DPI (기본: 설정의 dpi)")
+    p_prewarm.add_argument('--start-page', type=int)
+    p_prewarm.add_argument('--end-page', type=int)
+    p_prewarm.add_argument('--workers', type=int, help="프로세스 수 (기본: CPU 수)")
+    sub.add_parser('stats', help="캐시 크기 출력")
+    sub.add_parser('clear', help="캐시 비우기")
+
+    args = parser.parse_args()
+    config = ConfigManager(args.config)
+    cache = PageImageCache(
+        config.get_setting('page_cache_dir', 'page_cache'),
+        max_bytes=int(config.get_setting('page_cache_max_mb', 2048) * 1024 * 1024),
+    )
+
+    if args.command == 'prewarm':
+        pages = None
+        if args.start_page or args.end_page:
+            with fitz.open(args.input_pdf) as doc:
+                pages = list(range(args.start_page or 1, (args.end_page or len(doc)) + 1))
+        count = cache.prewarm(args.input_pdf, args.dpi or config.get_setting('dpi', 300), pages=pages,
+                              workers=args.workers, progress_callback=lambda msg, pct: print(msg))
+        print(f"{count}개 페이지 렌더링 완료")
+    elif args.command == 'stats':
+        entries = cache._entries()
+        print(f"{len(entries)}개 페이지, {sum(e[1] for e in entries) / 1024 ** 2:.1f}MB "
+              f"(최대 {cache.max_bytes / 1024 ** 2:.0f}MB)")
+    elif args.command == 'clear':
+        cache.clear()
+        print("페이지 캐시를 비웠습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+페이지 결과 저장소 모듈
+지각 해시(perceptual hash)로 중복 후보 페이지를 찾고, OCR에 쓰는 수준의 해상도로
+페이지를 비교해 거의 같은 페이지일 때만 OCR/교정 결과를 재사용
+"""
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from PIL import Image
+
+# 검증용 축소 이미지 너비 (픽셀, 300 DPI A4 기준 약 1/3 축소 - 10pt 글자가 10픽셀 남짓)
+DETAIL_WIDTH = 768
+# 검증 시 밝기 차이를 평균하는 타일 한 변 크기 (대략 글자 반 개)
+TILE_SIZE = 8
+# 해시 거리가 가까운 순으로 검증할 최대 후보 수 (같은 양식 페이지가 많을 때 검증 비용 제한)
+MAX_CANDIDATES = 16
+
+
+def page_fingerprint(img):
+    """
+    렌더링된 페이지 이미지(PIL)의 지문을 계산합니다. → (키, dHash, 검증용 이미지)
+    키: 검증용 이미지의 내용 해시 (같은 렌더링 결과는 같은 키)
+    dHash: 9x8 회색조로 축소한 뒤 가로로 인접한 픽셀의 밝기 증감을 비트로 사용한 64비트 값 (후보 검색용)
+    검증용 이미지: DETAIL_WIDTH 너비 회색조를 16단계로 양자화 (스캔 잡음은 지우고 글자 차이는 남김)
+    """
+    gray = img.convert('L')
+    small = np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    page_hash = int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    height = max(1, round(gray.height * DETAIL_WIDTH / gray.width))
+    detail = np.asarray(gray.resize((DETAIL_WIDTH, height), Image.BOX), dtype=np.uint8) >> 4
+    key = hashlib.blake2b(detail.tobytes(), digest_size=16).hexdigest()
+    return key, page_hash, detail
+
+
+def detail_diff(a, b):
+    """
+    두 검증용 이미지의 TILE_SIZE 타일별 평균 밝기 차이(0~255) 중 최댓값.
+    페이지 번호 한 글자만 달라도 그 타일의 차이가 커지므로 페이지 전체 평균보다 엄격합니다.
+    크기가 다르면 무한대.
+    """
+    if a.shape != b.shape:
+        return float('inf')
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16)) * 16
+    h = diff.shape[0] // TILE_SIZE * TILE_SIZE
+    w = diff.shape[1] // TILE_SIZE * TILE_SIZE
+    tiles = diff[:h, :w].reshape(h // TILE_SIZE, TILE_SIZE, w // TILE_SIZE, TILE_SIZE).mean(axis=(1, 3))
+    # 타일로 나누고 남은 가장자리도 비교
+    edges = [diff[h:], diff[:h, w:]]
+    return max([float(tiles.max()) if tiles.size else 0.0] + [float(e.mean()) for e in edges if e.size])
+
+
+def settings_key(config_manager):
+    """OCR 결과에 영향을 주는 설정 조합 (같은 설정으로 만든 결과만 재사용)"""
+    key = (f"dpi={config_manager.get_setting('dpi', 300)};"
+           f"layout={config_manager.get_setting('layout_mode', 'none')};"
+           f"quant={bool(config_manager.get_setting('ocr_quantize', True))}")
+    if config_manager.get_setting('preprocess_enabled', False):
+        key += ";pre=" + ",".join(config_manager.get_setting('preprocess_steps', []))
+        # 이진화/기울기 보정 매개변수 (전처리를 켤 때만 결과에 영향)
+        key += (f";block={config_manager.get_setting('threshold_block_size', 31) | 1}"
+                f";c={config_manager.get_setting('threshold_c', 10)}"
+                f";deskew={float(config_manager.get_setting('deskew_max_angle', 10.0))}")
+    return key
+
+
+def _np_default(o):
+    # numpy scalar 타입이면 .item()으로 파이썬 스칼라 추출
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError
+
+
+def _to_signed(value):
+    """SQLite INTEGER(부호 있는 64비트)에 저장하기 위한 변환"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _bands(value):
+    """64비트 해시를 16비트 4구간으로 분할 (거리 3 이하 후보 검색용)"""
+    return [(value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+
+
+def _pack_detail(detail):
+    return zlib.compress(detail.tobytes(), 6)
+
+
+def _unpack_detail(blob, width, height):
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(height, width)
+
+
+class PageResultStore:
+    def __init__(self, db_path, max_entries=50000, max_distance=3, verify_diff=16.0):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.verify_diff = verify_diff
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 이전 형식(dHash를 키로 쓰던 표)은 페이지를 구분하지 못해 재사용하지 않음
+        self._conn.execute("DROP TABLE IF EXISTS pages")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_results (
+                key TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                hash INTEGER NOT NULL,
+                b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                detail BLOB NOT NULL,
+                blocks TEXT NOT NULL,
+                corrections TEXT,
+                created REAL,
+                last_used REAL,
+                hits INTEGER DEFAULT 0,
+                PRIMARY KEY (key, settings)
+            )
+        """)
+        for band in ('b0', 'b1', 'b2', 'b3'):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_page_results_{band} ON page_results({band})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_page_results_last_used ON page_results(last_used)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """설정에서 저장소 생성 (비활성화 시 None)"""
+        if not config_manager.get_setting('page_store_enabled', False):
+            return None
+        return cls(
+            config_manager.get_setting('page_store_path', 'page_store.sqlite3'),
+            max_entries=config_manager.get_setting('page_store_max_entries', 50000),
+            max_distance=config_manager.get_setting('page_hash_max_distance', 3),
+            verify_diff=config_manager.get_setting('page_store_verify_diff', 16.0),
+        )
+
+    def lookup(self, fingerprint, settings):
+        """
+        같은 키(같은 렌더링 결과)의 항목, 없으면 해시 거리가 max_distance 이하인 후보 중
+        검증용 이미지의 타일별 밝기 차이가 verify_diff 이하인 가장 가까운 항목을 찾습니다.
+        → (저장된 키, 블록 목록) 또는 None
+        """
+        key, page_hash, detail = fingerprint
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, blocks FROM page_results WHERE key = ? AND settings = ?", (key, settings)
+            ).fetchone()
+            if row is None:
+                row = self._find_near_duplicate(page_hash, detail, settings)
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE page_results SET last_used = ?, hits = hits + 1 WHERE key = ? AND settings = ?",
+                (time.time(), row[0], settings)
+            )
+            self._conn.commit()
+        return row[0], json.loads(row[1])
+
+    def _find_near_duplicate(self, page_hash, detail, settings):
+        if self.max_distance < 4:
+            # 비둘기집 원리: 거리 3 이하이면 4구간 중 하나는 반드시 일치
+            rows = self._conn.execute(
+                "SELECT key, hash FROM page_results WHERE settings = ? AND "
+                "(b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?)",
+                (settings, *_bands(page_hash))
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT key, hash FROM page_results WHERE settings = ?", (settings,)
+            ).fetchall()
+
+        candidates = []
+        for stored_key, stored_hash in rows:
+            distance = ((stored_hash & 0xFFFFFFFFFFFFFFFF) ^ page_hash).bit_count()
+            if distance <= self.max_distance:
+                candidates.append((distance, stored_key))
+        # 해시는 후보를 좁히는 데만 쓰고, 재사용 여부는 검증용 이미지 비교로 결정
+        for _, stored_key in sorted(candidates)[:MAX_CANDIDATES]:
+            width, height, blob, blocks = self._conn.execute(
+                "SELECT width, height, detail, blocks FROM page_results WHERE key = ? AND settings = ?",
+                (stored_key, settings)
+            ).fetchone()
+            if detail_diff(_unpack_detail(blob, width, height), detail) <= self.verify_diff:
+                return stored_key, blocks
+        return None
+
+    def put(self, fingerprint, settings, blocks):
+        """페이지 OCR 결과 저장 (page/id를 제외한 블록 목록)"""
+        key, page_hash, detail = fingerprint
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_results "
+                "(key, settings, hash, b0, b1, b2, b3, width, height, detail, blocks, corrections, "
+                "created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                (key, settings, _to_signed(page_hash), *_bands(page_hash),
+                 detail.shape[1], detail.shape[0], _pack_detail(detail),
+                 json.dumps(blocks, ensure_ascii=False, default=_np_default), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get_corrections(self, key, settings, model, text_raws):
+        """같은 모델로 교정된 결과가 있고 원문 줄이 일치하면 교정 텍스트 목록 반환"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blocks, corrections FROM page_results WHERE key = ? AND settings = ?",
+                (key, settings)
+            ).fetchone()
+        if row is None or row[1] is None:
+            return None
+        stored = json.loads(row[1])
+        if stored.get('model') != model:
+            return None
+        if [b['text_raw'] for b in json.loads(row[0])] != list(text_raws):
+            return None
+        return stored['texts']
+
+    def put_corrections(self, key, settings, model, text_raws, texts):
+        """페이지 교정 결과 저장 (저장된 블록과 원문이 일치할 때만)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blocks FROM page_results WHERE key = ? AND settings = ?",
+                (key, settings)
+            ).fetchone()
+            if row is None or [b['text_raw'] for b in json.loads(row[0])] != list(text_raws):
+                return
+            self._conn.execute(
+                "UPDATE page_results SET corrections = ? WHERE key = ? AND settings = ?",
+                (json.dumps({'model': model, 'texts': list(texts)}, ensure_ascii=False),
+                 key, settings)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제 (LRU)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM page_results").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM page_results WHERE rowid IN "
+                "(SELECT rowid FROM page_results ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
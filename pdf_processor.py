@@ -2,15 +2,38 @@
 PDF 처리 모듈
 교정된 텍스트를 PDF에 오버레이
 """
+import os
+import re
 import json
+import time
 import fitz
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from block_diff import page_digests, changed_pages
+from page_image_cache import file_sha256
+from profiler import profile_stage
+from document_cache import shared_cache
+
+# 오버레이 텍스트를 담는 선택적 콘텐츠 그룹(레이어) 이름
+OCR_LAYER_NAME = "OCR 텍스트"
+
+# 결과 PDF 저장 방식 (overlay_save_mode) → (폰트 서브셋 여부, save 옵션)
+#   compact   중복 객체 병합(garbage=3)까지 수행. 가장 작지만 페이지가 많으면 저장이 매우 느림
+#   balanced  미사용 객체만 제거하고 객체 스트림으로 압축. compact와 크기가 거의 같고 훨씬 빠름
+#   fast      폰트 서브셋 없이 저장. 가장 빠르지만 CJK 폰트 전체가 한 번 포함되어 파일이 큼
+# 서브셋은 전체 저장에서 한 번만 수행 (문서의 모든 페이지는 같은 CJK 폰트 객체 하나를 참조)
+# (선형화(linear)는 PyMuPDF 1.26 이후 MuPDF에서 지원하지 않아 제공하지 않음)
+SAVE_MODES = {
+    'compact': (True, dict(garbage=3, deflate=True, deflate_images=True, deflate_fonts=True, use_objstms=1)),
+    'balanced': (True, dict(garbage=1, deflate=True, deflate_fonts=True, use_objstms=1)),
+    'fast': (False, dict(garbage=1, deflate=True, deflate_fonts=True)),
+}
 
 
 class PDFProcessor:
     def __init__(self, config_manager):
         self.config = config_manager
+        self.last_save_seconds = None
         self.setup_fonts()
         
     def setup_fonts(self):
@@ -22,12 +45,22 @@ class PDFProcessor:
         except Exception as e:
             print(f"폰트 등록 오류: {e}")
     
-    def overlay_with_fitz(self, input_pdf, blocks, output_pdf, progress_callback=None):
-        """교정된 텍스트를 PDF에 오버레이"""
+    @profile_stage('overlay')
+    def overlay_with_fitz(self, input_pdf, blocks, output_pdf, progress_callback=None, cancel_token=None):
+        """
+        교정된 텍스트를 PDF에 오버레이.
+        cancel_token이 취소되면 페이지 단위로 중단하며, 출력 PDF는 저장하지 않습니다.
+        텍스트는 'OCR 텍스트' 선택적 콘텐츠 그룹(레이어)으로 기록하고, 페이지별 내용 해시를
+        오버레이 기록 파일에 남겨 이후 update_overlay에서 바뀐 페이지만 다시 기록합니다.
+        """
         dpi = self.config.get_setting('dpi', 300)
         scale = 72.0 / dpi  # 1pt = 1/72in
         
-        doc = fitz.open(input_pdf)
+        # 원본을 수정하므로 공유 핸들이 아닌 별도 문서로 열기
+        doc = shared_cache(self.config).open_copy(input_pdf)
+        ocg = doc.add_ocg(OCR_LAYER_NAME, on=True)
+        # 문서에 한 번 등록되어 모든 페이지가 같은 폰트 객체(xref)를 참조
+        font = fitz.Font("cjk")
         
         # 페이지별로 블록 분류
         by_page = {}
@@ -37,6 +70,10 @@ class PDFProcessor:
         total_pages = len(doc)
         
         for pno, page in enumerate(doc, start=1):
+            if cancel_token and cancel_token.is_cancelled():
+                doc.close()
+                cancel_token.raise_if_cancelled()
+
             if progress_callback:
                 progress_callback(f"PDF 오버레이 처리 중... 페이지 {pno}/{total_pages}", 
                                 (pno / total_pages) * 100)
@@ -44,39 +81,224 @@ class PDFProcessor:
             # 현재 페이지의 블록만 처리
             if pno not in by_page:
                 continue
-                
-            w_pt, h_pt = page.rect.width, page.rect.height
-            
-            # TextWriter 객체 생성
-            tw = fitz.TextWriter(page.rect)
-
-            # 현재 페이지의 블록들만 처리
-            for b in by_page[pno]:
-                x0 = b['x_rel'] * w_pt
-                y0 = b['y_rel'] * h_pt
-                x1 = x0 + b['w_rel'] * w_pt
-                y1 = y0 + b['h_rel'] * h_pt
-                
-                rect = fitz.Rect(x0, y0, x1, y1)
-                text = b.get('text_corrected', b['text_raw'])
-                fontsize = b['font_size'] * scale
-                
-                # TextWriter로 텍스트 추가 (자동 한국어 지원)
-                tw.append(
-                    (x0, y0 + fontsize),  # 시작 위치
-                    text,
-                    fontsize=fontsize,
-                    font=fitz.Font("cjk")  # CJK 폰트 사용
-                )
-            
-            # 페이지에 투명하게 적용
-            tw.write_text(page, opacity=0.01)  # 거의 투명하지만 선택 가능
+
+            self._overlay_page(page, by_page[pno], scale, ocg, font)
         
-        # 파일 크기 최적화
-        doc.subset_fonts()  # 폰트 서브셋팅
-        doc.ez_save(output_pdf)  # 압축 저장
+        self._save(doc, output_pdf)
+        doc.close()
+        self._write_manifest(output_pdf, {
+            'input_sha256': file_sha256(input_pdf),
+            'dpi': dpi,
+            'pages': page_digests(blocks),
+        })
         
         if progress_callback:
             progress_callback("PDF 오버레이 완료", 100)
         
         return True
+
+    @profile_stage('overlay')
+    def update_overlay(self, input_pdf, blocks, output_pdf, progress_callback=None, cancel_token=None,
+                       log_callback=None):
+        """
+        기존 출력 PDF에서 내용이 바뀐 페이지의 텍스트 레이어만 다시 기록합니다.
+        출력 PDF나 오버레이 기록이 없거나 입력 PDF/DPI가 달라졌으면 전체를 다시 만듭니다.
+        가능하면 증분 저장(기존 파일 뒤에 변경분만 추가)을 사용합니다.
+        반환: 다시 기록한 페이지 번호 목록
+        """
+        dpi = self.config.get_setting('dpi', 300)
+        new_digests = page_digests(blocks)
+        manifest = self._load_manifest(output_pdf)
+        if (not os.path.exists(output_pdf) or manifest is None
+                or manifest.get('dpi') != dpi or manifest.get('input_sha256') != file_sha256(input_pdf)):
+            self.overlay_with_fitz(input_pdf, blocks, output_pdf, progress_callback, cancel_token)
+            return sorted(int(p) for p in new_digests)
+
+        old_digests = manifest.get('pages', {})
+        pages = changed_pages(old_digests, new_digests)
+        if not pages:
+            if progress_callback:
+                progress_callback("PDF 오버레이 변경 없음", 100)
+            return []
+
+        scale = 72.0 / dpi
+        by_page = {}
+        for b in blocks:
+            by_page.setdefault(b['page'], []).append(b)
+
+        doc = fitz.open(output_pdf)
+        try:
+            ocg = next((xref for xref, info in doc.get_ocgs().items() if info['name'] == OCR_LAYER_NAME), None)
+            if ocg is None or any(p > len(doc) for p in pages):
+                raise ValueError("오버레이 레이어 없음")
+            font = fitz.Font("cjk")
+            # 이번 갱신에서 새로 만든 객체는 이 번호 이상 (새 폰트 판별용)
+            first_new_xref = doc.xref_length()
+            removed_fonts = {}
+            for i, pno in enumerate(pages, start=1):
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                if progress_callback:
+                    progress_callback(f"PDF 오버레이 갱신 중... 페이지 {pno} ({i}/{len(pages)})",
+                                      i / len(pages) * 100)
+                page = doc[pno - 1]
+                if str(pno) in old_digests:
+                    removed_fonts[pno] = self._remove_overlay(doc, page)
+                    if removed_fonts[pno] is None:
+                        raise ValueError(f"페이지 {pno}의 기존 텍스트 레이어를 찾을 수 없음")
+                if pno in by_page:
+                    self._overlay_page(page, by_page[pno], scale, ocg, font)
+
+            # 이미 서브셋된 기존 폰트는 그대로 두고 이번에 추가한 폰트만 다시 기록한 페이지 기준으로 서브셋.
+            # 다시 기록한 페이지가 원본 PDF의 폰트(다른 페이지와 공유)도 쓰면 페이지 단위 서브셋이
+            # 그 폰트를 망가뜨리므로 전체 저장(서브셋 1회)으로 처리
+            incremental = doc.can_save_incrementally() and all(
+                xref >= first_new_xref or name in removed_fonts.get(pno, ())
+                for pno in pages for xref, _, _, _, name, _ in doc[pno - 1].get_fonts()
+            )
+            if incremental:
+                fitz.mupdf.pdf_subset_fonts2(fitz.mupdf.pdf_document_from_fz_document(doc),
+                                             [pno - 1 for pno in pages])
+                doc.save(output_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+            else:
+                tmp_path = output_pdf + '.tmp'
+                self._save(doc, tmp_path)
+        except ValueError as e:
+            # 다른 도구로 수정된 PDF 등 기존 레이어를 안전하게 교체할 수 없으면 전체 재생성
+            doc.close()
+            if log_callback:
+                log_callback(f"부분 오버레이 불가 ({e}) → 전체 다시 생성")
+            self.overlay_with_fitz(input_pdf, blocks, output_pdf, progress_callback, cancel_token)
+            return sorted(int(p) for p in new_digests)
+        except BaseException:
+            doc.close()
+            raise
+        doc.close()
+        if not incremental:
+            os.replace(tmp_path, output_pdf)
+
+        manifest['pages'] = new_digests
+        self._write_manifest(output_pdf, manifest)
+        if log_callback:
+            mode = "증분 저장" if incremental else "전체 저장"
+            log_callback(f"변경된 {len(pages)}개 페이지만 다시 오버레이 ({mode}): {pages}")
+        if progress_callback:
+            progress_callback("PDF 오버레이 완료", 100)
+        return pages
+
+    def _save(self, doc, path):
+        """overlay_save_mode에 따라 폰트 서브셋/압축 후 저장 (저장 시간은 last_save_seconds)"""
+        mode = self.config.get_setting('overlay_save_mode', 'balanced')
+        if mode not in SAVE_MODES:
+            raise ValueError(f"지원하지 않는 저장 방식: {mode}")
+        subset, options = SAVE_MODES[mode]
+        start = time.perf_counter()
+        if subset:
+            # 문서 전체가 공유하는 폰트 하나를 사용한 글자만 남김
+            doc.subset_fonts()
+        doc.save(path, **options)
+        self.last_save_seconds = time.perf_counter() - start
+
+    def _overlay_page(self, page, page_blocks, scale, ocg, font):
+        """페이지 블록들을 거의 투명한 텍스트로 기록 (기록할 텍스트가 없으면 생략)"""
+        w_pt, h_pt = page.rect.width, page.rect.height
+        
+        # TextWriter 객체 생성
+        tw = fitz.TextWriter(page.rect)
+        written = 0
+
+        # 현재 페이지의 블록들만 처리
+        for b in page_blocks:
+            # 빈 페이지 표시 블록은 기록할 텍스트 없음
+            if b.get('blank'):
+                continue
+            x0 = b['x_rel'] * w_pt
+            y0 = b['y_rel'] * h_pt
+            x1 = x0 + b['w_rel'] * w_pt
+            y1 = y0 + b['h_rel'] * h_pt
+            
+            rect = fitz.Rect(x0, y0, x1, y1)
+            text = b.get('text_corrected', b['text_raw'])
+            fontsize = b['font_size'] * scale
+            written += 1
+            
+            # 여러 줄로 묶인 문단 블록은 원본 박스(줄) 위치에 나눠 기록
+            # (영역 안에서 줄바꿈하면 넘치는 줄이 버려져 검색되지 않음)
+            if b.get('lines', 1) > 1:
+                for (px, py, psize), piece in self._paragraph_pieces(b, text, rect, w_pt, h_pt):
+                    tw.append((px, py + psize), piece, fontsize=psize, font=font)
+                continue
+
+            # TextWriter로 텍스트 추가 (자동 한국어 지원)
+            tw.append(
+                (x0, y0 + fontsize),  # 시작 위치
+                text,
+                fontsize=fontsize,
+                font=font  # CJK 폰트 사용
+            )
+        
+        if written:
+            # 페이지에 투명하게 적용 (OCR 레이어의 마지막 콘텐츠 스트림으로 추가됨)
+            tw.write_text(page, opacity=0.01, oc=ocg)  # 거의 투명하지만 선택 가능
+
+    @staticmethod
+    def _paragraph_pieces(b, text, rect, w_pt, h_pt):
+        """
+        문단 블록의 텍스트를 원본 박스 위치별 조각으로 나눕니다. → [((x, y, 글자 크기), 텍스트), ...]
+        교정된 텍스트는 박스별 원문 단어 수 비율대로 단어를 나눠 배치합니다.
+        박스 정보가 없는 이전 결과는 영역을 줄 수만큼 같은 높이로 나눠 배치합니다.
+        """
+        boxes = b.get('boxes')
+        if boxes:
+            slots = [(box['x_rel'] * w_pt, box['y_rel'] * h_pt, box['h_rel'] * h_pt) for box in boxes]
+            weights = [max(1, len(box['text_raw'].split())) for box in boxes]
+        else:
+            line_h = rect.height / b['lines']
+            slots = [(rect.x0, rect.y0 + i * line_h, line_h) for i in range(b['lines'])]
+            weights = [1] * b['lines']
+
+        words = text.split()
+        total = sum(weights)
+        pieces = []
+        start = done = 0
+        for slot, weight in zip(slots, weights):
+            done += weight
+            end = round(done * len(words) / total)
+            if end > start:
+                pieces.append((slot, ' '.join(words[start:end])))
+            start = end
+        return pieces
+
+    def _remove_overlay(self, doc, page):
+        """
+        페이지의 마지막 콘텐츠 스트림이 OCR 레이어(write_text가 추가한 '/OC' 표시 구간)이면
+        페이지 콘텐츠 목록에서 제거합니다.
+        반환: 제거한 레이어가 사용하던 폰트 리소스 이름 집합, 레이어를 찾지 못하면 None
+        """
+        contents = page.get_contents()
+        if not contents:
+            return None
+        stream = doc.xref_stream(contents[-1])
+        if not stream.startswith(b"q\n/OC /"):
+            return None
+        doc.xref_set_key(page.xref, "Contents", "[" + " ".join(f"{x} 0 R" for x in contents[:-1]) + "]")
+        return {name.decode('latin-1') for name in re.findall(rb"/([^\s/\[\]<>()]+)\s+[-\d.]+\s+Tf", stream)}
+
+    def manifest_path(self, output_pdf):
+        """출력 PDF의 페이지별 오버레이 기록 파일 경로"""
+        return os.path.splitext(output_pdf)[0] + '_overlay.json'
+
+    def _load_manifest(self, output_pdf):
+        try:
+            with open(self.manifest_path(output_pdf), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, output_pdf, manifest):
+        path = self.manifest_path(output_pdf)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,331 @@
+"""
+처리 파이프라인 모듈
+GUI 없이 OCR → 교정 → 오버레이 단계를 실행하고 단계별 완료 여부를 판정
+(작업 서비스 등 화면이 없는 실행 환경에서 사용)
+"""
+import os
+import json
+import time
+from text_exporter import TextExporter
+from search_index import SearchIndex
+from page_image_cache import file_sha256
+from result_store import DocumentResultStore, ocr_key, correction_key, overlay_key
+from document_cache import shared_cache
+
+STAGES = ('ocr', 'api', 'overlay')
+
+
+def output_paths(input_pdf, output_folder, pdf_hash=None):
+    """
+    입력 PDF의 단계별 출력 파일 경로.
+    pdf_hash를 주면 출력 폴더에 같은 이름의 다른 PDF(다른 폴더의 동명 파일 등) 결과가 있을 때
+    이름 뒤에 해시 앞 8자리를 붙여 서로의 결과를 덮어쓰지 않게 합니다.
+    """
+    base_name = os.path.splitext(os.path.basename(input_pdf))[0]
+    if pdf_hash and _owned_by_other(os.path.join(output_folder, base_name), input_pdf, pdf_hash):
+        base_name = f"{base_name}_{pdf_hash[:8]}"
+    return {
+        'base': os.path.join(output_folder, base_name),
+        'raw_json': os.path.join(output_folder, f"{base_name}_ocr_raw.json"),
+        'corr_json': os.path.join(output_folder, f"{base_name}_ocr_corr.json"),
+        'output_pdf': os.path.join(output_folder, f"{base_name}_recovered.pdf"),
+        'source': os.path.join(output_folder, f"{base_name}_source.json"),
+    }
+
+
+def _owned_by_other(base, input_pdf, pdf_hash):
+    """
+    기존 결과가 다른 PDF의 것인지 판정. 같은 경로의 PDF를 수정한 경우는 같은 문서로 보고
+    (바뀐 블록/페이지만 다시 처리), 원본 기록이 없는 이전 버전의 결과도 같은 문서로 봅니다.
+    """
+    try:
+        with open(base + '_source.json', 'r', encoding='utf-8') as f:
+            source = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (source.get('sha256') != pdf_hash
+            and source.get('source_pdf') != os.path.abspath(input_pdf))
+
+
+def _write_source(path, input_pdf, pdf_hash):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'source_pdf': os.path.abspath(input_pdf), 'sha256': pdf_hash}, f, ensure_ascii=False)
+
+
+def ocr_incomplete_reason(input_pdf_path, raw_json_path, start_page, end_page):
+    """
+    OCR 결과가 완료되지 않았으면 사유 문자열, 완료되었으면 None.
+    기준:
+      - raw_json 파일 존재 & 올바른 JSON (list)
+      - 요청한 페이지 범위 내 모든 페이지 번호가 최소 1회 이상 등장
+        (빈 페이지는 'blank' 표시 블록으로 기록되므로 누락으로 보지 않음)
+    """
+    try:
+        if not os.path.exists(raw_json_path):
+            return "결과 파일 없음"
+        with open(raw_json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, list) or len(data) == 0:
+            return "빈 결과"
+        total_pages = shared_cache().page_count(input_pdf_path)
+        if start_page is None and end_page is None:
+            expected_pages = set(range(1, total_pages + 1))
+        else:
+            s = start_page if start_page else 1
+            e = end_page if end_page else total_pages
+            expected_pages = set(range(s, e + 1))
+        pages_present = {b.get('page') for b in data if isinstance(b, dict) and 'page' in b}
+        missing = expected_pages - pages_present
+        if missing:
+            return f"누락 페이지 {sorted(list(missing))}"
+        return None
+    except Exception as e:
+        return f"예외: {e}"
+
+
+def correction_incomplete_reason(raw_json_path, corr_json_path):
+    """
+    LLM 교정이 완료되지 않았으면 사유 문자열, 완료되었으면 None.
+    기준:
+      - 두 파일 존재
+      - 두 파일 모두 list
+      - 길이 동일
+      - 모든 항목에 text_corrected 키 존재
+      - 각 항목의 원문/좌표가 현재 raw 결과와 동일 (일부 페이지만 OCR을 다시 한 경우
+        바뀐 블록만 다시 교정되도록 미완료로 판정)
+    """
+    try:
+        if not (os.path.exists(raw_json_path) and os.path.exists(corr_json_path)):
+            return "결과 파일 없음"
+        with open(raw_json_path, 'r', encoding='utf-8') as f:
+            raw_data = json.load(f)
+        with open(corr_json_path, 'r', encoding='utf-8') as f:
+            corr_data = json.load(f)
+        if not (isinstance(raw_data, list) and isinstance(corr_data, list)):
+            return "JSON 구조(list 아님)"
+        if len(raw_data) == 0 or len(raw_data) != len(corr_data):
+            return f"길이 불일치 raw={len(raw_data)} corr={len(corr_data)}"
+        missing_key_count = sum(1 for b in corr_data if 'text_corrected' not in b)
+        if missing_key_count:
+            return f"text_corrected 누락 {missing_key_count}개"
+        changed_count = sum(1 for raw, corr in zip(raw_data, corr_data)
+                            if any(corr.get(k) != v for k, v in raw.items()))
+        if changed_count:
+            return f"원문 변경 {changed_count}개 블록"
+        return None
+    except Exception as e:
+        return f"예외: {e}"
+
+
+def document_incomplete_reason(input_pdf, output_folder):
+    """
+    PDF 전체 처리(OCR → 교정 → 결과 PDF)가 완료되지 않았으면 사유 문자열, 완료되었으면 None.
+    (감시 폴더 등에서 이미 처리한 파일을 건너뛸 때 사용)
+    """
+    pdf_hash = file_sha256(input_pdf)
+    paths = output_paths(input_pdf, output_folder, pdf_hash)
+    try:
+        with open(paths['source'], 'r', encoding='utf-8') as f:
+            if json.load(f).get('sha256') != pdf_hash:
+                return "원본 변경"
+    except (OSError, ValueError):
+        return "원본 기록 없음"
+    reason = ocr_incomplete_reason(input_pdf, paths['raw_json'], None, None)
+    if reason is not None:
+        return f"OCR {reason}"
+    reason = correction_incomplete_reason(paths['raw_json'], paths['corr_json'])
+    if reason is not None:
+        return f"교정 {reason}"
+    if not os.path.exists(paths['output_pdf']):
+        return "결과 PDF 없음"
+    return None
+
+
+def ocr_part_path(paths, start_page, end_page):
+    """페이지 구간 단위 OCR 결과 경로 (큰 파일을 나눠 처리할 때)"""
+    return f"{paths['base']}_ocr_raw_part{start_page:05d}-{end_page:05d}.json"
+
+
+def run_ocr_part(ocr_processor, config_manager, input_pdf, output_folder, start_page, end_page,
+                 progress_callback=None, log_callback=None, cancel_token=None):
+    """
+    큰 PDF의 한 페이지 구간만 OCR해 구간 결과 파일에 저장합니다.
+    전체 OCR 결과나 해당 구간 결과가 이미 완료되어 있으면 건너뛰고 False, 실행했으면 True.
+    """
+    paths = output_paths(input_pdf, output_folder, file_sha256(input_pdf))
+    if ocr_incomplete_reason(input_pdf, paths['raw_json'], None, None) is None:
+        return False
+    part_json = ocr_part_path(paths, start_page, end_page)
+    if ocr_incomplete_reason(input_pdf, part_json, start_page, end_page) is None:
+        return False
+    ocr_processor.preprocess_pdf(
+        input_pdf, part_json, start_page, end_page,
+        progress_callback=progress_callback, cancel_token=cancel_token, log_callback=log_callback
+    )
+    return True
+
+
+def merge_ocr_parts(config_manager, input_pdf, output_folder, ranges):
+    """
+    구간별 OCR 결과를 페이지 순서로 합쳐 전체 OCR 결과 파일을 만들고 구간 파일을 삭제합니다.
+    (전체 결과가 이미 완료되어 있으면 구간 파일만 정리)
+    """
+    pdf_hash = file_sha256(input_pdf)
+    paths = output_paths(input_pdf, output_folder, pdf_hash)
+    part_paths = [ocr_part_path(paths, s, e) for s, e in ranges]
+    if ocr_incomplete_reason(input_pdf, paths['raw_json'], None, None) is not None:
+        blocks = []
+        for part_json in part_paths:
+            with open(part_json, 'r', encoding='utf-8') as f:
+                blocks.extend(json.load(f))
+        blocks.sort(key=lambda b: (b['page'], b['id']))
+        for new_id, b in enumerate(blocks):
+            b['id'] = new_id
+        tmp_path = f"{paths['raw_json']}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(blocks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, paths['raw_json'])
+        store = DocumentResultStore.from_config(config_manager)
+        if store:
+            key = ocr_key(pdf_hash, config_manager, None, None, ranges[-1][1])
+            store.put('ocr', key, paths)
+    for part_json in part_paths:
+        if os.path.exists(part_json):
+            os.remove(part_json)
+
+
+def run_document(ocr_processor, api_processor, pdf_processor, config_manager, input_pdf, output_folder,
+                 api_key, start_page=None, end_page=None, progress_callback=None, log_callback=None,
+                 cancel_token=None):
+    """
+    PDF 한 개를 OCR → 교정 → 오버레이 순서로 처리합니다. 완료된 단계는 건너뛰고,
+    결과 저장소(result_store_enabled)에 같은 입력의 결과가 있으면 복사해 재사용합니다.
+    progress_callback(stage, message, percentage): 단계별 진행률 (stage는 STAGES 중 하나)
+    반환: {'outputs': 출력 경로, 'pages': 처리 페이지 수, 'blocks': 블록 수,
+           'stage_seconds': {단계: 소요 시간}, 'skipped': [건너뛴 단계], 'restored': [저장소에서 복원한 단계],
+           'correction_cost': 이번에 교정했으면 모델별 비용/지연 집계}
+    """
+    log = log_callback or print
+    # 단계마다 같은 PDF를 다시 열지 않도록 문서 핸들/페이지 수 공유
+    documents = shared_cache(config_manager)
+    pdf_hash = file_sha256(input_pdf)
+    paths = output_paths(input_pdf, output_folder, pdf_hash)
+    if not paths['base'].endswith(os.path.splitext(os.path.basename(input_pdf))[0]):
+        log(f"같은 이름의 다른 PDF 결과가 있어 {os.path.basename(paths['base'])} 이름으로 저장합니다.")
+    _write_source(paths['source'], input_pdf, pdf_hash)
+    store = DocumentResultStore.from_config(config_manager)
+    store_paths = dict(paths, manifest=pdf_processor.manifest_path(paths['output_pdf']))
+    stage_seconds = {}
+    skipped = []
+    restored = []
+
+    def stage_progress(stage):
+        if progress_callback is None:
+            return None
+        return lambda msg, pct: progress_callback(stage, msg, pct)
+
+    def check_cancelled():
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+
+    # 1단계: OCR
+    start = time.perf_counter()
+    reason = ocr_incomplete_reason(input_pdf, paths['raw_json'], start_page, end_page)
+    key = None
+    if reason is not None and store:
+        key = ocr_key(pdf_hash, config_manager, start_page, end_page, documents.page_count(input_pdf))
+        if store.restore('ocr', key, store_paths):
+            reason = ocr_incomplete_reason(input_pdf, paths['raw_json'], start_page, end_page)
+            if reason is None:
+                log("결과 저장소에서 OCR 결과를 복원했습니다.")
+                restored.append('ocr')
+    if reason is None:
+        with open(paths['raw_json'], 'r', encoding='utf-8') as f:
+            blocks = json.load(f)
+        skipped.append('ocr')
+    else:
+        check_cancelled()
+        log(f"OCR 실행 사유: {reason}")
+        blocks = ocr_processor.preprocess_pdf(
+            input_pdf, paths['raw_json'], start_page, end_page,
+            progress_callback=stage_progress('ocr'), cancel_token=cancel_token, log_callback=log_callback
+        )
+        if store:
+            store.put('ocr', key, store_paths)
+    stage_seconds['ocr'] = time.perf_counter() - start
+
+    # 2단계: 교정 (설정 시 페이지 단위 텍스트 내보내기)
+    start = time.perf_counter()
+    exporter = TextExporter.from_config(config_manager, input_pdf, paths['base'])
+    try:
+        reason = correction_incomplete_reason(paths['raw_json'], paths['corr_json'])
+        if reason is not None and store:
+            key = correction_key(paths['raw_json'], config_manager)
+            if store.restore('api', key, store_paths):
+                reason = correction_incomplete_reason(paths['raw_json'], paths['corr_json'])
+                if reason is None:
+                    log("결과 저장소에서 교정 결과를 복원했습니다.")
+                    restored.append('api')
+        if reason is None:
+            with open(paths['corr_json'], 'r', encoding='utf-8') as f:
+                corrected_blocks = json.load(f)
+            if exporter:
+                exporter.write_document(corrected_blocks)
+            skipped.append('api')
+        else:
+            check_cancelled()
+            if not api_processor.check_token_limit():
+                # GUI 밖(작업 서비스 등)에서 실행해도 일일 토큰 제한을 넘겨 교정하지 않도록 확인
+                raise Exception("QUOTA_ERROR: 일일 토큰 제한(daily_token_limit)을 초과해 교정을 시작하지 않습니다.")
+            log(f"교정 실행 사유: {reason}")
+            corrected_blocks = api_processor.recover_text_with_api(
+                paths['raw_json'], paths['corr_json'], api_key,
+                progress_callback=stage_progress('api'), log_callback=log_callback,
+                cancel_token=cancel_token, page_callback=exporter.write_page if exporter else None
+            )
+            if store:
+                store.put('api', key, store_paths)
+    finally:
+        if exporter:
+            exporter.close()
+    if exporter:
+        log(f"텍스트 내보내기 완료: {', '.join(exporter.paths.values())}")
+    index = SearchIndex.from_config(config_manager)
+    if index:
+        try:
+            count = index.index_document(paths['corr_json'], source_pdf=input_pdf, output_pdf=paths['output_pdf'])
+            log(f"검색 색인 갱신: {count}개 블록" if count else "검색 색인 변경 없음")
+        except Exception as e:
+            log(f"검색 색인 오류: {e}")
+        finally:
+            index.close()
+    stage_seconds['api'] = time.perf_counter() - start
+
+    # 3단계: 오버레이 (기존 결과가 있으면 바뀐 페이지만, 없으면 저장소에서 복원)
+    start = time.perf_counter()
+    check_cancelled()
+    key = overlay_key(paths['corr_json'], pdf_hash) if store else None
+    if store and not os.path.exists(paths['output_pdf']) and store.restore('overlay', key, store_paths):
+        log("결과 저장소에서 결과 PDF를 복원했습니다.")
+        restored.append('overlay')
+        updated_pages = []
+    else:
+        updated_pages = pdf_processor.update_overlay(
+            input_pdf, corrected_blocks, paths['output_pdf'],
+            progress_callback=stage_progress('overlay'), cancel_token=cancel_token, log_callback=log_callback
+        )
+        if updated_pages and store:
+            store.put('overlay', key, store_paths)
+    if not updated_pages:
+        skipped.append('overlay')
+    stage_seconds['overlay'] = time.perf_counter() - start
+
+    return {
+        'outputs': {k: v for k, v in paths.items() if k not in ('base', 'source')},
+        'pages': len({b['page'] for b in blocks}),
+        'blocks': len(blocks),
+        'stage_seconds': stage_seconds,
+        'skipped': skipped,
+        'restored': restored,
+        'correction_cost': getattr(api_processor, 'last_cost', None) if 'api' not in skipped else None,
+    }
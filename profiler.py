@@ -0,0 +1,173 @@
+"""
+프로파일링 모듈
+처리 단계(OCR/교정/오버레이)별로 cProfile 또는 tracemalloc을 적용해
+문서별 결과 파일(.prof / .tracemalloc)과 상위 N개 병목 요약을 남깁니다.
+
+설정:
+  profile_mode   'off' | 'cprofile' | 'tracemalloc'
+  profile_dir    결과 저장 폴더 (기본 'profiles')
+  profile_top_n  요약에 출력할 항목 수
+
+저장된 결과 보기:
+  python -m pstats profiles/문서_ocr.prof
+  python profiler.py profiles/문서_ocr.prof          (요약 다시 출력, .tracemalloc도 가능)
+"""
+import os
+import sys
+import time
+import pstats
+import cProfile
+import argparse
+import functools
+import threading
+import tracemalloc
+
+PROFILE_MODES = ('off', 'cprofile', 'tracemalloc')
+
+# 같은 스레드에서 단계 안에 다른 단계가 호출되면(update_overlay → overlay_with_fitz) 바깥 단계만 측정
+_active = threading.local()
+
+
+def _doc_name(path):
+    name = os.path.splitext(os.path.basename(str(path)))[0]
+    for suffix in ('_ocr_raw', '_ocr_corr'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def cprofile_summary(stats, top_n=20):
+    """pstats.Stats → 자체 시간(tottime) 상위 N개 요약 줄 목록"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top_n]
+    lines = [f"{'tottime':>9s} {'cumtime':>9s} {'calls':>9s}  함수"]
+    for (filename, lineno, func), (cc, nc, tt, ct, _) in rows:
+        location = f"{os.path.basename(filename)}:{lineno}" if filename != '~' else 'built-in'
+        lines.append(f"{tt:9.3f} {ct:9.3f} {nc:9d}  {func} ({location})")
+    return lines
+
+
+def tracemalloc_summary(snapshot, top_n=20):
+    """tracemalloc 스냅샷 → 할당 크기 상위 N개 코드 위치 요약 줄 목록"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    lines = [f"{'size(MB)':>9s} {'blocks':>9s}  위치"]
+    for stat in snapshot.statistics('lineno')[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024 ** 2:9.2f} {stat.count:9d}  "
+                     f"{os.path.basename(frame.filename)}:{frame.lineno}")
+    return lines
+
+
+class StageProfiler:
+    def __init__(self, mode, output_dir='profiles', top_n=20):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"지원하지 않는 프로파일 모드: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.top_n = top_n
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """설정에서 생성 (profile_mode가 'off'이면 None)"""
+        mode = config_manager.get_setting('profile_mode', 'off') or 'off'
+        if mode == 'off':
+            return None
+        return cls(mode, config_manager.get_setting('profile_dir', 'profiles'),
+                   config_manager.get_setting('profile_top_n', 20))
+
+    def run(self, stage, doc_name, log_callback, func, /, *args, **kwargs):
+        """
+        func를 측정하며 실행하고 결과 파일과 요약을 남깁니다. func의 반환값을 그대로 반환.
+        (앞의 인자는 위치 전용: func에 log_callback 등 같은 이름의 키워드 인자를 그대로 전달)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{doc_name}_{stage}")
+        log = log_callback or print
+        if self.mode == 'cprofile':
+            return self._run_cprofile(stage, prefix, log, func, *args, **kwargs)
+        return self._run_tracemalloc(stage, prefix, log, func, *args, **kwargs)
+
+    def _run_cprofile(self, stage, prefix, log, func, /, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 프로파일러가 이미 동작 중
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            path = prefix + '.prof'
+            profile.dump_stats(path)
+            lines = cprofile_summary(pstats.Stats(profile), self.top_n)
+            self._report(stage, f"{elapsed:.2f}s, 결과: {path}", lines, prefix, log)
+
+    def _run_tracemalloc(self, stage, prefix, log, func, /, *args, **kwargs):
+        # 이미 추적 중이면(벤치마크 메모리 측정 등) 그대로 두고 최대값만 초기화
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(10)
+        else:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_here:
+                tracemalloc.stop()
+            path = prefix + '.tracemalloc'
+            snapshot.dump(path)
+            lines = tracemalloc_summary(snapshot, self.top_n)
+            self._report(stage, f"{elapsed:.2f}s, 최대 {peak / 1024 ** 2:.1f}MB, "
+                                f"종료 시 {current / 1024 ** 2:.1f}MB, 결과: {path}", lines, prefix, log)
+
+    def _report(self, stage, headline, lines, prefix, log):
+        with open(prefix + '.txt', 'w', encoding='utf-8') as f:
+            f.write(headline + '\n' + '\n'.join(lines) + '\n')
+        log(f"[프로파일 {stage}] {headline}\n" + '\n'.join(lines))
+
+
+def profile_stage(stage):
+    """
+    처리 메서드 데코레이터. 프로세서의 설정(self.config)에 profile_mode가 켜져 있으면
+    첫 번째 인자(입력 PDF 또는 raw JSON 경로)의 이름으로 단계별 결과를 저장합니다.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler = StageProfiler.from_config(self.config)
+            if profiler is None or getattr(_active, 'stage', None):
+                return func(self, *args, **kwargs)
+            _active.stage = stage
+            try:
+                return profiler.run(stage, _doc_name(args[0] if args else 'document'),
+                                    kwargs.get('log_callback'), func, self, *args, **kwargs)
+            finally:
+                _active.stage = None
+        return wrapper
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 단계별 프로파일 요약 출력")
+    parser.add_argument('path', help=".prof 또는 .tracemalloc 파일")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+    if args.path.endswith('.tracemalloc'):
+        lines = tracemalloc_summary(tracemalloc.Snapshot.load(args.path), args.top)
+    else:
+        lines = cprofile_summary(pstats.Stats(args.path), args.top)
+    print('\n'.join(lines))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
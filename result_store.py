@@ -0,0 +1,187 @@
+"""
+문서 결과 저장소 모듈
+단계별 결과 파일(OCR/교정/결과 PDF)을 입력 내용의 해시로 보관해
+같은 PDF를 다른 이름이나 다른 폴더로 다시 올려도 이전 결과를 바로 재사용
+
+키 (입력 내용과 결과에 영향을 주는 설정의 SHA-256):
+  ocr      PDF 해시 + OCR 설정(dpi/레이아웃/전처리/양자화) + 페이지 범위
+  api      raw JSON 해시 + 교정 모델 (캐스케이드면 두 모델 조합)
+  overlay  교정 JSON 해시 + PDF 해시
+
+사용 예:
+  python result_store.py stats
+  python result_store.py clear
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from config_manager import ConfigManager
+from page_image_cache import file_sha256
+from page_store import settings_key
+from correction_cascade import correction_model_key
+
+# 단계별 보관 파일 (run_document의 출력 경로 키 → 저장소 파일 확장자)
+STAGE_FILES = {
+    'ocr': {'raw_json': '.raw.json'},
+    'api': {'corr_json': '.corr.json'},
+    'overlay': {'output_pdf': '.pdf', 'manifest': '.overlay.json'},
+}
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def ocr_key(pdf_hash, config_manager, start_page, end_page, page_count):
+    """OCR 결과 키 (페이지 범위는 None을 실제 페이지 번호로 바꿔 같은 범위면 같은 키)"""
+    return _digest({
+        'pdf': pdf_hash,
+        'settings': settings_key(config_manager),
+        'pages': [start_page or 1, end_page or page_count],
+    })
+
+
+def correction_key(raw_json, config_manager):
+    """교정 결과 키 (같은 OCR 결과를 같은 모델로 교정한 경우)"""
+    return _digest({
+        'raw': file_sha256(raw_json),
+        'model': correction_model_key(config_manager),
+    })
+
+
+def overlay_key(corr_json, pdf_hash):
+    """결과 PDF 키 (같은 원본에 같은 교정 결과를 덧씌운 경우)"""
+    return _digest({'corr': file_sha256(corr_json), 'pdf': pdf_hash})
+
+
+class DocumentResultStore:
+    def __init__(self, root_dir, max_bytes=4 * 1024 ** 3):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        os.makedirs(root_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """설정에서 저장소 생성 (비활성화 시 None)"""
+        if not config_manager.get_setting('result_store_enabled', False):
+            return None
+        return cls(
+            config_manager.get_setting('result_store_dir', 'result_store'),
+            max_bytes=int(config_manager.get_setting('result_store_max_mb', 4096) * 1024 * 1024),
+        )
+
+    def path_for(self, stage, key, name):
+        return os.path.join(self.root_dir, stage, key[:2], key + STAGE_FILES[stage][name])
+
+    def restore(self, stage, key, paths):
+        """
+        저장된 단계 결과를 paths(출력 경로 키 → 대상 경로)로 복사합니다.
+        해당 단계의 파일이 모두 있을 때만 복사하며, 복사했으면 True.
+        """
+        sources = {name: self.path_for(stage, key, name) for name in STAGE_FILES[stage]}
+        if not all(os.path.exists(p) for p in sources.values()):
+            return False
+        for name, src in sources.items():
+            # 결과 PDF는 이후 증분 저장으로 수정되므로 하드링크가 아닌 복사본을 둠
+            self._copy(src, paths[name])
+            try:
+                # LRU 판단용으로 수정 시각 갱신
+                os.utime(src)
+            except OSError:
+                pass
+        return True
+
+    def put(self, stage, key, paths):
+        """단계 결과 파일을 저장소에 복사합니다. 없는 파일이 있으면 저장하지 않고 False"""
+        if not all(os.path.exists(paths[name]) for name in STAGE_FILES[stage]):
+            return False
+        for name in STAGE_FILES[stage]:
+            self._copy(paths[name], self.path_for(stage, key, name))
+        self.evict()
+        return True
+
+    def _copy(self, src, dst):
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        tmp_path = f"{dst}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.root_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_ratio=0.9):
+        """
+        전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터
+        max_bytes * target_ratio 이하가 될 때까지 삭제합니다. 삭제한 파일 수 반환.
+        (결과 PDF와 매니페스트 중 하나만 남으면 restore가 건너뛰므로 짝을 맞출 필요는 없음)
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * target_ratio
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 결과 저장소 관리")
+    parser.add_argument('--config', default='config.json', help="설정 파일 경로")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help="저장소 크기 출력")
+    sub.add_parser('clear', help="저장소 비우기")
+
+    args = parser.parse_args()
+    config = ConfigManager(args.config)
+    store = DocumentResultStore(
+        config.get_setting('result_store_dir', 'result_store'),
+        max_bytes=int(config.get_setting('result_store_max_mb', 4096) * 1024 * 1024),
+    )
+
+    if args.command == 'stats':
+        entries = store._entries()
+        counts = {stage: 0 for stage in STAGE_FILES}
+        for _, _, path in entries:
+            stage = os.path.relpath(path, store.root_dir).split(os.sep)[0]
+            if stage in counts:
+                counts[stage] += 1
+        print(f"{len(entries)}개 파일 (" + ", ".join(f"{k} {v}" for k, v in counts.items()) + "), "
+              f"{sum(e[1] for e in entries) / 1024 ** 2:.1f}MB (최대 {store.max_bytes / 1024 ** 2:.0f}MB)")
+    elif args.command == 'clear':
+        store.clear()
+        print("결과 저장소를 비웠습니다.")
+
+
+if __name__ == "__main__":
+    main()
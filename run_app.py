@@ -1,10 +1,25 @@
 """
 GUI 애플리케이션 실행 테스트
+
+  python run_app.py --profile cprofile       단계별 cProfile 결과를 profiles/에 저장
+  python run_app.py --profile tracemalloc    단계별 메모리 할당 스냅샷 저장
 """
+import argparse
+
+parser = argparse.ArgumentParser(description="PDF OCR GUI 실행")
+parser.add_argument('--profile', choices=['off', 'cprofile', 'tracemalloc'], help="단계별 프로파일링 모드")
+parser.add_argument('--profile-dir', help="프로파일 결과 저장 폴더")
+args = parser.parse_args()
+overrides = {}
+if args.profile:
+    overrides['profile_mode'] = args.profile
+if args.profile_dir:
+    overrides['profile_dir'] = args.profile_dir
+
 try:
     from gui_app import main
     print("GUI 애플리케이션을 시작합니다...")
-    main()
+    main(overrides)
 except ImportError as e:
     print(f"모듈 임포트 오류: {e}")
     print("필요한 패키지가 설치되어 있는지 확인하세요.")
@@ -0,0 +1,288 @@
+"""
+검색 색인 모듈
+교정된 블록(_ocr_corr.json)을 SQLite FTS5 색인에 추가해 처리한 문서 전체를 빠르게 검색
+
+한국어/한자/가나는 띄어쓰기와 조사에 관계없이 부분 문자열로 찾을 수 있도록
+연속된 글자를 2글자 단위(bigram)로 나눠 색인하고, 그 밖의 단어는 소문자 단어 단위로 색인합니다.
+
+사용 예:
+  python search_index.py index 출력폴더/문서_ocr_corr.json --pdf 출력폴더/문서_recovered.pdf
+  python search_index.py index 출력폴더                     (폴더의 *_ocr_corr.json 전체)
+  python search_index.py search "교정 결과" --limit 20
+  python search_index.py stats
+"""
+import os
+import re
+import sys
+import json
+import time
+import glob
+import sqlite3
+import argparse
+import threading
+from config_manager import ConfigManager
+from page_image_cache import file_sha256
+
+# 한글 자모/음절, 가나, 한자
+_CJK = '\u1100-\u11ff\u3130-\u318f\uac00-\ud7a3\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff'
+_TOKEN_RE = re.compile(rf'([{_CJK}]+)|([^\W{_CJK}]+)')
+
+
+def to_grams(text):
+    """
+    색인용 토큰 문자열. 한국어 등은 겹치는 2글자 조각과 마지막 1글자,
+    그 밖의 단어는 소문자로 변환 ('한국어 OCR' → '한국 국어 어 ocr').
+    """
+    out = []
+    for cjk, word in _TOKEN_RE.findall(text):
+        if cjk:
+            out.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            out.append(cjk[-1])
+        else:
+            out.append(word.lower())
+    return ' '.join(out)
+
+
+def build_match_query(query):
+    """
+    검색어 → FTS5 MATCH 식. 공백으로 나눈 검색어는 모두 포함해야 하며(AND),
+    한국어 조각은 2글자 조각의 구(phrase)로 찾아 부분 문자열 일치가 됩니다.
+    한 글자 검색어는 그 글자로 시작하는 조각의 접두사 검색.
+    """
+    terms = []
+    for cjk, word in _TOKEN_RE.findall(query):
+        if cjk and len(cjk) == 1:
+            terms.append(f'"{cjk}"*')
+        elif cjk:
+            terms.append('"' + ' '.join(cjk[i:i + 2] for i in range(len(cjk) - 1)) + '"')
+        else:
+            terms.append(f'"{word.lower()}"')
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                corr_json TEXT UNIQUE NOT NULL,
+                source_pdf TEXT,
+                output_pdf TEXT,
+                content_hash TEXT,
+                pages INTEGER,
+                blocks INTEGER,
+                indexed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS blocks (
+                rowid INTEGER PRIMARY KEY,
+                doc_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                block_id INTEGER,
+                x_rel REAL, y_rel REAL, w_rel REAL, h_rel REAL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_blocks_doc ON blocks(doc_id);
+            -- 본문은 blocks 테이블에 두고 색인만 보관 (contentless)
+            CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+                grams, content='', tokenize='unicode61 remove_diacritics 2'
+            );
+        """)
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config_manager):
+        """설정에서 색인 생성 (비활성화 시 None)"""
+        if not config_manager.get_setting('search_index_enabled', False):
+            return None
+        return cls(config_manager.get_setting('search_index_path', 'search_index.sqlite3'))
+
+    def index_document(self, corr_json, source_pdf=None, output_pdf=None):
+        """
+        교정 결과 파일을 색인에 추가합니다. 이미 같은 내용으로 색인되어 있으면 건너뛰고,
+        다시 처리된 문서는 기존 블록을 지운 뒤 새로 색인합니다.
+        반환: 색인한 블록 수 (건너뛰면 0)
+        """
+        corr_json = os.path.abspath(corr_json)
+        content_hash = file_sha256(corr_json)
+        with open(corr_json, 'r', encoding='utf-8') as f:
+            blocks = json.load(f)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, content_hash FROM documents WHERE corr_json = ?", (corr_json,)
+            ).fetchone()
+            if row and row[1] == content_hash:
+                return 0
+            with self._conn:
+                if row:
+                    doc_id = row[0]
+                    self._delete_blocks(doc_id)
+                    self._conn.execute(
+                        "UPDATE documents SET source_pdf = COALESCE(?, source_pdf), "
+                        "output_pdf = COALESCE(?, output_pdf) WHERE doc_id = ?",
+                        (source_pdf and os.path.abspath(source_pdf),
+                         output_pdf and os.path.abspath(output_pdf), doc_id)
+                    )
+                else:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO documents (corr_json, source_pdf, output_pdf) VALUES (?, ?, ?)",
+                        (corr_json, source_pdf and os.path.abspath(source_pdf),
+                         output_pdf and os.path.abspath(output_pdf))
+                    ).lastrowid
+
+                count = 0
+                for b in blocks:
+                    if b.get('blank'):
+                        continue
+                    text = b.get('text_corrected', b.get('text_raw', ''))
+                    if not text.strip():
+                        continue
+                    rowid = self._conn.execute(
+                        "INSERT INTO blocks (doc_id, page, block_id, x_rel, y_rel, w_rel, h_rel, text) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (doc_id, b['page'], b.get('id'), b['x_rel'], b['y_rel'], b['w_rel'], b['h_rel'], text)
+                    ).lastrowid
+                    self._conn.execute(
+                        "INSERT INTO blocks_fts (rowid, grams) VALUES (?, ?)", (rowid, to_grams(text))
+                    )
+                    count += 1
+
+                self._conn.execute(
+                    "UPDATE documents SET content_hash = ?, pages = ?, blocks = ?, indexed_at = ? "
+                    "WHERE doc_id = ?",
+                    (content_hash, len({b['page'] for b in blocks}), count, time.time(), doc_id)
+                )
+        return count
+
+    def remove_document(self, corr_json):
+        """문서를 색인에서 삭제. 삭제했으면 True"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id FROM documents WHERE corr_json = ?", (os.path.abspath(corr_json),)
+            ).fetchone()
+            if not row:
+                return False
+            with self._conn:
+                self._delete_blocks(row[0])
+                self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (row[0],))
+        return True
+
+    def _delete_blocks(self, doc_id):
+        # contentless 테이블은 색인했던 값을 함께 넘겨야 삭제됨
+        rows = self._conn.execute("SELECT rowid, text FROM blocks WHERE doc_id = ?", (doc_id,)).fetchall()
+        self._conn.executemany(
+            "INSERT INTO blocks_fts (blocks_fts, rowid, grams) VALUES ('delete', ?, ?)",
+            [(rowid, to_grams(text)) for rowid, text in rows]
+        )
+        self._conn.execute("DELETE FROM blocks WHERE doc_id = ?", (doc_id,))
+
+    def search(self, query, limit=20, offset=0):
+        """
+        검색어가 모두 포함된 블록을 관련도 순으로 반환합니다.
+        반환: [{'source_pdf', 'output_pdf', 'corr_json', 'page', 'block_id', 'bbox', 'text', 'score'}, ...]
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.source_pdf, d.output_pdf, d.corr_json, b.page, b.block_id, "
+                "b.x_rel, b.y_rel, b.w_rel, b.h_rel, b.text, bm25(blocks_fts) AS score "
+                "FROM blocks_fts JOIN blocks b ON b.rowid = blocks_fts.rowid "
+                "JOIN documents d ON d.doc_id = b.doc_id "
+                "WHERE blocks_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+                (match, limit, offset)
+            ).fetchall()
+        return [
+            {
+                'source_pdf': r[0],
+                'output_pdf': r[1],
+                'corr_json': r[2],
+                'page': r[3],
+                'block_id': r[4],
+                'bbox': (r[5], r[6], r[7], r[8]),
+                'text': r[9],
+                'score': r[10],
+            }
+            for r in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            docs, blocks = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(blocks), 0) FROM documents"
+            ).fetchone()
+        return {'documents': docs, 'blocks': blocks}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="교정 결과 전문 검색 색인")
+    parser.add_argument('--config', default='config.json', help="설정 파일 경로")
+    parser.add_argument('--db', help="색인 파일 (기본: 설정의 search_index_path)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_index = sub.add_parser('index', help="교정 결과 파일/폴더 색인")
+    p_index.add_argument('paths', nargs='+', help="_ocr_corr.json 파일 또는 폴더")
+    p_index.add_argument('--pdf', help="원본 PDF 경로 (파일 하나를 색인할 때)")
+
+    p_search = sub.add_parser('search', help="검색")
+    p_search.add_argument('query')
+    p_search.add_argument('--limit', type=int, default=20)
+    p_search.add_argument('--json', action='store_true', help="JSON으로 출력")
+
+    p_remove = sub.add_parser('remove', help="문서 삭제")
+    p_remove.add_argument('corr_json')
+
+    sub.add_parser('stats', help="색인 통계")
+
+    args = parser.parse_args()
+    config = ConfigManager(args.config)
+    index = SearchIndex(args.db or config.get_setting('search_index_path', 'search_index.sqlite3'))
+    try:
+        if args.command == 'index':
+            files = []
+            for path in args.paths:
+                if os.path.isdir(path):
+                    files.extend(sorted(glob.glob(os.path.join(path, '*_ocr_corr.json'))))
+                else:
+                    files.append(path)
+            for corr_json in files:
+                output_pdf = corr_json[:-len('_ocr_corr.json')] + '_recovered.pdf' \
+                    if corr_json.endswith('_ocr_corr.json') else None
+                if output_pdf and not os.path.exists(output_pdf):
+                    output_pdf = None
+                count = index.index_document(corr_json, source_pdf=args.pdf if len(files) == 1 else None,
+                                             output_pdf=output_pdf)
+                print(f"{corr_json}: {count}개 블록 색인" if count else f"{corr_json}: 변경 없음")
+        elif args.command == 'search':
+            start = time.perf_counter()
+            hits = index.search(args.query, limit=args.limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if args.json:
+                json.dump(hits, sys.stdout, ensure_ascii=False, indent=2)
+                print()
+            else:
+                for hit in hits:
+                    doc = hit['source_pdf'] or hit['output_pdf'] or hit['corr_json']
+                    print(f"{doc} p.{hit['page']} "
+                          f"[{', '.join(f'{v:.3f}' for v in hit['bbox'])}] {hit['text']}")
+                print(f"\n{len(hits)}건 ({elapsed_ms:.1f}ms)")
+        elif args.command == 'remove':
+            print("삭제했습니다." if index.remove_document(args.corr_json) else "색인에 없는 문서입니다.")
+        elif args.command == 'stats':
+            stats = index.stats()
+            print(f"문서 {stats['documents']}개, 블록 {stats['blocks']}개")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
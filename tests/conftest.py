@@ -0,0 +1,56 @@
+"""테스트 공통 설정: 저장소 루트 모듈 import 경로와 가짜 LLM 클라이언트"""
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class FakeChatClient:
+    """
+    OpenAI 클라이언트 대역. 요청 프롬프트를 기록하고 respond(model, lines)가 돌려준 줄로 응답합니다.
+    lines는 프롬프트의 '[번호] 텍스트' 줄 목록이며, 기본 응답은 받은 줄 그대로입니다.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda model, lines: lines)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        prompt = messages[-1]['content']
+        self.prompts.append((model, prompt))
+        lines = [line for line in prompt.split('\n') if re.match(r'^\[\d+\]', line)]
+        content = '\n'.join(self.respond(model, lines))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt), completion_tokens=len(content),
+                                  total_tokens=len(prompt) + len(content)),
+        )
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_api(tmp_path):
+    """가짜 클라이언트를 쓰는 APIProcessor 생성기: make(settings, respond) → (api, client)"""
+    pytest.importorskip('httpx')
+    from config_manager import ConfigManager
+    from api_processor import APIProcessor
+
+    def make(settings=None, respond=None):
+        config = ConfigManager(str(tmp_path / 'config.json'))
+        config.override_settings(settings or {})
+        api = APIProcessor(config)
+        api.token_usage_file = str(tmp_path / 'token_usage.json')
+        client = FakeChatClient(respond)
+        api.clients.get = lambda api_key, base_url=None: client
+        return api, client
+
+    return make
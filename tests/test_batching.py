@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+
+import pytest
+
+from config_manager import ConfigManager
+from layout_processor import LayoutProcessor
+
+
+def _box(text, x, y, page=1, w=0.05, h=0.012):
+    return {'page': page, 'text_raw': text, 'confidence': 0.9,
+            'x_rel': x, 'y_rel': y, 'w_rel': w, 'h_rel': h, 'font_size': 10}
+
+
+@pytest.fixture
+def layout(tmp_path):
+    return LayoutProcessor(ConfigManager(str(tmp_path / 'config.json')))
+
+
+def test_layout_reading_order_sorts_detection_order(layout):
+    # 같은 줄 단어의 세로 위치가 조금씩 달라 섞여 검출된 순서
+    blocks = [_box('b', 0.16, 0.0996), _box('a', 0.10, 0.1003), _box('d', 0.10, 0.2),
+              _box('c', 0.22, 0.1004), _box('e', 0.16, 0.1999)]
+    order = layout.reading_order(blocks)
+    assert [blocks[i]['text_raw'] for i in order] == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_layout_reading_order_keeps_grouped_blocks(layout):
+    # line/paragraph 모드 블록은 OCR 단계에서 이미 읽기 순서로 저장됨
+    blocks = [dict(_box('second', 0.1, 0.5), boxes=[]), dict(_box('first', 0.1, 0.1), boxes=[])]
+    assert layout.reading_order(blocks) == [0, 1]
+
+
+def _items(pages, words_per_page):
+    items = []
+    for page in range(1, pages + 1):
+        for n in reversed(range(words_per_page)):
+            # 페이지 안에서 아래 줄부터 검출된 순서
+            items.append(_box(f"p{page}w{n}", 0.1, 0.1 + n * 0.03, page=page))
+    for n, b in enumerate(items):
+        b['id'] = n
+    return items
+
+
+def _spans(items):
+    spans = []
+    for idx, b in enumerate(items):
+        if spans and spans[-1][0] == b['page']:
+            spans[-1][2] = idx + 1
+        else:
+            spans.append([b['page'], idx, idx + 1])
+    return spans
+
+
+def test_reading_order_chunks_keep_pages_whole(fake_api):
+    api, _ = fake_api()
+    items = _items(3, 4)
+    chunks = api._reading_order_chunks(items, _spans(items), {}, 0, 9)
+    assert [(s, e) for s, e, _ in chunks] == [(0, 8), (8, 12)]
+    assert [items[i]['text_raw'] for i in chunks[0][2]] == [f"p1w{n}" for n in range(4)] + \
+        [f"p2w{n}" for n in range(4)]
+
+
+def test_reading_order_chunks_split_large_page(fake_api):
+    api, _ = fake_api()
+    items = _items(2, 5)
+    chunks = api._reading_order_chunks(items, _spans(items), {3: 'x'}, 0, 2)
+    # 큰 페이지의 앞 조각은 빈 구간, 마지막 조각이 페이지 구간을 완료
+    assert [(s, e) for s, e, _ in chunks] == [(0, 0), (0, 5), (5, 5), (5, 5), (5, 10)]
+    requested = [i for _, _, indices in chunks for i in indices]
+    assert sorted(requested) == [i for i in range(10) if i != 3]
+
+
+def test_reading_order_run_sends_context_and_maps_results(fake_api, tmp_path):
+    api, client = fake_api(
+        {'batch_strategy': 'reading_order', 'batch_size': 3, 'batch_context_lines': 1},
+        respond=lambda model, lines: [line + '!' for line in lines],
+    )
+    items = _items(2, 4)
+    raw_json = str(tmp_path / 'doc_ocr_raw.json')
+    with open(raw_json, 'w', encoding='utf-8') as f:
+        json.dump(items, f)
+    pages = []
+    result = api.recover_text_with_api(raw_json, str(tmp_path / 'doc_ocr_corr.json'), 'key',
+                                       page_callback=lambda page, blocks: pages.append(page))
+    assert all(b['text_corrected'] == b['text_raw'] + '!' for b in result)
+    assert pages == [1, 2]
+    # 나뉜 페이지의 두 번째 배치 앞에는 첫 배치의 마지막 줄이 참고 문맥으로 들어감
+    assert '> p1w2\n교정할 줄:\n[0] p1w3' in client.prompts[1][1]
+    assert api.last_batching['fallback_blocks'] == 0
+
+
+def test_flat_is_default_and_sends_file_order(fake_api, tmp_path):
+    api, client = fake_api({'batch_size': 100})
+    items = _items(1, 3)
+    raw_json = str(tmp_path / 'doc_ocr_raw.json')
+    with open(raw_json, 'w', encoding='utf-8') as f:
+        json.dump(items, f)
+    api.recover_text_with_api(raw_json, str(tmp_path / 'doc_ocr_corr.json'), 'key')
+    assert api.last_batching['strategy'] == 'flat'
+    assert '>' not in client.prompts[0][1]
+    assert client.prompts[0][1].index('p1w2') < client.prompts[0][1].index('p1w0')
+
+
+def test_token_usage_adds_to_other_workers_usage(fake_api, tmp_path):
+    other, _ = fake_api()
+
+    def respond(model, lines):
+        # 교정 도중 같은 사용량 파일을 쓰는 다른 워커가 토큰을 사용
+        other.add_token_usage(1000)
+        return lines
+
+    api, _ = fake_api({'batch_size': 2}, respond=respond)
+    items = _items(1, 4)
+    raw_json = str(tmp_path / 'doc_ocr_raw.json')
+    with open(raw_json, 'w', encoding='utf-8') as f:
+        json.dump(items, f)
+    api.recover_text_with_api(raw_json, str(tmp_path / 'doc_ocr_corr.json'), 'key')
+    assert api.load_token_usage() == 2000 + api.last_batching['tokens']
+
+
+def test_concurrent_token_usage_updates_are_not_lost(fake_api, tmp_path):
+    apis = [fake_api()[0] for _ in range(4)]
+    seen = []
+
+    def work(api):
+        for _ in range(50):
+            api.add_token_usage(1)
+            seen.append(api.load_token_usage())
+
+    threads = [threading.Thread(target=work, args=(api,)) for api in apis for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert apis[0].load_token_usage() == 400
+    # 교체 저장이므로 쓰는 중에 읽어도 잘린 파일(0)을 보지 않음
+    assert min(seen) > 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
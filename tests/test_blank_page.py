@@ -0,0 +1,45 @@
+import fitz
+import pytest
+
+pytest.importorskip('easyocr')
+
+from config_manager import ConfigManager
+from ocr_processor import OCRProcessor
+
+
+@pytest.fixture
+def ocr(tmp_path):
+    return OCRProcessor(ConfigManager(str(tmp_path / 'config.json')))
+
+
+def _page(background=None, text_color=None):
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    if background is not None:
+        page.draw_rect(page.rect, color=background, fill=background)
+    if text_color is not None:
+        for i in range(20):
+            page.insert_text((60, 80 + i * 30), "The quick brown fox jumps over the lazy dog",
+                             fontsize=14, color=text_color)
+    return doc, page
+
+
+def test_white_page_is_blank(ocr):
+    doc, page = _page()
+    assert ocr.is_blank_page(page)
+
+
+def test_dark_text_is_not_blank(ocr):
+    doc, page = _page(text_color=(0, 0, 0))
+    assert not ocr.is_blank_page(page)
+
+
+def test_inverted_page_is_not_blank(ocr):
+    # 어두운 배경(중앙값 < 40)에 밝은 글자
+    doc, page = _page(background=(0.05, 0.05, 0.05), text_color=(1, 1, 1))
+    assert not ocr.is_blank_page(page)
+
+
+def test_uniform_dark_page_is_blank(ocr):
+    doc, page = _page(background=(0.1, 0.1, 0.1))
+    assert ocr.is_blank_page(page)
@@ -0,0 +1,39 @@
+from block_diff import changed_pages, page_digests, reuse_corrections
+
+
+def _block(page, raw, corrected=None, y=0.1, **extra):
+    b = {'page': page, 'text_raw': raw, 'x_rel': 0.1, 'y_rel': y, 'w_rel': 0.3, 'h_rel': 0.02, 'font_size': 10}
+    if corrected is not None:
+        b['text_corrected'] = corrected
+    b.update(extra)
+    return b
+
+
+def test_reuse_matches_page_and_text_in_order():
+    old = [_block(1, '가나', '가나다'), _block(1, '반복', '반복1'), _block(1, '반복', '반복2'),
+           _block(2, '가나', '다른 페이지')]
+    new = [_block(1, '반복'), _block(1, '새 줄'), _block(1, '가나'), _block(1, '반복'), _block(1, '반복'),
+           _block(3, '가나')]
+    assert reuse_corrections(old, new) == {0: '반복1', 2: '가나다', 3: '반복2'}
+
+
+def test_reuse_skips_blank_and_uncorrected_blocks():
+    old = [_block(1, '', '', blank=True), _block(1, '미교정'), 'broken']
+    new = [_block(1, '', blank=True), _block(1, '미교정')]
+    assert reuse_corrections(old, new) == {}
+
+
+def test_changed_pages_detects_text_position_and_removal():
+    base = [_block(1, 'a', 'A'), _block(2, 'b', 'B'), _block(3, 'c', 'C')]
+    edited = [_block(1, 'a', 'A'), _block(2, 'b', 'B2'), _block(4, 'd', 'D'),
+              _block(1, 'e', 'E', y=0.5)]
+    assert changed_pages(page_digests(base), page_digests(edited)) == [1, 2, 3, 4]
+    assert changed_pages(page_digests(base), page_digests(list(base))) == []
+
+    moved = [dict(base[0], y_rel=0.2)] + base[1:]
+    assert changed_pages(page_digests(base), page_digests(moved)) == [1]
+
+
+def test_blank_pages_have_no_digest():
+    digests = page_digests([_block(1, '', '', blank=True), _block(2, 'x', 'X')])
+    assert list(digests) == ['2']
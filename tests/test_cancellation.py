@@ -0,0 +1,80 @@
+import json
+import os
+import time
+
+import pytest
+
+from cancellation import CancellationToken, OperationCancelled
+
+
+def test_cancel_runs_callbacks_once():
+    token = CancellationToken()
+    calls = []
+    token.register(lambda: calls.append('a'))
+    removed = lambda: calls.append('removed')
+    token.register(removed)
+    token.unregister(removed)
+
+    token.cancel()
+    token.cancel()
+    assert calls == ['a']
+    assert token.is_cancelled()
+    with pytest.raises(OperationCancelled):
+        token.raise_if_cancelled()
+
+    # 이미 취소된 토큰에 등록하면 바로 호출
+    token.register(lambda: calls.append('late'))
+    assert calls == ['a', 'late']
+
+
+def test_callback_error_does_not_stop_others():
+    token = CancellationToken()
+    calls = []
+    token.register(lambda: 1 / 0)
+    token.register(lambda: calls.append('next'))
+    token.cancel()
+    assert calls == ['next']
+
+
+def test_wait_wakes_up_on_cancel():
+    token = CancellationToken()
+    assert token.wait(0.01) is False
+    token.cancel()
+    start = time.perf_counter()
+    assert token.wait(10) is True
+    assert time.perf_counter() - start < 1
+
+
+def _write_raw(path, count):
+    blocks = [{'id': i, 'page': 1 + i // 3, 'text_raw': f"t{i}", 'confidence': 0.5,
+               'x_rel': 0.1, 'y_rel': 0.1 * (i % 3 + 1), 'w_rel': 0.2, 'h_rel': 0.02, 'font_size': 10}
+              for i in range(count)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(blocks, f)
+
+
+def test_cancelled_correction_resumes_from_checkpoint(fake_api, tmp_path):
+    token = CancellationToken()
+    batches = []
+
+    def respond(model, lines):
+        batches.append(lines)
+        if len(batches) == 2:
+            token.cancel()
+        return [line + '!' for line in lines]
+
+    api, _ = fake_api({'batch_size': 2}, respond)
+    raw_json, corr_json = str(tmp_path / 'doc_ocr_raw.json'), str(tmp_path / 'doc_ocr_corr.json')
+    _write_raw(raw_json, 6)
+
+    with pytest.raises(OperationCancelled):
+        api.recover_text_with_api(raw_json, corr_json, 'sk-test', cancel_token=token)
+    assert len(batches) == 2
+    assert os.path.exists(corr_json + '.partial')
+    assert not os.path.exists(corr_json)
+
+    batches.clear()
+    blocks = api.recover_text_with_api(raw_json, corr_json, 'sk-test', cancel_token=CancellationToken())
+    assert batches == [['[4] t4', '[5] t5']]
+    assert [b['text_corrected'] for b in blocks] == [f"t{i}!" for i in range(6)]
+    assert not os.path.exists(corr_json + '.partial')
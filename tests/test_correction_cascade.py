@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from correction_cascade import CascadeValidator, CostLedger, charset_anomaly, edit_ratio
+
+
+@pytest.fixture
+def validator():
+    return CascadeValidator(max_edit_ratio=0.4, min_confidence=0.3, max_length_ratio=1.8)
+
+
+def test_validator_passes_small_fix(validator):
+    assert validator.check({'text_raw': '문서 처리 결괴', 'confidence': 0.9}, '문서 처리 결과') is None
+
+
+@pytest.mark.parametrize('block, corrected, reason', [
+    ({'text_raw': 'hello world'}, None, '응답 누락'),
+    ({'text_raw': 'hello world', 'confidence': 0.1}, 'hello world', '낮은 OCR 신뢰도'),
+    ({'text_raw': 'hello'}, 'hello ' * 10, '길이 변화'),
+    ({'text_raw': '한국어 문장'}, '한국어 文章文章', '문자 체계 이상'),
+    ({'text_raw': 'quick brown fox'}, 'lazy dogs sleep', '원문과 차이 큼'),
+])
+def test_validator_rejects(validator, block, corrected, reason):
+    assert validator.check(block, corrected).startswith(reason)
+
+
+def test_charset_anomaly_flags_replacement_character():
+    assert charset_anomaly('abc', 'a�c')
+    assert not charset_anomaly('abc 한글', 'abd 한글')
+
+
+def test_edit_ratio_bounds():
+    assert edit_ratio('', '') == 0.0
+    assert edit_ratio('abc', 'abc') == 0.0
+    assert edit_ratio('abc', 'xyz') == 1.0
+
+
+def test_cost_ledger_summary():
+    ledger = CostLedger({'fast': [1.0, 2.0]})
+    ledger.record('fast', 'fast', 0.5, type('U', (), {'prompt_tokens': 1000, 'completion_tokens': 500})(), 10)
+    ledger.record('strong', 'strong', 1.0, None, 2)
+    ledger.record_escalations(10, ['응답 누락', '낮은 OCR 신뢰도 0.10'])
+    data = ledger.summary()
+    assert data['tiers']['fast']['cost_usd'] == pytest.approx(0.002)
+    assert data['tiers']['strong']['cost_usd'] is None and data['cost_usd'] is None
+    assert data['escalation_reasons'] == {'응답 누락': 1, '낮은 OCR 신뢰도': 1}
+
+
+def test_strong_model_replaces_only_escalated_lines(fake_api, tmp_path):
+    def respond(model, lines):
+        if model == 'fast':
+            # 1번 줄만 길게 망가뜨려 승격
+            return [line * 4 if line.startswith('[1]') else line for line in lines]
+        # 강한 모델이 요청하지 않은 0번 줄까지 섞어 응답
+        return [line.replace('bravo', 'BRAVO') for line in lines] + ['[0] overwritten']
+
+    api, client = fake_api({'correction_mode': 'cascade', 'cascade_fast_model': 'fast',
+                            'cascade_strong_model': 'strong'}, respond)
+    items = [{'page': 1, 'id': 0, 'text_raw': 'alpha line', 'confidence': 0.9},
+             {'page': 1, 'id': 1, 'text_raw': 'bravo line', 'confidence': 0.9}]
+    raw_json = str(tmp_path / 'doc_ocr_raw.json')
+    with open(raw_json, 'w', encoding='utf-8') as f:
+        json.dump(items, f)
+    result = api.recover_text_with_api(raw_json, str(tmp_path / 'doc_ocr_corr.json'), 'key')
+    assert [b['text_corrected'] for b in result] == ['alpha line', 'BRAVO line']
+    assert [model for model, _ in client.prompts] == ['fast', 'strong']
+    assert api.last_cost['lines_escalated'] == 1
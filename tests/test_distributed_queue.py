@@ -0,0 +1,205 @@
+import json
+import multiprocessing
+import os
+import time
+
+import fitz
+import pytest
+
+from config_manager import ConfigManager
+from distributed_ocr import SharedJobQueue, DistributedWorker, DistributedCoordinator
+
+
+@pytest.fixture
+def queue(tmp_path):
+    input_pdf = str(tmp_path / 'in.pdf')
+    doc = fitz.open()
+    for _ in range(5):
+        doc.new_page()
+    doc.save(input_pdf)
+    doc.close()
+    q = SharedJobQueue(str(tmp_path / 'job'), lease_seconds=60)
+    q.create_job(input_pdf, None, None, 2, {}, max_attempts=2)
+    return q
+
+
+def _lease_path(queue, unit):
+    return f"{queue.lease_dir}/{unit}.lease"
+
+
+def test_claim_is_exclusive(queue):
+    assert queue.load_job()['units'] == ['00001-00002', '00003-00004', '00005-00005']
+    claimed = [queue.claim(f"w{n}") for n in range(4)]
+    assert claimed == ['00001-00002', '00003-00004', '00005-00005', None]
+
+
+def test_expired_lease_is_reclaimed(queue):
+    unit = queue.claim('w1')
+    with open(_lease_path(queue, unit), 'w') as f:
+        json.dump({'worker': 'w1', 'expires_at': time.time() - 1}, f)
+    assert queue.claim('w2') == unit
+    # 점유를 잃은 워커는 갱신하지 못함
+    assert queue.renew(unit, 'w1') is False
+    assert queue.renew(unit, 'w2') is True
+
+
+def test_renew_refuses_near_expiry_without_overwriting(queue):
+    unit = queue.claim('w1')
+    expires_at = time.time() + 1
+    with open(_lease_path(queue, unit), 'w') as f:
+        json.dump({'worker': 'w1', 'expires_at': expires_at}, f)
+    assert queue.renew(unit, 'w1') is False
+    with open(_lease_path(queue, unit)) as f:
+        assert json.load(f)['expires_at'] == expires_at
+
+
+def test_renew_extends_own_lease(queue):
+    unit = queue.claim('w1')
+    with open(_lease_path(queue, unit)) as f:
+        before = json.load(f)['expires_at']
+    time.sleep(0.01)
+    assert queue.renew(unit, 'w1') is True
+    with open(_lease_path(queue, unit)) as f:
+        assert json.load(f)['expires_at'] > before
+
+
+class _FailingOCR:
+    def __init__(self):
+        self.calls = 0
+
+    def preprocess_pdf(self, *args, **kw):
+        self.calls += 1
+        raise RuntimeError("손상된 페이지")
+
+
+def test_unit_fails_after_max_attempts(queue, tmp_path):
+    worker = DistributedWorker(ConfigManager(str(tmp_path / 'config.json')), queue.job_dir,
+                               worker_id='w1', log_callback=lambda msg: None)
+    worker.ocr_processor = _FailingOCR()
+    job = queue.load_job()
+
+    for _ in range(2):
+        assert queue.claim('w1') == '00001-00002'
+        assert worker._process_unit(job, '00001-00002') is False
+
+    assert worker.ocr_processor.calls == 2
+    assert queue.failed_units() == {'00001-00002': '손상된 페이지'}
+    assert queue.pending_units() == ['00003-00004', '00005-00005']
+    assert queue.claim('w1') == '00003-00004'
+
+
+def test_merge_reports_failed_units(queue, tmp_path):
+    for unit in ('00003-00004', '00005-00005'):
+        with open(queue.result_path(unit), 'w') as f:
+            json.dump([], f)
+    for _ in range(2):
+        queue.claim('w1')
+        queue.record_failure('00001-00002', 'w1', '손상된 페이지')
+
+    coordinator = DistributedCoordinator(ConfigManager(str(tmp_path / 'config.json')), queue.job_dir)
+    with pytest.raises(Exception, match='DISTRIBUTED_ERROR: .*00001-00002'):
+        coordinator.wait_and_merge(str(tmp_path / 'out.json'), poll_interval=0)
+
+
+def test_fresh_or_unreadable_lease_is_not_taken(queue):
+    unit = queue.claim('w1')
+    # 다른 워커가 막 게시 중인 것처럼 보이는 빈 lease: 수정 시각이 최근이면 건드리지 않음
+    open(_lease_path(queue, unit), 'w').close()
+    assert queue.claim('w2') == '00003-00004'
+    assert os.path.exists(_lease_path(queue, unit))
+
+
+def test_stale_check_puts_back_lease_claimed_meanwhile(queue, monkeypatch):
+    unit = queue.claim('w1')
+    checks = []
+    real = queue._lease_expired
+
+    def expired_then_fresh(path):
+        # 첫 확인은 만료로 보였지만 rename 직전에 다른 워커가 새로 점유한 상황
+        checks.append(path)
+        return len(checks) == 1 or real(path)
+
+    monkeypatch.setattr(queue, '_lease_expired', expired_then_fresh)
+    assert queue.claim('w2') == '00003-00004'
+    assert queue.owns(unit, 'w1')
+    assert not [name for name in os.listdir(queue.lease_dir) if 'stale' in name]
+
+
+def test_complete_after_lost_lease_does_not_publish(queue):
+    unit = queue.claim('w1')
+    work_json = queue.work_path(unit, 'w1')
+    assert work_json != queue.work_path(unit, 'w2')
+    with open(_lease_path(queue, unit), 'w') as f:
+        json.dump({'worker': 'w1', 'expires_at': time.time() - 1}, f)
+    assert queue.claim('w2') == unit
+
+    with open(work_json, 'w') as f:
+        json.dump(['old'], f)
+    assert queue.complete(unit, 'w1', work_json) is False
+    assert not os.path.exists(queue.result_path(unit)) and not os.path.exists(work_json)
+    assert queue.owns(unit, 'w2')
+
+
+def test_crashed_claims_count_as_attempts(queue):
+    for n in range(2):
+        assert queue.claim(f"w{n}") == '00001-00002'
+        # 워커가 lease를 남긴 채 죽음
+        with open(_lease_path(queue, '00001-00002'), 'w') as f:
+            json.dump({'worker': f"w{n}", 'expires_at': time.time() - 1}, f)
+
+    assert '00001-00002' in queue.failed_units()
+    assert queue.claim('w9') == '00003-00004'
+
+
+def test_last_attempt_in_progress_is_not_failed(queue):
+    queue.claim('w1')
+    queue.record_failure('00001-00002', 'w1', '손상된 페이지')
+    assert queue.claim('w2') == '00001-00002'
+    assert queue.failed_units() == {}
+    assert not queue.is_done()
+
+
+def test_cancelled_attempt_is_refunded(queue):
+    queue.claim('w1')
+    assert queue.release('00001-00002', 'w1', refund=True) is True
+    queue.claim('w2')
+    queue.record_failure('00001-00002', 'w2', '손상된 페이지')
+    assert queue.failed_units() == {}
+
+
+def _claim_loop(job_dir, worker_id, out):
+    q = SharedJobQueue(job_dir, lease_seconds=60)
+    claimed = []
+    while True:
+        unit = q.claim(worker_id)
+        if unit is None:
+            break
+        work_json = q.work_path(unit, worker_id)
+        with open(work_json, 'w') as f:
+            json.dump([worker_id], f)
+        assert q.complete(unit, worker_id, work_json)
+        claimed.append(unit)
+    out.put(claimed)
+
+
+def test_processes_claim_each_unit_once(tmp_path):
+    input_pdf = str(tmp_path / 'in.pdf')
+    doc = fitz.open()
+    for _ in range(40):
+        doc.new_page()
+    doc.save(input_pdf)
+    doc.close()
+    queue = SharedJobQueue(str(tmp_path / 'job'), lease_seconds=60)
+    queue.create_job(input_pdf, None, None, 1, {})
+
+    out = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_claim_loop, args=(queue.job_dir, f"p{n}", out)) for n in range(8)]
+    for p in procs:
+        p.start()
+    claims = [unit for _ in procs for unit in out.get(timeout=60)]
+    for p in procs:
+        p.join(timeout=60)
+
+    assert sorted(claims) == queue.load_job()['units']
+    assert queue.is_done() and queue.failed_units() == {}
+    assert not os.listdir(queue.lease_dir) and not os.listdir(queue.work_dir)
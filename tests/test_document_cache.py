@@ -0,0 +1,62 @@
+import os
+
+import fitz
+import pytest
+
+from document_cache import DocumentCache
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / 'doc.pdf')
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    doc.new_page(width=842, height=595)
+    doc.new_page(width=300, height=400)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_page_count_does_not_load_page_sizes(pdf_path):
+    cache = DocumentCache()
+    assert cache.page_count(pdf_path) == 3
+    info = next(iter(cache._info.values()))
+    assert 'page_sizes' not in info and 'sizes' not in info
+
+
+def test_page_size_reads_only_requested_page(pdf_path):
+    cache = DocumentCache()
+    assert cache.page_size(pdf_path, 2) == (842, 595)
+    info = next(iter(cache._info.values()))
+    assert set(info['sizes']) == {2}
+    assert cache.page_sizes(pdf_path) == [(595, 842), (842, 595), (300, 400)]
+
+
+def test_info_follows_file_changes(pdf_path):
+    cache = DocumentCache()
+    assert cache.page_count(pdf_path) == 3
+    doc = fitz.open(pdf_path)
+    doc.new_page()
+    doc.save(pdf_path + '.new')
+    doc.close()
+    os.replace(pdf_path + '.new', pdf_path)
+    assert cache.page_count(pdf_path) == 4
+
+
+def test_lru_closes_unused_handles(tmp_path):
+    paths = []
+    for n in range(3):
+        path = str(tmp_path / f'{n}.pdf')
+        doc = fitz.open()
+        doc.new_page()
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    cache = DocumentCache(max_open=2)
+    for path in paths:
+        with cache.document(path) as doc:
+            assert len(doc) == 1
+    assert cache.stats()['open'] == 2
+    cache.close_all()
+    assert cache.stats()['open'] == 0
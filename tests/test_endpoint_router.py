@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+pytest.importorskip('httpx')
+
+from config_manager import ConfigManager
+from endpoint_router import Endpoint, EndpointRouter
+
+
+def _router(n=2, **kw):
+    endpoints = [Endpoint(f"ep{i}", None, 'key', 'model', max_concurrency=1) for i in range(n)]
+    return EndpointRouter(endpoints, **kw), endpoints
+
+
+def test_ewma_latency_and_error_rate():
+    router, (a, _) = _router()
+    for seconds in (1.0, 2.0):
+        assert router.acquire() is a
+        router.release(a, seconds, ok=True)
+    assert a.latency == pytest.approx(1.3)
+    assert router.acquire() is a
+    router.release(a, 10.0, ok=False)
+    assert a.latency == pytest.approx(1.3)
+    assert a.error_rate == pytest.approx(0.3)
+
+
+def test_acquire_prefers_fast_endpoint_until_busy():
+    router, (a, b) = _router()
+    a.latency, b.latency = 3.0, 1.0
+    assert router.acquire() is b
+    # b가 동시 요청 한도에 도달하면 느린 a로
+    assert router.acquire() is a
+    assert router.acquire(exclude=[a, b]) is None
+
+
+def test_circuit_opens_after_threshold_and_probes_after_cooldown():
+    router, (a, b) = _router(failure_threshold=2, cooldown_seconds=0.05)
+    for _ in range(2):
+        assert router.acquire(exclude=[b]) is a
+        router.release(a, 0.1, ok=False)
+    assert a.open_until > time.monotonic()
+    assert router.acquire() is b
+    router.release(b, 5.0, ok=True)
+
+    time.sleep(0.06)
+    assert router.acquire(exclude=[b]) is a and a.probing
+    # 상태 확인 요청 중에는 다른 요청을 보내지 않음
+    assert not a.available(time.monotonic())
+    assert router.acquire() is b
+    router.release(b, 5.0, ok=True)
+    router.release(a, 0.1, ok=False)
+    assert a.open_until > time.monotonic() and not a.probing
+
+    time.sleep(0.06)
+    assert router.acquire(exclude=[b]) is a
+    router.release(a, 0.1, ok=True)
+    assert a.open_until == 0.0 and a.consecutive_failures == 0
+
+
+def test_single_endpoint_is_never_opened():
+    router, (a,) = _router(n=1, failure_threshold=1)
+    for _ in range(3):
+        assert router.acquire() is a
+        router.release(a, 0.1, ok=False)
+    assert a.open_until == 0.0
+
+
+def test_request_fails_over_to_other_endpoint():
+    router, (a, b) = _router()
+    calls = []
+
+    def send(ep):
+        calls.append(ep.name)
+        if ep is a:
+            raise Exception("SERVER_ERROR: 502")
+        return 'ok'
+
+    assert router.request(send) == 'ok'
+    assert calls == ['ep0', 'ep1']
+    assert a.consecutive_failures == 1 and b.consecutive_failures == 0
+
+
+def test_request_does_not_fail_over_non_retryable_errors():
+    router, _ = _router()
+    calls = []
+
+    def send(ep):
+        calls.append(ep.name)
+        raise Exception("TOKEN_LIMIT_ERROR: 입력이 너무 김")
+
+    with pytest.raises(Exception, match='TOKEN_LIMIT_ERROR'):
+        router.request(send)
+    assert calls == ['ep0']
+
+
+def test_request_raises_last_error_when_all_fail():
+    router, _ = _router()
+
+    def send(ep):
+        raise Exception(f"SERVER_ERROR: {ep.name}")
+
+    with pytest.raises(Exception, match='SERVER_ERROR: ep1'):
+        router.request(send)
+
+
+def test_from_config_fills_defaults(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings({'api_endpoints': [{'name': 'a', 'max_concurrency': 4},
+                                                {'base_url': 'http://127.0.0.1:8000/v1', 'model': 'local'}]})
+    router = EndpointRouter.from_config(config, 'sk-test')
+    a, local = router.endpoints
+    assert (a.name, a.api_key, a.model, a.max_concurrency) == ('a', 'sk-test', config.get_setting('base_model'), 4)
+    assert (local.name, local.base_url, local.model) == ('http://127.0.0.1:8000/v1', 'http://127.0.0.1:8000/v1', 'local')
+    assert router.total_concurrency == 5
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+from config_manager import ConfigManager
+from image_preprocessor import ImagePreprocessor
+
+
+def _preprocessor(tmp_path, **settings):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings(settings)
+    return ImagePreprocessor(config)
+
+
+def _text_page():
+    img = np.full((600, 800), 255, np.uint8)
+    for row in range(10):
+        cv2.rectangle(img, (100, 60 + row * 50), (700, 75 + row * 50), 0, -1)
+    return img
+
+
+def _skewed(img, angle):
+    matrix = cv2.getRotationMatrix2D((img.shape[1] / 2, img.shape[0] / 2), angle, 1.0)
+    return cv2.warpAffine(img, matrix, (img.shape[1], img.shape[0]), borderValue=255), matrix
+
+
+@pytest.mark.parametrize('angle', [-3.0, 0.0, 4.5])
+def test_estimate_skew_finds_correction_angle(tmp_path, angle):
+    skewed, _ = _skewed(_text_page(), angle)
+    assert _preprocessor(tmp_path).estimate_skew(skewed) == pytest.approx(-angle, abs=0.15)
+
+
+def test_blank_page_is_not_rotated(tmp_path):
+    blank = np.full((300, 400, 3), 255, np.uint8)
+    out, transform = _preprocessor(tmp_path, preprocess_steps=['deskew']).process(blank)
+    assert transform is None and out is blank
+
+
+def test_deskew_maps_points_back_to_original(tmp_path):
+    skewed, matrix = _skewed(_text_page(), -3.0)
+    pre = _preprocessor(tmp_path, preprocess_steps=['grayscale', 'deskew'])
+    out, transform = pre.process(np.dstack([skewed] * 3))
+    assert out.shape == (600, 800) and transform is not None
+    # 보정된 이미지의 좌표 → 입력(기울어진) 이미지 좌표
+    expected = matrix @ np.array([100.0, 60.0, 1.0])
+    assert np.allclose(pre.map_points([[100, 60]], transform), [expected], atol=0.5)
+    assert set(pre.timings) == {'grayscale', 'deskew'}
+
+
+def test_threshold_outputs_binary_and_unknown_steps_are_ignored(tmp_path):
+    pre = _preprocessor(tmp_path, preprocess_steps=['threshold', 'sharpen'], threshold_block_size=30)
+    assert pre.steps == ['threshold'] and pre.block_size == 31
+    rgb = np.dstack([_text_page()] * 3)
+    out, transform = pre.process(rgb)
+    assert transform is None
+    assert set(np.unique(out)) <= {0, 255}
@@ -0,0 +1,76 @@
+import pytest
+
+import job_scheduler
+from job_scheduler import JobScheduler
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    counts = {}
+    monkeypatch.setattr(job_scheduler, 'read_page_count', lambda path: counts[path])
+    return counts
+
+
+def _order(units):
+    return [(u.input_pdf, u.start_page, u.end_page) for u in units]
+
+
+def test_fifo_keeps_selection_order(pages):
+    pages.update({'a.pdf': 300, 'b.pdf': 5, 'c.pdf': 40})
+    units = JobScheduler('fifo').plan(['a.pdf', 'b.pdf', 'c.pdf'])
+    assert [u.input_pdf for u in units] == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_sjf_orders_by_page_count_then_selection(pages):
+    pages.update({'a.pdf': 300, 'b.pdf': 5, 'c.pdf': 40, 'd.pdf': 5})
+    units = JobScheduler('sjf').plan(['a.pdf', 'b.pdf', 'c.pdf', 'd.pdf'])
+    assert [u.input_pdf for u in units] == ['b.pdf', 'd.pdf', 'c.pdf', 'a.pdf']
+    assert not any(u.split for u in units)
+
+
+def test_priority_patterns_come_first(pages):
+    pages.update({'report.pdf': 5, '긴급_계약.pdf': 300, 'memo.pdf': 40})
+    scheduler = JobScheduler('priority', priorities={'*긴급*': 10, 'memo*': 1})
+    units = scheduler.plan(['report.pdf', '긴급_계약.pdf', 'memo.pdf'])
+    assert [u.input_pdf for u in units] == ['긴급_계약.pdf', 'memo.pdf', 'report.pdf']
+
+
+def test_large_files_are_split_and_interleaved(pages):
+    pages.update({'a.pdf': 300, 'b.pdf': 500})
+    units = JobScheduler('sjf', split_pages=200).plan(['b.pdf', 'a.pdf'])
+    assert _order(units) == [
+        ('a.pdf', 1, 200), ('b.pdf', 1, 200), ('a.pdf', 201, 300),
+        ('b.pdf', 201, 400), ('b.pdf', 401, 500),
+    ]
+    assert [u.finish for u in units] == [False, False, True, False, True]
+    assert units[-1].ranges == [(1, 200), (201, 400), (401, 500)]
+    assert units[-1].describe() == 'b.pdf 401-500쪽 (3/3)'
+
+
+def test_short_file_not_stuck_behind_split_file(pages):
+    pages.update({'big.pdf': 1000, 'small.pdf': 150})
+    units = JobScheduler('fifo', split_pages=200).plan(['big.pdf', 'small.pdf'])
+    assert _order(units)[:2] == [('big.pdf', 1, 200), ('small.pdf', None, None)]
+
+
+def test_priority_splits_only_interleave_within_level(pages):
+    pages.update({'긴급.pdf': 400, 'normal.pdf': 10})
+    scheduler = JobScheduler('priority', split_pages=200, priorities={'긴급*': 5})
+    units = scheduler.plan(['normal.pdf', '긴급.pdf'])
+    assert [u.input_pdf for u in units] == ['긴급.pdf', '긴급.pdf', 'normal.pdf']
+
+
+def test_report_records_failure_and_unstarted_files(pages):
+    pages.update({'a.pdf': 10, 'b.pdf': 20})
+    scheduler = JobScheduler('sjf')
+    first, second = scheduler.plan(['a.pdf', 'b.pdf'])
+    scheduler.unit_started(first)
+    scheduler.unit_finished(first, ok=False)
+    report = scheduler.report()
+    assert list(report) == ['a.pdf']
+    assert report['a.pdf']['ok'] is False
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        JobScheduler('lifo')
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from block_table import BoxTable, quads_to_rects
+from config_manager import ConfigManager
+from layout_processor import LayoutProcessor
+
+
+def _quad(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_quads_to_rects_keeps_coordinates_outside_image():
+    rects = quads_to_rects([_quad(-5, 10, 40, 30), [[10, 5], [50, 0], [55, 20], [12, 25]]])
+    assert rects.tolist() == [[-5, 10, 40, 30], [10, 0, 55, 25]]
+
+
+def test_quads_to_rects_empty():
+    assert quads_to_rects(np.zeros((0, 4, 2))).shape == (0, 4)
+
+
+def test_box_table_round_trip():
+    results = [(_quad(10, 20, 60, 40), 'hello', 0.5), (_quad(70, 20, 100, 40), 'world', 0.75)]
+    table = BoxTable.from_readtext(results, 200, 100)
+    dicts = table.to_dicts()
+    assert dicts[0] == {'text_raw': 'hello', 'confidence': 0.5, 'x_rel': 0.05, 'y_rel': 0.2,
+                        'w_rel': 0.25, 'h_rel': 0.2, 'font_size': 20}
+    again = BoxTable.from_blocks(dicts, 200, 100)
+    assert again.rects().tolist() == table.rects().tolist()
+
+
+def test_box_table_maps_all_quads_at_once():
+    results = [(_quad(0, 0, 10, 10), 'a', 0.9), (_quad(20, 0, 30, 10), 'b', 0.8)]
+    calls = []
+
+    def shift(quads):
+        calls.append(quads.shape)
+        return quads + [5, 1]
+
+    table = BoxTable.from_readtext(results, 100, 100, map_points=shift)
+    assert calls == [(2, 4, 2)]
+    assert table.rects().tolist() == [[5, 1, 15, 11], [25, 1, 35, 11]]
+    assert len(BoxTable.from_readtext([], 100, 100, map_points=shift)) == 0
+
+
+@pytest.fixture
+def make_layout(tmp_path):
+    def make(mode):
+        config = ConfigManager(str(tmp_path / 'config.json'))
+        config.override_settings({'layout_mode': mode})
+        return LayoutProcessor(config)
+    return make
+
+
+def _page_results():
+    # 두 줄, 검출 순서는 뒤섞임
+    return [
+        (_quad(70, 21, 120, 41), 'b', 0.8),
+        (_quad(10, 80, 60, 100), 'c', 0.9),
+        (_quad(10, 20, 60, 40), 'a', 0.6),
+    ]
+
+
+def test_default_layout_is_per_box(tmp_path):
+    layout = LayoutProcessor(ConfigManager(str(tmp_path / 'config.json')))
+    blocks = layout.group_page(BoxTable.from_readtext(_page_results(), 200, 200), 200, 200)
+    assert [b['text_raw'] for b in blocks] == ['b', 'c', 'a']
+    assert all('boxes' not in b for b in blocks)
+
+
+def test_line_mode_merges_in_reading_order(make_layout):
+    blocks = make_layout('line').group_page(BoxTable.from_readtext(_page_results(), 200, 200), 200, 200)
+    assert [b['text_raw'] for b in blocks] == ['a b', 'c']
+    assert blocks[0]['confidence'] == pytest.approx(0.7)
+    assert [box['text_raw'] for box in blocks[0]['boxes']] == ['a', 'b']
+    assert blocks[0]['x_rel'] == pytest.approx(0.05) and blocks[0]['w_rel'] == pytest.approx(0.55)
+
+
+def test_paragraph_mode_joins_close_lines(make_layout):
+    results = [(_quad(10, 20, 100, 40), 'one', 0.9), (_quad(10, 44, 100, 64), 'two', 0.9),
+               (_quad(10, 150, 100, 170), 'far', 0.9)]
+    blocks = make_layout('paragraph').group_page(BoxTable.from_readtext(results, 200, 200), 200, 200)
+    assert [b['text_raw'] for b in blocks] == ['one two', 'far']
+    assert blocks[0]['lines'] == 2 and 'lines' not in blocks[1]
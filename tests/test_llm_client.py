@@ -0,0 +1,67 @@
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('openai')
+
+from config_manager import ConfigManager
+from llm_client import ClientPool, LatencyStats, build_client, combined_summary, timed_request
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings({'timeout_seconds': 7, 'api_connect_timeout': 2, 'api_base_url': ''})
+    return config
+
+
+def test_build_client_applies_timeouts(config):
+    client = build_client(config, 'sk-test', 'http://127.0.0.1:9/v1')
+    try:
+        assert client.timeout.read == 7 and client.timeout.connect == 2
+        assert str(client.base_url).startswith('http://127.0.0.1:9/v1')
+    finally:
+        client.close()
+
+
+def test_pool_reuses_clients_per_key_and_recreates_closed(config):
+    pool = ClientPool(config)
+    a = pool.get('sk-a')
+    assert pool.get('sk-a') is a
+    assert pool.get('sk-b') is not a
+    assert pool.get('sk-a', 'http://127.0.0.1:9/v1') is not a
+    a.close()
+    assert pool.get('sk-a') is not a
+    pool.close()
+
+
+def test_latency_stats_summary_and_merge():
+    stats = LatencyStats(max_samples=100)
+    for ms in range(1, 101):
+        stats.record(ms / 1000, ok=ms % 10 != 0, tokens=2)
+    s = stats.summary()
+    assert (s['requests'], s['errors'], s['tokens']) == (100, 10, 200)
+    assert (s['p50_ms'], s['p95_ms'], s['max_ms']) == (51.0, 96.0, 100.0)
+    assert s['mean_ms'] == pytest.approx(50.5)
+
+    other = LatencyStats()
+    other.record(1.0)
+    assert combined_summary([stats, other])['max_ms'] == 1000.0
+    stats.merge(other)
+    assert stats.summary()['requests'] == 101
+    assert LatencyStats().summary()['p95_ms'] is None
+
+
+def test_timed_request_records_failures():
+    stats = LatencyStats()
+
+    class Usage:
+        total_tokens = 12
+
+    class Resp:
+        usage = Usage()
+
+    assert isinstance(timed_request(stats, lambda: Resp()), Resp)
+    with pytest.raises(RuntimeError):
+        timed_request(stats, lambda: (_ for _ in ()).throw(RuntimeError("timeout")))
+    s = stats.summary()
+    assert (s['requests'], s['errors'], s['tokens']) == (2, 1, 12)
@@ -0,0 +1,67 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('easyocr')
+
+import ocr_processor
+from config_manager import ConfigManager
+from distributed_ocr import DistributedCoordinator
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    calls = {'threads': [], 'interop': [], 'reader': []}
+    torch = SimpleNamespace(
+        cuda=SimpleNamespace(is_available=lambda: calls.get('cuda', False)),
+        set_num_threads=calls['threads'].append,
+        set_num_interop_threads=calls['interop'].append,
+    )
+    monkeypatch.setitem(sys.modules, 'torch', torch)
+    monkeypatch.setattr(ocr_processor.easyocr, 'Reader',
+                        lambda langs, gpu, quantize: calls['reader'].append((gpu, quantize)) or object())
+
+    def make(**settings):
+        config = ConfigManager(str(tmp_path / 'config.json'))
+        config.override_settings(settings)
+        processor = ocr_processor.OCRProcessor(config)
+        processor.initialize_reader()
+        return calls
+
+    make.calls = calls
+    return make
+
+
+def test_cpu_limits_torch_threads(env):
+    calls = env(ocr_device='cpu', torch_threads=3, ocr_quantize=True)
+    assert calls['threads'] == [3] and calls['interop'] == [1]
+    assert calls['reader'] == [(False, True)]
+
+
+def test_default_threads_left_alone(env):
+    calls = env(ocr_device='cpu', torch_threads=0, ocr_quantize=False)
+    assert calls['threads'] == []
+    assert calls['reader'] == [(False, False)]
+
+
+@pytest.mark.parametrize('device, cuda, gpu', [('auto', True, True), ('auto', False, False), ('cuda', False, True)])
+def test_device_selection(env, device, cuda, gpu):
+    env.calls['cuda'] = cuda
+    calls = env(ocr_device=device, torch_threads=2)
+    assert calls['reader'][0][0] is gpu
+    # GPU를 쓰면 CPU 스레드 설정은 건드리지 않음
+    assert calls['threads'] == ([] if gpu else [2])
+
+
+def test_local_workers_split_cores(tmp_path, monkeypatch):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings({'torch_threads': 0})
+    coordinator = DistributedCoordinator(config, str(tmp_path / 'job'))
+    monkeypatch.setattr(coordinator, '_spawn_worker', lambda: None)
+    monkeypatch.setattr('os.cpu_count', lambda: 8)
+    coordinator.spawn_local_workers(3)
+    assert coordinator.worker_threads == 2
+    config.override_settings({'torch_threads': 4})
+    coordinator.spawn_local_workers(3)
+    assert coordinator.worker_threads == 4
@@ -0,0 +1,84 @@
+import json
+import threading
+
+import fitz
+import pytest
+
+from config_manager import ConfigManager
+from ocr_service import OCRService, ServiceClient, create_server
+
+
+@pytest.fixture
+def service(tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    svc = OCRService(config, db_path=str(tmp_path / 'jobs.sqlite3'))
+    yield svc
+    svc._stopping.set()
+    svc.jobs.close()
+
+
+def test_stop_keeps_store_open_while_worker_alive(service):
+    release = threading.Event()
+    thread = threading.Thread(target=release.wait, daemon=True)
+    thread.start()
+    service._threads.append(thread)
+
+    assert service.stop(timeout=0.05) is False
+    # 워커가 아직 작업 상태를 기록할 수 있어야 함
+    job = service.jobs.submit('a.pdf', 'out')
+    service.jobs.update(job['id'], status='failed')
+
+    release.set()
+    assert service.stop(timeout=1) is True
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-1'])
+def test_jobs_invalid_limit_returns_400(service, limit):
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = ServiceClient(port=server.server_address[1], timeout=5)
+        with pytest.raises(Exception, match='SERVICE_ERROR: 400'):
+            client.request('GET', f'/jobs?limit={limit}')
+        service.jobs.submit('a.pdf', 'out')
+        assert len(client.request('GET', '/jobs?limit=5')) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _FakeOCR:
+    def preprocess_pdf(self, input_pdf, raw_json, start_page, end_page, **kw):
+        blocks = [{'id': 0, 'page': 1, 'text': '가나다', 'bbox': [0, 0, 10, 10]}]
+        with open(raw_json, 'w', encoding='utf-8') as f:
+            json.dump(blocks, f)
+        return blocks
+
+
+class _OverLimitAPI:
+    def check_token_limit(self):
+        return False
+
+    def recover_text_with_api(self, *args, **kw):
+        raise AssertionError("일일 토큰 제한을 넘었는데 교정을 실행함")
+
+
+class _FakePDF:
+    def manifest_path(self, output_pdf):
+        return output_pdf + '.json'
+
+
+def test_job_over_daily_token_limit_fails_before_correction(service, tmp_path):
+    input_pdf = str(tmp_path / 'in.pdf')
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(input_pdf)
+    doc.close()
+    job = service.jobs.submit(input_pdf, str(tmp_path / 'out'))
+
+    service._run_job(service.jobs.claim(), _FakeOCR(), _OverLimitAPI(), _FakePDF())
+
+    stored = service.jobs.get(job['id'])
+    assert stored['status'] == 'failed'
+    assert stored['error'].startswith('QUOTA_ERROR:')
+    assert service.metrics_data['jobs_failed'] == 1
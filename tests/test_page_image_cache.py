@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import fitz
+import numpy as np
+import pytest
+
+from page_image_cache import PageImageCache, file_sha256, render_page
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / 'in.pdf')
+    doc = fitz.open()
+    for n in range(3):
+        page = doc.new_page(width=200, height=100)
+        page.insert_text((20, 50), f"page {n + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_file_hash_ignores_path(pdf, tmp_path):
+    copy = str(tmp_path / 'renamed.pdf')
+    shutil.copyfile(pdf, copy)
+    assert file_sha256(copy) == file_sha256(pdf)
+
+
+def test_render_page_shapes(pdf):
+    doc = fitz.open(pdf)
+    assert render_page(doc[0], 72).shape == (100, 200, 3)
+    assert render_page(doc[0], 144, 'gray').shape == (200, 400)
+    doc.close()
+
+
+def test_get_or_render_hits_memory_map(pdf, tmp_path):
+    cache = PageImageCache(str(tmp_path / 'cache'))
+    pdf_hash = file_sha256(pdf)
+    doc = fitz.open(pdf)
+    rendered, hit = cache.get_or_render(doc[1], pdf_hash, 72)
+    assert not hit
+    cached, hit = cache.get_or_render(doc[1], pdf_hash, 72)
+    assert hit and isinstance(cached, np.memmap)
+    assert np.array_equal(cached, rendered)
+    # DPI/색공간이 다르면 다른 항목
+    assert cache.get(pdf_hash, 2, 96) is None
+    assert cache.get(pdf_hash, 2, 72, 'gray') is None
+    doc.close()
+
+
+def test_corrupt_entry_is_removed(tmp_path):
+    cache = PageImageCache(str(tmp_path / 'cache'))
+    path = cache.path_for('ab' * 32, 1, 72)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'not a numpy file')
+    assert cache.get('ab' * 32, 1, 72) is None
+    assert not os.path.exists(path)
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    arr = np.zeros((100, 100), dtype=np.uint8)
+    cache = PageImageCache(str(tmp_path / 'cache'), max_bytes=10 ** 9)
+    entry = cache.put('cd' * 32, 1, 72, arr)
+    os.utime(cache.path_for('cd' * 32, 1, 72), (1000, 1000))
+    cache.max_bytes = int(entry * 2.5)
+    cache.put('cd' * 32, 2, 72, arr)
+    cache.put('cd' * 32, 3, 72, arr)
+    assert cache.get('cd' * 32, 1, 72) is None
+    assert cache.get('cd' * 32, 3, 72) is not None
+    assert cache.total_size() <= cache.max_bytes
+
+
+def test_prewarm_renders_only_missing_pages(pdf, tmp_path):
+    cache = PageImageCache(str(tmp_path / 'cache'))
+    pdf_hash = file_sha256(pdf)
+    assert cache.prewarm(pdf, 72, pages=[1], workers=1) == 1
+    assert cache.prewarm(pdf, 72, workers=2) == 2
+    assert cache.prewarm(pdf, 72) == 0
+    doc = fitz.open(pdf)
+    assert np.array_equal(cache.get(pdf_hash, 3, 72), render_page(doc[2], 72))
+    doc.close()
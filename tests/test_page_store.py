@@ -0,0 +1,89 @@
+import random
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.synthetic import _line_text
+from config_manager import ConfigManager
+from page_image_cache import render_page
+from page_store import PageResultStore, detail_diff, page_fingerprint, settings_key
+
+
+@pytest.fixture
+def config(tmp_path):
+    return ConfigManager(str(tmp_path / 'config.json'))
+
+
+@pytest.mark.parametrize('name, value', [
+    ('dpi', 200),
+    ('layout_mode', 'line'),
+    ('ocr_quantize', False),
+    ('preprocess_steps', ['grayscale']),
+    ('threshold_block_size', 15),
+    ('threshold_c', 4),
+    ('deskew_max_angle', 3.0),
+])
+def test_settings_key_changes_with_ocr_settings(config, name, value):
+    config.override_settings({'preprocess_enabled': True})
+    before = settings_key(config)
+    config.override_settings({name: value})
+    assert settings_key(config) != before
+
+
+def test_settings_key_ignores_preprocess_params_when_disabled(config):
+    config.override_settings({'preprocess_enabled': False})
+    before = settings_key(config)
+    config.override_settings({'threshold_block_size': 15, 'threshold_c': 4, 'deskew_max_angle': 3.0})
+    assert settings_key(config) == before
+
+
+def _page(number=3, seed=1, noise=0):
+    # 같은 배치의 본문 30줄 + 페이지 번호를 OCR과 같은 300 DPI로 렌더링
+    rng = random.Random(seed)
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    for i in range(30):
+        page.insert_text((50, 68 + i * 17.6), _line_text(rng, 8, 0.5), fontname='korea', fontsize=11)
+    page.insert_text((290, 810), f"- {number} -", fontname='korea', fontsize=10)
+    arr = render_page(page, 300, 'gray')
+    doc.close()
+    if noise:
+        arr = np.clip(arr + np.random.default_rng(seed).normal(0, noise, arr.shape), 0, 255).astype(np.uint8)
+    return Image.fromarray(arr)
+
+
+def test_fingerprint_tolerates_rescan_noise():
+    key, page_hash, detail = page_fingerprint(_page())
+    assert detail.shape == (1087, 768)
+    noisy_key, noisy_hash, noisy_detail = page_fingerprint(_page(noise=20))
+    assert noisy_key != key
+    assert (page_hash ^ noisy_hash).bit_count() <= 3
+    assert detail_diff(detail, noisy_detail) <= 16.0
+
+
+@pytest.mark.parametrize('other', [dict(number=4), dict(number=8), dict(seed=2)])
+def test_different_text_pages_do_not_match(tmp_path, other):
+    store = PageResultStore(str(tmp_path / 'pages.sqlite3'))
+    store.put(page_fingerprint(_page()), 'dpi=300', [{'text_raw': '3'}])
+    assert store.lookup(page_fingerprint(_page(**other)), 'dpi=300') is None
+    store.close()
+
+
+def test_lookup_matches_near_duplicate_with_same_settings(tmp_path):
+    store = PageResultStore(str(tmp_path / 'pages.sqlite3'))
+    fingerprint = page_fingerprint(_page())
+    blocks = [{'text_raw': '가나다', 'x_rel': 0.1, 'y_rel': 0.1}]
+    store.put(fingerprint, 'dpi=300', blocks)
+
+    noisy = page_fingerprint(_page(noise=8))
+    assert store.lookup(noisy, 'dpi=300') == (fingerprint[0], blocks)
+    assert store.lookup(noisy, 'dpi=200') is None
+    assert store.lookup(page_fingerprint(_page()), 'dpi=300') == (fingerprint[0], blocks)
+
+    # 교정 결과는 재사용한 항목의 키로 저장/조회
+    store.put_corrections(fingerprint[0], 'dpi=300', 'm', ['가나다'], ['가나다!'])
+    reused_key = store.lookup(noisy, 'dpi=300')[0]
+    assert store.get_corrections(reused_key, 'dpi=300', 'm', ['가나다']) == ['가나다!']
+    store.close()
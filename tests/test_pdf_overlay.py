@@ -0,0 +1,157 @@
+import hashlib
+import os
+
+import fitz
+import pytest
+
+from block_table import BoxTable
+from config_manager import ConfigManager
+from layout_processor import LayoutProcessor
+from pdf_processor import PDFProcessor
+
+PAGES = 4
+
+
+def _blocks(suffix=''):
+    blocks = []
+    for page in range(1, PAGES + 1):
+        for line in range(3):
+            blocks.append({
+                'page': page, 'id': len(blocks), 'text_raw': f"p{page} line{line}",
+                'text_corrected': f"페이지 {page} 줄 {line}{suffix if page == 2 else ''}",
+                'confidence': 0.9, 'x_rel': 0.1, 'y_rel': 0.1 + line * 0.05,
+                'w_rel': 0.6, 'h_rel': 0.03, 'font_size': 40,
+            })
+    return blocks
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """원본 폰트 없이 페이지 이미지만 있는 입력"""
+    path = str(tmp_path / 'scan.pdf')
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 60, 80), False)
+    pix.clear_with(200)
+    for _ in range(PAGES):
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, pixmap=pix)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """모든 페이지가 같은 원본 폰트를 쓰는 입력"""
+    path = str(tmp_path / 'text.pdf')
+    doc = fitz.open()
+    for n in range(PAGES):
+        doc.new_page(width=595, height=842).insert_text((50, 800), f"source {n}", fontname='helv')
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def make_processor(tmp_path):
+    def make(mode='balanced'):
+        config = ConfigManager(str(tmp_path / 'config.json'))
+        config.override_settings({'dpi': 300, 'overlay_save_mode': mode})
+        return PDFProcessor(config)
+    return make
+
+
+def _overlay_fonts(path):
+    with fitz.open(path) as doc:
+        return [{(xref, basefont) for xref, _, _, basefont, _, _ in page.get_fonts() if 'Droid' in basefont}
+                for page in doc]
+
+
+def _font_digest(path, xref):
+    with fitz.open(path) as doc:
+        return hashlib.sha256(doc.extract_font(xref)[3]).hexdigest()
+
+
+def test_all_pages_share_one_subset_font(scanned_pdf, make_processor, tmp_path):
+    out = str(tmp_path / 'out.pdf')
+    make_processor('balanced').overlay_with_fitz(scanned_pdf, _blocks(), out)
+    fonts = _overlay_fonts(out)
+    assert len(set.union(*fonts)) == 1
+    (_, basefont), = fonts[0]
+    assert '+' in basefont  # 서브셋 폰트 이름 접두어
+
+
+def test_fast_mode_skips_subset(scanned_pdf, make_processor, tmp_path):
+    fast, balanced = str(tmp_path / 'fast.pdf'), str(tmp_path / 'balanced.pdf')
+    make_processor('fast').overlay_with_fitz(scanned_pdf, _blocks(), fast)
+    make_processor('balanced').overlay_with_fitz(scanned_pdf, _blocks(), balanced)
+    (_, basefont), = _overlay_fonts(fast)[0]
+    assert '+' not in basefont
+    assert os.path.getsize(fast) > os.path.getsize(balanced)
+
+
+def test_update_subsets_only_new_font(scanned_pdf, make_processor, tmp_path):
+    out = str(tmp_path / 'out.pdf')
+    processor = make_processor()
+    processor.overlay_with_fitz(scanned_pdf, _blocks(), out)
+    (old_xref, _), = _overlay_fonts(out)[0]
+    old_digest = _font_digest(out, old_xref)
+    size = os.path.getsize(out)
+
+    logs = []
+    assert processor.update_overlay(scanned_pdf, _blocks(' 새글자뷁'), out, log_callback=logs.append) == [2]
+    assert '증분 저장' in logs[-1]
+    # 기존 서브셋 폰트는 다시 서브셋되지 않고 그대로 유지
+    assert _font_digest(out, old_xref) == old_digest
+    assert os.path.getsize(out) - size < 100 * 1024
+    with fitz.open(out) as doc:
+        assert '새글자뷁' in doc[1].get_text()
+        assert '페이지 1 줄 2' in doc[0].get_text() and '페이지 4 줄 0' in doc[3].get_text()
+
+
+def test_update_with_shared_source_font_saves_fully(text_pdf, make_processor, tmp_path):
+    out = str(tmp_path / 'out.pdf')
+    processor = make_processor()
+    processor.overlay_with_fitz(text_pdf, _blocks(), out)
+    logs = []
+    processor.update_overlay(text_pdf, _blocks(' 새글자뷁'), out, log_callback=logs.append)
+    assert '전체 저장' in logs[-1]
+    with fitz.open(out) as doc:
+        assert '새글자뷁' in doc[1].get_text()
+        assert 'source 3' in doc[3].get_text() and '페이지 4 줄 0' in doc[3].get_text()
+
+
+def _paragraph_blocks(tmp_path):
+    # 20자 한글 4줄 (300 DPI에서 720x40 픽셀, 줄 간격 55픽셀)을 문단 하나로 묶음
+    lines = [''.join(chr(0xAC00 + (n * 20 + i) * 37) for i in range(20)) for n in range(4)]
+    results = [([[200, 300 + n * 55], [920, 300 + n * 55], [920, 340 + n * 55], [200, 340 + n * 55]],
+                line, 0.9) for n, line in enumerate(lines)]
+    config = ConfigManager(str(tmp_path / 'layout.json'))
+    config.override_settings({'layout_mode': 'paragraph'})
+    blocks = LayoutProcessor(config).group_page(BoxTable.from_readtext(results, 2480, 3508), 2480, 3508)
+    assert len(blocks) == 1 and blocks[0]['lines'] == 4
+    return lines, [{'page': 1, 'id': 0, **blocks[0]}]
+
+
+def test_paragraph_lines_all_written(scanned_pdf, make_processor, tmp_path):
+    lines, blocks = _paragraph_blocks(tmp_path)
+    out = str(tmp_path / 'out.pdf')
+    make_processor().overlay_with_fitz(scanned_pdf, blocks, out)
+    with fitz.open(out) as doc:
+        text = doc[0].get_text()
+        assert all(line in text for line in lines)
+        # 각 줄은 원본 박스 위치에 기록
+        for n, line in enumerate(lines):
+            rect, = doc[0].search_for(line)
+            assert abs(rect.y0 - (300 + n * 55) * 72 / 300) < 5
+
+
+def test_corrected_paragraph_without_boxes_keeps_all_words(scanned_pdf, make_processor, tmp_path):
+    lines, blocks = _paragraph_blocks(tmp_path)
+    del blocks[0]['boxes']
+    blocks[0]['text_corrected'] = ' '.join(f"{line} 교정{n}" for n, line in enumerate(lines))
+    out = str(tmp_path / 'out.pdf')
+    make_processor().overlay_with_fitz(scanned_pdf, blocks, out)
+    with fitz.open(out) as doc:
+        words = doc[0].get_text().split()
+    assert words == blocks[0]['text_corrected'].split()
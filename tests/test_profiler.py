@@ -0,0 +1,66 @@
+import os
+import pstats
+
+import pytest
+
+from config_manager import ConfigManager
+from profiler import StageProfiler, _doc_name, profile_stage
+
+
+class _Processor:
+    def __init__(self, config):
+        self.config = config
+
+    @profile_stage('overlay')
+    def update(self, path, log_callback=None):
+        return self.render(path, log_callback=log_callback) + 1
+
+    @profile_stage('ocr')
+    def render(self, path, log_callback=None):
+        return sum(range(1000))
+
+    @profile_stage('api')
+    def fail(self, path, log_callback=None):
+        raise RuntimeError("실패")
+
+
+def _processor(tmp_path, mode):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings({'profile_mode': mode, 'profile_dir': str(tmp_path / 'profiles'), 'profile_top_n': 5})
+    return _Processor(config)
+
+
+def test_doc_name_strips_stage_suffix():
+    assert _doc_name('/out/문서_ocr_raw.json') == '문서'
+    assert _doc_name('/out/문서_ocr_corr.json') == '문서'
+    assert _doc_name('C:/in/scan.pdf') == 'scan'
+
+
+def test_off_mode_writes_nothing(tmp_path):
+    assert _processor(tmp_path, 'off').update('scan.pdf') == 499501
+    assert not os.path.exists(tmp_path / 'profiles')
+
+
+def test_cprofile_measures_outer_stage_only(tmp_path):
+    logs = []
+    assert _processor(tmp_path, 'cprofile').update('scan.pdf', log_callback=logs.append) == 499501
+    assert sorted(os.listdir(tmp_path / 'profiles')) == ['scan_overlay.prof', 'scan_overlay.txt']
+    stats = pstats.Stats(str(tmp_path / 'profiles' / 'scan_overlay.prof'))
+    assert any(func == 'render' for _, _, func in stats.stats)
+    assert len(logs) == 1 and logs[0].startswith('[프로파일 overlay]')
+    # 요약은 머리글 + 상위 profile_top_n개
+    assert len(logs[0].splitlines()) <= 1 + 1 + 5
+
+
+def test_tracemalloc_keeps_result_and_reports_on_error(tmp_path):
+    processor = _processor(tmp_path, 'tracemalloc')
+    assert processor.render('scan.pdf', log_callback=lambda msg: None) == 499500
+    with pytest.raises(RuntimeError):
+        processor.fail('scan_ocr_raw.json', log_callback=lambda msg: None)
+    assert sorted(os.listdir(tmp_path / 'profiles')) == [
+        'scan_api.tracemalloc', 'scan_api.txt', 'scan_ocr.tracemalloc', 'scan_ocr.txt']
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        StageProfiler('perf')
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from config_manager import ConfigManager
+from result_store import DocumentResultStore, ocr_key, overlay_key
+
+
+@pytest.fixture
+def config(tmp_path):
+    return ConfigManager(str(tmp_path / 'config.json'))
+
+
+def test_ocr_key_depends_on_content_settings_and_range(config):
+    key = ocr_key('abc', config, None, None, 10)
+    assert key == ocr_key('abc', config, 1, 10, 10)
+    assert key != ocr_key('abd', config, None, None, 10)
+    assert key != ocr_key('abc', config, 1, 5, 10)
+    config.override_settings({'dpi': 200})
+    assert key != ocr_key('abc', config, None, None, 10)
+
+
+def test_overlay_key_follows_file_content(tmp_path):
+    corr = tmp_path / 'a_ocr_corr.json'
+    corr.write_text('[1]')
+    renamed = tmp_path / 'b_ocr_corr.json'
+    renamed.write_text('[1]')
+    assert overlay_key(str(corr), 'pdf') == overlay_key(str(renamed), 'pdf')
+    renamed.write_text('[2]')
+    assert overlay_key(str(corr), 'pdf') != overlay_key(str(renamed), 'pdf')
+
+
+def test_put_and_restore_all_stage_files(tmp_path):
+    store = DocumentResultStore(str(tmp_path / 'store'))
+    src = {'output_pdf': tmp_path / 'a.pdf', 'manifest': tmp_path / 'a.overlay.json'}
+    src['output_pdf'].write_bytes(b'%PDF')
+    assert store.put('overlay', 'k' * 64, {k: str(v) for k, v in src.items()}) is False
+    src['manifest'].write_text('{}')
+    assert store.put('overlay', 'k' * 64, {k: str(v) for k, v in src.items()}) is True
+
+    dst = {'output_pdf': str(tmp_path / 'out' / 'b.pdf'), 'manifest': str(tmp_path / 'out' / 'b.overlay.json')}
+    assert store.restore('overlay', 'k' * 64, dst) is True
+    assert open(dst['output_pdf'], 'rb').read() == b'%PDF'
+    assert store.restore('overlay', 'x' * 64, dst) is False
+
+
+def test_restore_requires_every_stage_file(tmp_path):
+    store = DocumentResultStore(str(tmp_path / 'store'))
+    pdf = tmp_path / 'a.pdf'
+    pdf.write_bytes(b'%PDF')
+    manifest = tmp_path / 'a.overlay.json'
+    manifest.write_text('{}')
+    store.put('overlay', 'k' * 64, {'output_pdf': str(pdf), 'manifest': str(manifest)})
+    os.remove(store.path_for('overlay', 'k' * 64, 'manifest'))
+    assert store.restore('overlay', 'k' * 64, {'output_pdf': str(tmp_path / 'b.pdf'),
+                                                'manifest': str(tmp_path / 'b.json')}) is False
+    assert not os.path.exists(tmp_path / 'b.pdf')
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    store = DocumentResultStore(str(tmp_path / 'store'))
+    for n in range(3):
+        raw = tmp_path / f"{n}.json"
+        raw.write_bytes(b'x' * 100)
+        store.put('ocr', f"{n}" * 64, {'raw_json': str(raw)})
+        path = store.path_for('ocr', f"{n}" * 64, 'raw_json')
+        os.utime(path, (1000 + n, 1000 + n))
+    # 가장 오래된 0번을 사용하면 1번이 먼저 삭제됨
+    store.restore('ocr', '0' * 64, {'raw_json': str(tmp_path / 'restored.json')})
+    store.max_bytes = 250
+    assert store.evict() == 1
+    assert not os.path.exists(store.path_for('ocr', '1' * 64, 'raw_json'))
+    assert os.path.exists(store.path_for('ocr', '0' * 64, 'raw_json'))
+    assert store.total_size() == 200
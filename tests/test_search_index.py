@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from search_index import SearchIndex, build_match_query, to_grams
+
+
+@pytest.mark.parametrize('text, grams', [
+    ('한국어 OCR', '한국 국어 어 ocr'),
+    ('가', '가'),
+    ('교정된 PDF-파일', '교정 정된 된 pdf 파일 일'),
+    ('!!  ', ''),
+])
+def test_to_grams(text, grams):
+    assert to_grams(text) == grams
+
+
+@pytest.mark.parametrize('query, match', [
+    ('한국어 OCR', '"한국 국어" "ocr"'),
+    ('국', '"국"*'),
+    ('"교정" OR', '"교정" "or"'),
+    ('!!', ''),
+])
+def test_build_match_query(query, match):
+    assert build_match_query(query) == match
+
+
+def _write_corr(path, texts):
+    blocks = [{'id': i, 'page': 1 + i // 2, 'x_rel': 0.1, 'y_rel': 0.1 * i, 'w_rel': 0.5, 'h_rel': 0.05,
+               'text_raw': text, 'text_corrected': text} for i, text in enumerate(texts)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(blocks, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = SearchIndex(str(tmp_path / 'index.sqlite3'))
+    yield idx
+    idx.close()
+
+
+def test_search_finds_substrings_regardless_of_particles(index, tmp_path):
+    corr = str(tmp_path / 'doc_ocr_corr.json')
+    _write_corr(corr, ['한국어를 인식합니다', 'OCR 결과를 교정', '관계없는 문장'])
+    assert index.index_document(corr) == 3
+
+    assert [r['text'] for r in index.search('국어')] == ['한국어를 인식합니다']
+    assert [r['block_id'] for r in index.search('ocr 교정')] == [1]
+    assert {r['block_id'] for r in index.search('관')} == {2}
+    assert index.search('없는단어') == []
+    assert index.search('"') == []
+
+
+def test_reindex_skips_unchanged_and_replaces_changed(index, tmp_path):
+    corr = str(tmp_path / 'doc_ocr_corr.json')
+    _write_corr(corr, ['첫 번째 문서'])
+    assert index.index_document(corr) == 1
+    assert index.index_document(corr) == 0
+
+    _write_corr(corr, ['고친 문서', '추가 블록'])
+    assert index.index_document(corr) == 2
+    assert index.search('번째') == []
+    assert index.stats() == {'documents': 1, 'blocks': 2}
+
+    assert index.remove_document(corr) is True
+    assert index.search('고친') == []
+    assert index.stats() == {'documents': 0, 'blocks': 0}
@@ -0,0 +1,22 @@
+import fitz
+
+from benchmarks.synthetic import generate_pdf
+
+
+def test_generate_pdf_is_reproducible_and_matches_ground_truth(tmp_path):
+    first = generate_pdf(str(tmp_path / 'a.pdf'), pages=2, lines_per_page=3, words_per_line=4, seed=7)
+    second = generate_pdf(str(tmp_path / 'b.pdf'), pages=2, lines_per_page=3, words_per_line=4, seed=7)
+    assert first == second
+    assert [len(lines) for lines in first] == [3, 3]
+
+    with fitz.open(str(tmp_path / 'a.pdf')) as doc:
+        assert len(doc) == 2
+        assert doc[1].get_text().split('\n')[:3] == first[1]
+
+
+def test_generate_pdf_blank_pages(tmp_path):
+    truth = generate_pdf(str(tmp_path / 'blank.pdf'), pages=3, lines_per_page=0, page_size='letter')
+    assert truth == [[], [], []]
+    with fitz.open(str(tmp_path / 'blank.pdf')) as doc:
+        assert doc[0].rect.width == fitz.paper_size('letter')[0]
+        assert not doc[2].get_text().strip()
@@ -0,0 +1,78 @@
+import xml.etree.ElementTree as ET
+
+import fitz
+import pytest
+
+from config_manager import ConfigManager
+from text_exporter import TextExporter, _word_boxes
+
+ALTO = '{http://www.loc.gov/standards/alto/ns-v4#}'
+XHTML = '{http://www.w3.org/1999/xhtml}'
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / 'doc.pdf')
+    doc = fitz.open()
+    doc.new_page(width=200, height=100)
+    doc.new_page(width=300, height=150)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _blocks():
+    return [
+        {'page': 1, 'text_raw': 'helo wrld', 'text_corrected': 'hello world', 'confidence': 0.5,
+         'x_rel': 0.1, 'y_rel': 0.2, 'w_rel': 0.5, 'h_rel': 0.1},
+        {'page': 1, 'text_raw': '', 'text_corrected': '', 'blank': True,
+         'x_rel': 0, 'y_rel': 0, 'w_rel': 1, 'h_rel': 1},
+        {'page': 2, 'text_raw': 'a<b & "c"', 'confidence': 0.9,
+         'x_rel': 0.0, 'y_rel': 0.0, 'w_rel': 1.0, 'h_rel': 0.2},
+    ]
+
+
+def test_word_boxes_split_by_character_share():
+    assert _word_boxes('ab cd', 0, 0, 50, 10) == [('ab', 0, 0, 20, 10), ('cd', 30, 0, 50, 10)]
+    assert _word_boxes('   ', 0, 0, 50, 10) == []
+
+
+def test_exports_all_formats(pdf, tmp_path):
+    base = str(tmp_path / 'doc')
+    with TextExporter(pdf, base, ['txt', 'hocr', 'alto'], dpi=144) as exporter:
+        exporter.write_document(_blocks())
+
+    with open(base + '_text.txt', encoding='utf-8') as f:
+        assert f.read() == 'hello world\n\fa<b & "c"\n'
+
+    html = ET.parse(base + '.hocr').getroot()
+    pages = html.findall(f".//{XHTML}div[@class='ocr_page']")
+    assert [p.get('title') for p in pages] == ['bbox 0 0 400 200; ppageno 0', 'bbox 0 0 600 300; ppageno 1']
+    words = html.findall(f".//{XHTML}span[@class='ocrx_word']")
+    assert [w.text for w in words] == ['hello', 'world', 'a<b', '&', '"c"']
+    assert words[0].get('title') == 'bbox 40 40 131 60; x_wconf 50'
+
+    alto = ET.parse(base + '_alto.xml').getroot()
+    page2 = alto.findall(f".//{ALTO}Page")[1]
+    assert (page2.get('WIDTH'), page2.get('HEIGHT')) == ('600', '300')
+    assert [s.get('CONTENT') for s in page2.iter(f"{ALTO}String")] == ['a<b', '&', '"c"']
+
+
+def test_pages_are_flushed_as_they_complete(pdf, tmp_path):
+    base = str(tmp_path / 'doc')
+    exporter = TextExporter(pdf, base, ['txt'])
+    exporter.write_page(1, _blocks()[:2])
+    with open(base + '_text.txt', encoding='utf-8') as f:
+        assert f.read() == 'hello world\n'
+    exporter.close()
+
+
+def test_unknown_format_rejected(pdf, tmp_path):
+    with pytest.raises(ValueError):
+        TextExporter(pdf, str(tmp_path / 'doc'), ['txt', 'docx'])
+
+
+def test_from_config_disabled_without_formats(pdf, tmp_path):
+    config = ConfigManager(str(tmp_path / 'config.json'))
+    config.override_settings({'export_formats': []})
+    assert TextExporter.from_config(config, pdf, str(tmp_path / 'doc')) is None
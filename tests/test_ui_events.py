@@ -0,0 +1,97 @@
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip('tkinter')
+pytest.importorskip('easyocr')
+pytest.importorskip('httpx')
+
+from gui_app import OCRApp
+
+
+class _Root:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append((ms, func))
+
+
+class _Var:
+    def __init__(self, value=None):
+        self.value = value
+        self.sets = []
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        self.sets.append(value)
+
+
+class _Text:
+    def __init__(self):
+        self.inserts = []
+
+    def config(self, **kw):
+        pass
+
+    def insert(self, index, text):
+        self.inserts.append(text)
+
+    def see(self, index):
+        pass
+
+
+@pytest.fixture
+def app():
+    # Tk 창 없이 이벤트 큐 처리만 확인
+    app = OCRApp.__new__(OCRApp)
+    app.root = _Root()
+    app.ui_events = queue.Queue()
+    app.progress_var = _Var()
+    app.progress_bar = {}
+    app.debug_mode = _Var(True)
+    app.log_text = _Text()
+    return app
+
+
+def test_drain_applies_latest_progress_and_batches_logs(app):
+    workers = [threading.Thread(target=lambda n=n: (app.update_progress(f"p{n}", n),
+                                                    app.log_debug_message(f"m{n}")))
+               for n in range(50)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    app.update_progress("done", 100)
+
+    app.drain_ui_events()
+    assert app.progress_var.sets == ["done"] and app.progress_bar['value'] == 100
+    assert len(app.log_text.inserts) == 1
+    assert app.log_text.inserts[0].count('\n') == 50
+    assert app.root.scheduled == [(OCRApp.UI_POLL_MS, app.drain_ui_events)]
+
+
+def test_calls_run_after_earlier_updates(app):
+    order = []
+    app.update_progress("before", 10)
+    app.post_ui(lambda value: order.append((value, app.progress_var.get())), 'call')
+    app.update_progress("after", 20)
+
+    app.drain_ui_events()
+    assert order == [('call', 'before')]
+    assert app.progress_var.sets == ["before", "after"]
+
+
+def test_logs_dropped_when_debug_off_and_timer_rescheduled_on_error(app):
+    app.debug_mode.value = False
+    app.log_debug_message("hidden")
+    app.post_ui(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        app.drain_ui_events()
+    assert app.root.scheduled, "타이머가 다시 예약되어야 함"
+    app.drain_ui_events()
+    assert app.log_text.inserts == []
@@ -0,0 +1,99 @@
+import os
+
+import fitz
+import pytest
+
+import watch_folder
+from config_manager import ConfigManager
+from ocr_service import OCRService
+from watch_folder import FolderWatcher
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = OCRService(ConfigManager(str(tmp_path / 'config.json')), db_path=str(tmp_path / 'jobs.sqlite3'))
+    yield svc
+    svc.jobs.close()
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    path = tmp_path / 'inbox'
+    path.mkdir()
+    return path
+
+
+def _write_pdf(path, pages=1):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    doc.save(str(path))
+    doc.close()
+
+
+def _watcher(service, inbox, **kw):
+    kw.setdefault('settle_seconds', 0)
+    return FolderWatcher(service, str(inbox), log_callback=lambda msg: None, **kw)
+
+
+def test_submits_settled_pdf_once(service, inbox):
+    _write_pdf(inbox / 'scan.pdf')
+    for name in ('scan_recovered.pdf', '.hidden.pdf', '~lock.pdf'):
+        _write_pdf(inbox / name)
+    (inbox / 'notes.txt').write_text('x')
+    watcher = _watcher(service, inbox)
+
+    # 첫 확인에서는 크기/수정 시각만 기록
+    assert watcher.scan() == []
+    jobs = watcher.scan()
+    assert [os.path.basename(j['input_pdf']) for j in jobs] == ['scan.pdf']
+    assert watcher.scan() == []
+    assert watcher.stats['submitted'] == 1
+
+
+def test_waits_for_settle_time(service, inbox):
+    _write_pdf(inbox / 'scan.pdf')
+    watcher = _watcher(service, inbox, settle_seconds=3600)
+    assert watcher.scan() == [] and watcher.scan() == []
+
+
+def test_incomplete_pdf_waits_until_readable(service, inbox):
+    (inbox / 'scan.pdf').write_bytes(b'%PDF-1.7\n1 0 obj')
+    watcher = _watcher(service, inbox)
+    watcher.scan()
+    assert watcher.scan() == []
+
+    _write_pdf(inbox / 'scan.pdf', pages=2)
+    watcher.scan()
+    assert len(watcher.scan()) == 1
+
+
+def test_changed_file_with_active_job_is_not_resubmitted(service, inbox):
+    _write_pdf(inbox / 'scan.pdf')
+    watcher = _watcher(service, inbox)
+    watcher.scan()
+    assert len(watcher.scan()) == 1
+
+    _write_pdf(inbox / 'scan.pdf', pages=3)
+    watcher.scan()
+    assert watcher.scan() == []
+    assert len(service.jobs.list()) == 1
+
+
+def test_completed_document_is_skipped(service, inbox, monkeypatch):
+    monkeypatch.setattr(watch_folder, 'document_incomplete_reason', lambda path, output: None)
+    _write_pdf(inbox / 'scan.pdf')
+    watcher = _watcher(service, inbox)
+    watcher.scan()
+    assert watcher.scan() == []
+    assert watcher.stats['skipped_done'] == 1
+
+
+def test_recursive_scan_skips_output_folder(service, inbox):
+    (inbox / 'sub').mkdir()
+    (inbox / 'out').mkdir()
+    _write_pdf(inbox / 'sub' / 'a.pdf')
+    _write_pdf(inbox / 'out' / 'b.pdf')
+    watcher = _watcher(service, inbox, recursive=True, output_folder=str(inbox / 'out'))
+    watcher.scan()
+    assert [os.path.relpath(j['input_pdf'], inbox) for j in watcher.scan()] == [os.path.join('sub', 'a.pdf')]
@@ -0,0 +1,215 @@
+"""
+텍스트 내보내기 모듈
+교정된 블록을 페이지가 완료될 때마다 일반 텍스트/hOCR/ALTO XML 파일에 바로 기록
+(문서 전체를 메모리에 모으지 않으며, 페이지마다 flush하여 색인기가 먼저 읽을 수 있음)
+"""
+from xml.sax.saxutils import escape, quoteattr
+from document_cache import shared_cache
+
+
+def _block_rect(b, width, height):
+    """상대좌표 블록 → 픽셀 좌표 (x0, y0, x1, y1)"""
+    x0 = int(round(b['x_rel'] * width))
+    y0 = int(round(b['y_rel'] * height))
+    x1 = int(round((b['x_rel'] + b['w_rel']) * width))
+    y1 = int(round((b['y_rel'] + b['h_rel']) * height))
+    return x0, y0, x1, y1
+
+
+def _word_boxes(text, x0, y0, x1, y1):
+    """블록 영역을 글자 수 비율로 나눠 단어별 근사 좌표 계산 → [(단어, x0, y0, x1, y1), ...]"""
+    words = text.split()
+    if not words:
+        return []
+    total_chars = len(' '.join(words))
+    per_char = (x1 - x0) / total_chars if total_chars else 0
+    boxes = []
+    pos = 0
+    for word in words:
+        wx0 = x0 + int(round(pos * per_char))
+        wx1 = x0 + int(round((pos + len(word)) * per_char))
+        boxes.append((word, wx0, y0, max(wx1, wx0 + 1), y1))
+        pos += len(word) + 1
+    return boxes
+
+
+class PlainTextWriter:
+    """페이지 구분자(폼 피드 \\f)로 나눈 UTF-8 텍스트. 블록마다 한 줄."""
+
+    def __init__(self, path):
+        self.f = open(path, 'w', encoding='utf-8', newline='\n')
+        self.pages = 0
+
+    def write_page(self, page_num, width, height, blocks):
+        if self.pages:
+            self.f.write('\f')
+        for b in blocks:
+            self.f.write(b['text'] + '\n')
+        self.pages += 1
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class HOCRWriter:
+    """hOCR 1.2 (XHTML). 좌표는 렌더링 DPI 기준 픽셀."""
+
+    def __init__(self, path, title=''):
+        self.f = open(path, 'w', encoding='utf-8', newline='\n')
+        self.f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+            '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="ko" lang="ko">\n<head>\n'
+            f'<title>{escape(title)}</title>\n'
+            '<meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>\n'
+            '<meta name="ocr-system" content="PDF-OCR-by-LLM (EasyOCR + LLM)"/>\n'
+            '<meta name="ocr-capabilities" content="ocr_page ocr_carea ocr_par ocr_line ocrx_word"/>\n'
+            '</head>\n<body>\n'
+        )
+        self.f.flush()
+
+    def write_page(self, page_num, width, height, blocks):
+        out = [f"<div class='ocr_page' id='page_{page_num}' "
+               f"title='bbox 0 0 {width} {height}; ppageno {page_num - 1}'>\n"]
+        for n, b in enumerate(blocks, start=1):
+            bid = f"{page_num}_{n}"
+            x0, y0, x1, y1 = b['rect']
+            bbox = f"bbox {x0} {y0} {x1} {y1}"
+            conf = int(round(b['confidence'] * 100))
+            out.append(f"<div class='ocr_carea' id='block_{bid}' title='{bbox}'>"
+                       f"<p class='ocr_par' id='par_{bid}' title='{bbox}'>"
+                       f"<span class='ocr_line' id='line_{bid}' title='{bbox}'>")
+            for w, (word, wx0, wy0, wx1, wy1) in enumerate(_word_boxes(b['text'], x0, y0, x1, y1), start=1):
+                out.append(f"<span class='ocrx_word' id='word_{bid}_{w}' "
+                           f"title='bbox {wx0} {wy0} {wx1} {wy1}; x_wconf {conf}'>{escape(word)}</span> ")
+            out.append("</span></p></div>\n")
+        out.append("</div>\n")
+        self.f.write(''.join(out))
+        self.f.flush()
+
+    def close(self):
+        self.f.write('</body>\n</html>\n')
+        self.f.close()
+
+
+class ALTOWriter:
+    """ALTO XML v4. 좌표 단위는 렌더링 DPI 기준 픽셀."""
+
+    def __init__(self, path, title=''):
+        self.f = open(path, 'w', encoding='utf-8', newline='\n')
+        self.f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<alto xmlns="http://www.loc.gov/standards/alto/ns-v4#" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://www.loc.gov/standards/alto/ns-v4# '
+            'http://www.loc.gov/alto/v4/alto-4-2.xsd">\n'
+            '<Description>\n<MeasurementUnit>pixel</MeasurementUnit>\n'
+            f'<sourceImageInformation><fileName>{escape(title)}</fileName></sourceImageInformation>\n'
+            '</Description>\n<Layout>\n'
+        )
+        self.f.flush()
+
+    def write_page(self, page_num, width, height, blocks):
+        out = [f'<Page ID="page_{page_num}" PHYSICAL_IMG_NR="{page_num}" WIDTH="{width}" HEIGHT="{height}">\n'
+               f'<PrintSpace HPOS="0" VPOS="0" WIDTH="{width}" HEIGHT="{height}">\n']
+        for n, b in enumerate(blocks, start=1):
+            bid = f"{page_num}_{n}"
+            x0, y0, x1, y1 = b['rect']
+            geom = f'HPOS="{x0}" VPOS="{y0}" WIDTH="{x1 - x0}" HEIGHT="{y1 - y0}"'
+            wc = f"{b['confidence']:.2f}"
+            out.append(f'<TextBlock ID="block_{bid}" {geom}>\n<TextLine ID="line_{bid}" {geom}>\n')
+            words = _word_boxes(b['text'], x0, y0, x1, y1)
+            for w, (word, wx0, wy0, wx1, wy1) in enumerate(words):
+                if w:
+                    out.append('<SP/>')
+                out.append(f'<String ID="string_{bid}_{w + 1}" CONTENT={quoteattr(word)} WC="{wc}" '
+                           f'HPOS="{wx0}" VPOS="{wy0}" WIDTH="{wx1 - wx0}" HEIGHT="{wy1 - wy0}"/>')
+            out.append('\n</TextLine>\n</TextBlock>\n')
+        out.append('</PrintSpace>\n</Page>\n')
+        self.f.write(''.join(out))
+        self.f.flush()
+
+    def close(self):
+        self.f.write('</Layout>\n</alto>\n')
+        self.f.close()
+
+
+class TextExporter:
+    # 형식 → (파일 이름 접미사, 작성기)
+    FORMATS = {
+        'txt': ('_text.txt', PlainTextWriter),
+        'hocr': ('.hocr', HOCRWriter),
+        'alto': ('_alto.xml', ALTOWriter),
+    }
+
+    def __init__(self, input_pdf, base_path, formats, dpi=300):
+        """
+        base_path: 확장자를 제외한 출력 경로 (예: 출력폴더/문서이름)
+        formats: 'txt', 'hocr', 'alto' 중 선택
+        """
+        self.dpi = dpi
+        # 페이지 크기만 사용 (픽셀 좌표 계산용, 기록하는 페이지만 다른 단계와 공유하는 문서 정보에서 조회)
+        self.input_pdf = input_pdf
+        title = input_pdf.replace('\\', '/').rsplit('/', 1)[-1]
+        self.paths = {}
+        self.writers = []
+        try:
+            for fmt in formats:
+                if fmt not in self.FORMATS:
+                    raise ValueError(f"지원하지 않는 내보내기 형식: {fmt}")
+                suffix, writer_cls = self.FORMATS[fmt]
+                path = base_path + suffix
+                writer = writer_cls(path) if writer_cls is PlainTextWriter else writer_cls(path, title)
+                self.paths[fmt] = path
+                self.writers.append(writer)
+        except BaseException:
+            self.close()
+            raise
+
+    @classmethod
+    def from_config(cls, config_manager, input_pdf, base_path):
+        """설정(export_formats)에서 생성. 형식이 없으면 None"""
+        formats = config_manager.get_setting('export_formats', [])
+        if not formats:
+            return None
+        return cls(input_pdf, base_path, formats, config_manager.get_setting('dpi', 300))
+
+    def write_page(self, page_num, blocks):
+        """한 페이지의 교정 블록 기록 (페이지 번호 순서대로 호출)"""
+        zoom = self.dpi / 72.0
+        w, h = shared_cache().page_size(self.input_pdf, page_num)
+        width, height = int(round(w * zoom)), int(round(h * zoom))
+        rows = [
+            {
+                'text': b.get('text_corrected', b['text_raw']),
+                'confidence': float(b.get('confidence', 1.0)),
+                'rect': _block_rect(b, width, height),
+            }
+            for b in blocks if not b.get('blank')
+        ]
+        for writer in self.writers:
+            writer.write_page(page_num, width, height, rows)
+
+    def write_document(self, blocks):
+        """이미 완료된 교정 결과 전체를 페이지 순서대로 기록"""
+        page_blocks = []
+        for b in blocks:
+            if page_blocks and page_blocks[0]['page'] != b['page']:
+                self.write_page(page_blocks[0]['page'], page_blocks)
+                page_blocks = []
+            page_blocks.append(b)
+        if page_blocks:
+            self.write_page(page_blocks[0]['page'], page_blocks)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
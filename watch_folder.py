@@ -0,0 +1,191 @@
+"""
+감시 폴더 모듈
+입력 폴더를 주기적으로 확인해 새로 들어온 PDF를 상주 작업 서비스(ocr_service) 큐에 자동으로 등록합니다.
+(네트워크 공유 폴더에서는 inotify 같은 파일 시스템 알림이 전달되지 않는 경우가 많아 폴링 방식 사용)
+
+  - 복사 중인 파일: 크기/수정 시각이 watch_settle_seconds 동안 바뀌지 않고 PDF로 열릴 때까지 대기
+  - 이미 처리한 파일: 출력 폴더의 단계별 결과가 모두 완료되어 있으면 건너뜀
+  - 이미 등록한 파일: 대기/실행 중인 작업이 있으면 다시 등록하지 않음 (내용이 바뀌면 다시 등록)
+  - 결과 파일(*_recovered.pdf), 숨김/임시 파일(., ~로 시작)은 무시
+
+설정:
+  watch_poll_seconds     폴더 확인 주기 (초)
+  watch_settle_seconds   파일 크기/수정 시각이 이 시간 동안 그대로면 복사 완료로 판단
+  watch_recursive        하위 폴더까지 감시
+
+사용 예:
+  python watch_folder.py 스캔폴더 --output-folder out --workers 2
+  python ocr_service.py status          # 감시 중에도 같은 포트로 상태/지표 조회
+"""
+import os
+import time
+import argparse
+import threading
+import fitz
+from config_manager import ConfigManager
+from pipeline import document_incomplete_reason
+from ocr_service import OCRService, create_server, DEFAULT_PORT
+
+
+class FolderWatcher:
+    def __init__(self, service, input_dir, output_folder=None, poll_seconds=5.0, settle_seconds=10.0,
+                 recursive=False, log_callback=None):
+        self.service = service
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_folder = os.path.abspath(output_folder) if output_folder else None
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.log = log_callback or print
+        self._pending = {}     # 경로 → (크기, 수정 시각, 마지막 변경 확인 시각)
+        self._handled = {}     # 경로 → 처리(등록/건너뜀)한 버전의 (크기, 수정 시각)
+        self._stopping = threading.Event()
+        self.stats = {'scans': 0, 'submitted': 0, 'skipped_done': 0}
+
+    @classmethod
+    def from_config(cls, service, config_manager, input_dir, output_folder=None, log_callback=None):
+        return cls(
+            service, input_dir,
+            output_folder=output_folder or config_manager.get_setting('output_folder', '') or None,
+            poll_seconds=config_manager.get_setting('watch_poll_seconds', 5),
+            settle_seconds=config_manager.get_setting('watch_settle_seconds', 10),
+            recursive=config_manager.get_setting('watch_recursive', False),
+            log_callback=log_callback,
+        )
+
+    def _output_folder_for(self, path):
+        # OCRService.submit과 같은 기본값 (출력 폴더를 정하지 않으면 입력 파일 옆)
+        return self.output_folder or os.path.dirname(path)
+
+    def _candidates(self):
+        for root, dirs, files in os.walk(self.input_dir):
+            if not self.recursive:
+                dirs.clear()
+            elif self.output_folder:
+                dirs[:] = [d for d in dirs if os.path.join(root, d) != self.output_folder]
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if (not name.lower().endswith('.pdf') or name.startswith(('.', '~'))
+                        or name.endswith('_recovered.pdf')):
+                    continue
+                yield os.path.join(root, name)
+
+    def _pdf_state(self, path):
+        """'ok' 정상, 'repaired' 열리지만 손상 복구가 필요함(아직 쓰는 중일 수 있음), None 열 수 없음"""
+        try:
+            with fitz.open(path) as doc:
+                if len(doc) == 0:
+                    return None
+                return 'repaired' if doc.is_repaired else 'ok'
+        except Exception:
+            return None
+
+    def scan(self):
+        """폴더를 한 번 확인해 복사가 끝난 새 PDF를 등록합니다. 등록한 작업 목록 반환"""
+        now = time.time()
+        self.stats['scans'] += 1
+        seen = set()
+        ready = []
+        for path in self._candidates():
+            seen.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            version = (st.st_size, st.st_mtime_ns)
+            if self._handled.get(path) == version:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[:2] != version:
+                # 새 파일이거나 아직 쓰는 중
+                self._pending[path] = (*version, now)
+                continue
+            if now - pending[2] >= self.settle_seconds:
+                ready.append((path, version, now - pending[2]))
+
+        # 사라진 파일 정리
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+        for path in list(self._handled):
+            if path not in seen:
+                del self._handled[path]
+
+        if not ready:
+            return []
+        active = self.service.jobs.active_inputs()
+        jobs = []
+        for path, version, stable_for in ready:
+            state = self._pdf_state(path)
+            # 크기는 그대로지만 아직 완전하지 않은 파일은 다음 확인에서 다시 시도.
+            # 손상 복구로만 열리는 파일은 복사가 멈춘 것일 수 있어 더 오래 기다린 뒤 그대로 처리
+            if state is None or (state == 'repaired' and stable_for < self.settle_seconds * 3):
+                continue
+            del self._pending[path]
+            self._handled[path] = version
+            name = os.path.relpath(path, self.input_dir)
+            if path in active:
+                continue
+            reason = document_incomplete_reason(path, self._output_folder_for(path))
+            if reason is None:
+                self.stats['skipped_done'] += 1
+                self.log(f"[감시] {name}: 이미 처리 완료, 건너뜀")
+                continue
+            job = self.service.submit(path, self.output_folder)
+            self.stats['submitted'] += 1
+            self.log(f"[감시] {name}: 작업 {job['id']} 등록 ({reason})")
+            jobs.append(job)
+        return jobs
+
+    def run(self):
+        """stop()을 호출할 때까지 poll_seconds마다 폴더 확인"""
+        self.log(f"[감시] {self.input_dir} 감시 시작 (주기 {self.poll_seconds}s, 안정화 {self.settle_seconds}s)")
+        while not self._stopping.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                self.log(f"[감시] 폴더 확인 오류: {e}")
+            self._stopping.wait(self.poll_seconds)
+
+    def stop(self):
+        self._stopping.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="입력 폴더를 감시해 새 PDF를 자동 처리")
+    parser.add_argument('input_dir', help="감시할 폴더")
+    parser.add_argument('--output-folder', help="결과 폴더 (생략 시 설정의 output_folder, 없으면 입력 파일 옆)")
+    parser.add_argument('--workers', type=int, default=1, help="동시에 처리할 워커 수")
+    parser.add_argument('--db', default='service_jobs.sqlite3', help="작업 큐 파일")
+    parser.add_argument('--config', default='config.json', help="설정 파일 경로")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="상태 조회용 포트 (0이면 열지 않음)")
+    parser.add_argument('--socket', help="TCP 대신 사용할 Unix 소켓 경로")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"감시할 폴더가 없습니다: {args.input_dir}")
+    config = ConfigManager(args.config)
+    service = OCRService(config, db_path=args.db, workers=args.workers)
+    server = None
+    if args.port or args.socket:
+        server = create_server(service, args.host, args.port, args.socket)
+        threading.Thread(target=server.serve_forever, name="service-http", daemon=True).start()
+    service.start()
+    watcher = FolderWatcher.from_config(service, config, args.input_dir, args.output_folder)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n감시 종료 중...")
+    finally:
+        watcher.stop()
+        if server:
+            server.shutdown()
+            server.server_close()
+        service.stop(timeout=30)
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()